@@ -2,10 +2,20 @@
 
 # Define the paths
 DB_PATH="/var/www/event-booking-system/server/db/bookings.db"
+SIGNATURE_STORE="/var/www/event-booking-system/server/db/signature_store"
 BACKUP_DIR="/var/db_backups"
 
 # Generate the timestamp
 DATE=$(date +%Y%m%d_%H%M%S)
 
 # Perform the backup
-cp $DB_PATH $BACKUP_DIR/bookings_backup_$DATE.db
+# The database runs in WAL mode, so a plain cp can miss committed pages that
+# still live in bookings.db-wal. The online backup API copies a consistent snapshot.
+sqlite3 "$DB_PATH" ".backup '$BACKUP_DIR/bookings_backup_$DATE.db'"
+
+# Signature files are content-addressed and never change once written,
+# so one shared copy is enough and only new files have to be copied.
+if [ -d "$SIGNATURE_STORE" ]; then
+    mkdir -p "$BACKUP_DIR/signature_store"
+    cp -rn "$SIGNATURE_STORE/." "$BACKUP_DIR/signature_store/"
+fi
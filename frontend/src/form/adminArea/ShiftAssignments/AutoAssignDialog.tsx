@@ -54,13 +54,16 @@ const AutoAssignDialog: React.FC<AutoAssignDialogProps> = ({
           >
             <MenuItem value="priority">Prioritize Participant Preferences</MenuItem>
             <MenuItem value="fill">Prioritize Filling Timeslots</MenuItem>
+            <MenuItem value="optimal">Optimal (Most Assignments, Best Preferences)</MenuItem>
           </Select>
         </FormControl>
 
         <Typography variant="body2" color="text.secondary" sx={{ mt: 2 }}>
           {strategy === 'priority' ?
             "This will assign participants to their highest priority shifts first, then second, then third." :
-            "This will fill up the least-filled timeslots first, starting with participants who selected them."
+            strategy === 'fill' ?
+            "This will fill up the least-filled timeslots first, starting with participants who selected them." :
+            "This will make as many assignments as possible and, among those, match participant preferences as closely as possible."
           }
         </Typography>
       </DialogContent>
@@ -44,10 +44,12 @@ export interface AutoAssignResult {
   bookings_fully_assigned: number;
   timeslots_total: number;
   timeslots_filled: number;
+  objective: number;
+  solve_time_ms: number;
 }
 
 export type ViewType = 'timeslots' | 'bookings';
 export type SortOrder = 'asc' | 'desc';
-export type AssignStrategy = 'priority' | 'fill';
+export type AssignStrategy = 'priority' | 'fill' | 'optimal';
 export type TimeslotFilter = 'all' | 'filled' | 'unfilled';
 export type BookingFilter = 'all' | 'assigned' | 'unassigned';
\ No newline at end of file
@@ -171,3 +171,46 @@ CREATE TABLE IF NOT EXISTS ShiftAssignments (
     UNIQUE(booking_id, timeslot_id)
 );
 
+-- Per-option booking counts, maintained by booking_service on every insert/update/delete.
+-- Rebuilt from Bookings/BookingMaterials by src/utils/reconcile_counters.py
+CREATE TABLE IF NOT EXISTS BookingCounters (
+    scope TEXT NOT NULL,
+    option_id INTEGER NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (scope, option_id)
+) WITHOUT ROWID;
+
+-- Confirmation mails waiting to be sent, written in the same transaction as the booking.
+-- Drained by the outbox worker (src/services/outbox_service.py)
+CREATE TABLE IF NOT EXISTS MailOutbox (
+    id INTEGER PRIMARY KEY NOT NULL,
+    kind TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',  -- pending, sending, sent, failed
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    claimed_at REAL,
+    last_error TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    sent_at DATETIME
+);
+
+
+-- Secondary indexes for the hot lookup paths
+CREATE INDEX IF NOT EXISTS idx_users_email_name ON Users (email, last_name, first_name);
+CREATE INDEX IF NOT EXISTS idx_bookings_user_id ON Bookings (user_id);
+-- Keyset pagination of /api/data sorted by timestamp, the implicit rowid breaks ties
+CREATE INDEX IF NOT EXISTS idx_bookings_timestamp ON Bookings (Timestamp);
+CREATE INDEX IF NOT EXISTS idx_bookings_first_priority ON Bookings (first_priority_timeslot_id);
+CREATE INDEX IF NOT EXISTS idx_bookings_second_priority ON Bookings (second_priority_timeslot_id, amount_shifts);
+CREATE INDEX IF NOT EXISTS idx_bookings_third_priority ON Bookings (third_priority_timeslot_id, amount_shifts);
+CREATE INDEX IF NOT EXISTS idx_booking_materials_booking ON BookingMaterials (booking_id, material_id);
+CREATE INDEX IF NOT EXISTS idx_booking_professions_booking ON BookingProfessions (booking_id, profession_id);
+-- ShiftAssignments(booking_id, ...) is already covered by its UNIQUE constraint
+CREATE INDEX IF NOT EXISTS idx_shift_assignments_timeslot ON ShiftAssignments (timeslot_id);
+CREATE INDEX IF NOT EXISTS idx_artists_email_name ON Artists (email, last_name, first_name);
+CREATE INDEX IF NOT EXISTS idx_artist_bookings_artist_id ON ArtistBookings (artist_id);
+CREATE INDEX IF NOT EXISTS idx_artist_booking_materials_booking ON ArtistBookingMaterials (booking_id, artist_material_id);
+CREATE INDEX IF NOT EXISTS idx_artist_booking_professions_booking ON ArtistBookingProfessions (booking_id, profession_id);
+CREATE INDEX IF NOT EXISTS idx_mail_outbox_status ON MailOutbox (status, next_attempt_at);
@@ -1,3 +1,5 @@
+import multiprocessing
+import os
 import sys
 from collections import defaultdict
 
@@ -14,6 +16,9 @@ from src.api.bookings import bookings_bp
 from src.api.formcontent import formcontent_bp
 
 from src.utils.config import load_config
+from src.models.database import release_app_context_connection
+from src.services.booking_service import _connect_db
+from src.services.outbox_service import start_outbox_worker
 from src.utils.logger import setup_logging, get_logger, log_request, log_response, log_security_event
 from src.api.health import health_bp
 from src.api.artist_bookings import artist_bp
@@ -141,6 +146,15 @@ def after_request(response):
     return log_response(response)
 
 
+# Hand pooled database connections back at the end of each request
+app.teardown_appcontext(release_app_context_connection)
+
+# Send queued confirmation mails in the background, disable to run src/utils/mail_outbox_worker.py instead.
+# Not in spawned helper processes (auto-assignment search), which import this module again.
+if os.environ.get('MAIL_OUTBOX_WORKER', 'true').lower() == 'true' and multiprocessing.parent_process() is None:
+    start_outbox_worker(_connect_db)
+
+
 def handle_exception(exc_type, exc_value, exc_traceback):
     if issubclass(exc_type, KeyboardInterrupt):
         sys.__excepthook__(exc_type, exc_value, exc_traceback)
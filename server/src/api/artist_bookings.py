@@ -9,12 +9,18 @@ from src.services.artist_service import (
     insert_artist_booking,
     get_all_artist_bookings,
     get_artist_booking_by_id,
+    get_artist_booking_signature,
+    iter_artist_bookings,
     update_artist_booking,
     update_artist_payment,
     get_up_to_date_artist_form_content,
+    get_artist_form_content_etag,
     delete_artist_booking
 )
-from src.services.mail_service import send_artist_confirmation_mail
+from src.api.bookings import signature_response, export_response, table_export_response, ALL_EXPORT_FORMATS
+from src.services.export_service import TABLE_FORMATS, ARTIST_BOOKINGS
+from src.api.formcontent import form_content_response
+from src.services.signature_store import SignatureError
 from src.utils.logger import get_logger, log_security_event
 
 # Initialize logger
@@ -47,17 +53,15 @@ def submit_artist_form():
         artist_name = getattr(booking, 'artist_name', 'Unknown Artist')
         logger.info(f"Artist booking submission from {artist_name}")
 
-        success = insert_artist_booking(booking)
+        # The confirmation email is queued with the booking and sent by the outbox worker
+        try:
+            success = insert_artist_booking(booking, enqueue_confirmation=True)
+        except SignatureError as e:
+            logger.warning(f"Rejected signature from {artist_name}: {e}")
+            return jsonify({"error": str(e)}), 400
 
         if success:
-            try:
-                # Send email
-                form_content_dict = get_up_to_date_artist_form_content()
-                send_artist_confirmation_mail(booking, form_content_dict)
-                logger.info(f"Artist booking and confirmation email successful for {artist_name}")
-            except Exception as email_error:
-                logger.error(f"Artist booking successful but email failed for {artist_name}: {str(email_error)}",
-                             exc_info=True)
+            logger.info(f"Artist booking successful, confirmation email queued for {artist_name}")
 
             duration = time.time() - start_time
             logger.info(f"Artist booking process completed in {duration:.3f}s for {artist_name}")
@@ -82,15 +86,15 @@ def get_artist_formcontent():
     try:
         logger.info("Artist form content requested")
 
-        form_content_dict = get_up_to_date_artist_form_content()
+        response = form_content_response(get_artist_form_content_etag(), get_up_to_date_artist_form_content)
 
         duration = time.time() - start_time
-        logger.info(f"Artist form content generated successfully in {duration:.3f}s")
+        logger.info(f"Artist form content answered with {response.status_code} in {duration:.3f}s")
 
         if duration > 1.0:
             logger.warning(f"Slow artist form content generation: {duration:.3f}s")
 
-        return jsonify(form_content_dict), 200
+        return response
 
     except Exception as e:
         duration = time.time() - start_time
@@ -168,6 +172,35 @@ def get_artist_booking(booking_id):
         return jsonify({"error": "Failed to retrieve artist booking"}), 500
 
 
+@artist_bp.route("/artist/booking/<int:booking_id>/signature", methods=["GET"])
+@limiter_artist.limit("600/minute")
+@jwt_required()
+def get_artist_booking_signature_endpoint(booking_id):
+    """Get the signature image of an artist booking with admin authorization."""
+    try:
+        # Check if user has admin permissions
+        identity = get_jwt_identity()
+        if identity not in ["admin"]:
+            logger.warning(f"Unauthorized artist signature access attempt by {identity} for booking {booking_id}")
+            log_security_event('UNAUTHORIZED_ARTIST_SIGNATURE_ACCESS', {
+                'endpoint': 'get_artist_booking_signature',
+                'user_identity': identity,
+                'booking_id': booking_id
+            })
+            return jsonify({"error": "Unauthorized"}), 403
+
+        response = signature_response(get_artist_booking_signature(booking_id))
+        if response is None:
+            logger.warning(f"Signature of artist booking {booking_id} not found for admin {identity}")
+            return jsonify({"error": "Signature not found"}), 404
+
+        return response
+
+    except Exception as e:
+        logger.error(f"Failed to retrieve the signature of artist booking {booking_id}: {str(e)}", exc_info=True)
+        return jsonify({"error": "Failed to retrieve signature"}), 500
+
+
 @artist_bp.route("/artist/booking/<int:booking_id>", methods=["PUT"])
 @limiter_artist.limit("60/minute")
 @jwt_required()
@@ -274,4 +307,34 @@ def delete_artist_booking_endpoint(booking_id):
 
     except Exception as e:
         logger.error(f"Failed to delete artist booking {booking_id}: {str(e)}", exc_info=True)
-        return jsonify({"error": "Failed to delete artist booking"}), 500
\ No newline at end of file
+        return jsonify({"error": "Failed to delete artist booking"}), 500
+
+
+@artist_bp.route("/artist/export", methods=["GET"])
+@limiter_artist.limit("10/minute")
+@jwt_required()
+def export_artist_bookings():
+    """Export all artist bookings as NDJSON, a JSON array, CSV or XLSX with admin authorization."""
+    try:
+        # Check if user has admin permissions
+        identity = get_jwt_identity()
+        if identity not in ["admin"]:
+            logger.warning(f"Unauthorized artist booking export attempt by {identity}, IP: {request.remote_addr}")
+            log_security_event('UNAUTHORIZED_EXPORT_ATTEMPT', {
+                'endpoint': 'export_artist_bookings',
+                'user_identity': identity
+            })
+            return jsonify({"error": "Unauthorized"}), 403
+
+        export_format = request.args.get("format", "ndjson")
+        if export_format not in ALL_EXPORT_FORMATS:
+            return jsonify({"error": f"format must be one of: {', '.join(ALL_EXPORT_FORMATS)}"}), 400
+
+        logger.info(f"Admin {identity} exporting artist bookings as {export_format}")
+        if export_format in TABLE_FORMATS:
+            return table_export_response(ARTIST_BOOKINGS, export_format, "artist_bookings")
+        return export_response(iter_artist_bookings(), export_format, "artist_bookings")
+
+    except Exception as e:
+        logger.error(f"Failed to export artist bookings: {str(e)}", exc_info=True)
+        return jsonify({"error": "Failed to export artist bookings"}), 500
@@ -1,14 +1,23 @@
+import io
+import tempfile
 import time
-from flask import Blueprint, request, jsonify
+from typing import Optional
+from datetime import date
+from flask import Blueprint, Response, request, jsonify, make_response, send_file, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
 
 from src.models.datatypes import Booking
-from src.services.booking_service import insert_booking, get_all_bookings, get_up_to_date_form_content, delete_booking
-from src.services.mail_service import send_confirmation_mail
+from src.services.booking_service import insert_booking, get_all_bookings, delete_booking
 from src.services.booking_service import update_booking_db, update_booking_payment
+from src.services.booking_service import get_bookings_page, BOOKING_SORTS, MAX_PAGE_SIZE
+from src.services.booking_service import get_booking_signature, signature_store
+from src.services.booking_service import iter_bookings, export_chunks, EXPORT_FORMATS
+from src.services.export_service import iter_table_rows, csv_chunks, write_xlsx, xlsx_available, TABLE_FORMATS, \
+    BOOKINGS
+from src.services.signature_store import SignatureError, signature_etag
 from src.utils.logger import get_logger, log_security_event
 
 # Initialize logger
@@ -18,6 +27,77 @@ bookings_bp = Blueprint("bookings", __name__)
 limiter_bookings = Limiter(get_remote_address)
 
 
+EXPORT_MIMETYPES = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+ALL_EXPORT_FORMATS = EXPORT_FORMATS + TABLE_FORMATS
+
+
+def export_response(batches, export_format: str, filename: str) -> Response:
+    """
+    Streams an export as a download. Rows are read and serialized batch by batch
+    while the response is written, the full list is never built.
+    """
+    response = Response(stream_with_context(export_chunks(batches, export_format)),
+                        mimetype=EXPORT_MIMETYPES[export_format])
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}.{export_format}"'
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+def table_export_response(kind: str, export_format: str, filename: str):
+    """
+    Exports bookings with resolved titles. CSV is streamed like the JSON exports,
+    XLSX is written to a temporary file first (a zip is only valid once complete) and then sent.
+    """
+    if export_format == 'csv':
+        response = Response(stream_with_context(csv_chunks(iter_table_rows(kind))),
+                            mimetype=EXPORT_MIMETYPES['csv'])
+        response.headers["Content-Disposition"] = f'attachment; filename="{filename}.csv"'
+        response.headers["Cache-Control"] = "no-store"
+        return response
+
+    if not xlsx_available():
+        return jsonify({"error": "XLSX export is not available, openpyxl is not installed"}), 501
+    # Deleted as soon as send_file closes it
+    file = tempfile.TemporaryFile()
+    try:
+        write_xlsx(iter_table_rows(kind), file, filename)
+        file.seek(0)
+    except Exception:
+        file.close()
+        raise
+    response = send_file(file, mimetype=EXPORT_MIMETYPES['xlsx'], as_attachment=True,
+                         download_name=f"{filename}.xlsx")
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+def signature_response(value: Optional[str]):
+    """
+    Answers a signature request for a stored signature value with the PNG, or 304 if the client's
+    If-None-Match still matches. The ETag comes from the stored content hash, so a 304 never reads the file.
+    Booking ids can be reused after a deletion, so clients revalidate every time (no-cache).
+    Returns None if the signature can't be loaded.
+    """
+    etag = signature_etag(value)
+    if etag is None:
+        return None
+    if request.if_none_match.contains(etag):
+        response = make_response("", 304)
+    else:
+        png = signature_store.load(value)
+        if png is None:
+            return None
+        response = send_file(io.BytesIO(png), mimetype="image/png")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
 @bookings_bp.route("/submitForm", methods=["POST"])
 @limiter_bookings.limit("90/minute")
 @jwt_required()
@@ -42,20 +122,15 @@ def submit_form():
         booking = Booking(**booking_data)
         logger.info(f"Booking submission from {booking.first_name} {booking.last_name} ({booking.email})")
 
-        # Attempt to insert booking
-        success = insert_booking(booking)
+        # Attempt to insert booking, the confirmation email is queued with it and sent by the outbox worker
+        try:
+            success = insert_booking(booking, enqueue_confirmation=True)
+        except SignatureError as e:
+            logger.warning(f"Rejected signature from {booking.first_name} {booking.last_name}: {e}")
+            return jsonify({"error": str(e)}), 400
 
         if success:
-            # Send email
-            try:
-                form_content_dict = get_up_to_date_form_content()
-                send_confirmation_mail(booking, form_content_dict)
-                logger.info(f"Booking and confirmation email successful for {booking.first_name} {booking.last_name}")
-            except Exception as email_error:
-                logger.error(
-                    f"Booking successful but email failed for {booking.first_name} {booking.last_name}: {str(email_error)}",
-                    exc_info=True)
-                # Still return success since booking was created
+            logger.info(f"Booking successful, confirmation email queued for {booking.first_name} {booking.last_name}")
 
             duration = time.time() - start_time
             logger.info(f"Booking process completed in {duration:.3f}s for {booking.first_name} {booking.last_name}")
@@ -91,6 +166,10 @@ def get_bookings():
 
         logger.info(f"Admin {identity} accessing booking data from {request.remote_addr}")
 
+        # Paginated when asked for, the plain array stays for existing clients
+        if 'limit' in request.args or 'cursor' in request.args:
+            return _get_bookings_page(identity, start_time)
+
         all_bookings = get_all_bookings()
         booking_count = len(all_bookings)
 
@@ -108,6 +187,64 @@ def get_bookings():
         return jsonify({"error": "Failed to retrieve booking data"}), 500
 
 
+def _parse_bool(value: str) -> bool:
+    if value.lower() in ('true', '1', 'yes'):
+        return True
+    if value.lower() in ('false', '0', 'no'):
+        return False
+    raise ValueError(f"Invalid boolean: {value}")
+
+
+def _get_bookings_page(identity: str, start_time: float):
+    """
+    One page of /api/data: ?limit=&cursor=&sort=id|timestamp&order=asc|desc plus the filters
+    is_paid, ticket_id (repeatable), timeslot, name, email (prefixes), from, to (YYYY-MM-DD).
+    """
+    args = request.args
+    try:
+        limit = int(args.get('limit', 50))
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        sort = args.get('sort', 'id')
+        if sort not in BOOKING_SORTS:
+            raise ValueError(f"sort must be one of {', '.join(BOOKING_SORTS)}")
+        order = args.get('order', 'asc')
+        if order not in ('asc', 'desc'):
+            raise ValueError("order must be asc or desc")
+        for name in ('from', 'to'):
+            if name in args:
+                date.fromisoformat(args[name])
+        page = get_bookings_page(
+            limit=limit,
+            cursor=args.get('cursor'),
+            sort=sort,
+            descending=order == 'desc',
+            is_paid=_parse_bool(args['is_paid']) if 'is_paid' in args else None,
+            ticket_ids=[int(ticket_id) for ticket_id in args.getlist('ticket_id')],
+            timeslot_id=int(args['timeslot']) if 'timeslot' in args else None,
+            name_prefix=args.get('name'),
+            email_prefix=args.get('email'),
+            date_from=args.get('from'),
+            date_to=args.get('to')
+        )
+    except ValueError as e:
+        logger.warning(f"Invalid booking page request from admin {identity}: {e}")
+        return jsonify({"error": f"Invalid parameters: {e}"}), 400
+
+    if 'error' in page:
+        return jsonify({"error": "Failed to retrieve booking data"}), 500
+
+    duration = time.time() - start_time
+    logger.info(f"Retrieved page of {len(page['items'])} bookings in {duration:.3f}s for admin {identity}")
+
+    return jsonify({
+        "items": [vars(b) for b in page['items']],
+        "next_cursor": page['next_cursor'],
+        "total": page['total'],
+        "limit": limit
+    }), 200
+
+
 @bookings_bp.route("/booking/<int:booking_id>", methods=["PUT"])
 @limiter_bookings.limit("60/minute")
 @jwt_required()
@@ -214,4 +351,63 @@ def delete_booking_endpoint(booking_id):
 
     except Exception as e:
         logger.error(f"Failed to delete booking {booking_id}: {str(e)}", exc_info=True)
-        return jsonify({"error": "Failed to delete booking"}), 500
\ No newline at end of file
+        return jsonify({"error": "Failed to delete booking"}), 500
+
+
+@bookings_bp.route("/booking/<int:booking_id>/signature", methods=["GET"])
+@limiter_bookings.limit("600/minute")
+@jwt_required()
+def get_booking_signature_endpoint(booking_id):
+    """Get the signature image of a booking with admin authorization."""
+    try:
+        # Check if user has admin permissions
+        identity = get_jwt_identity()
+        if identity not in ["admin"]:
+            logger.warning(f"Unauthorized signature access attempt by {identity} for booking {booking_id}")
+            log_security_event('UNAUTHORIZED_SIGNATURE_ACCESS', {
+                'endpoint': 'get_booking_signature',
+                'user_identity': identity,
+                'booking_id': booking_id
+            })
+            return jsonify({"error": "Unauthorized"}), 403
+
+        response = signature_response(get_booking_signature(booking_id))
+        if response is None:
+            logger.warning(f"Signature of booking {booking_id} not found for admin {identity}")
+            return jsonify({"error": "Signature not found"}), 404
+
+        return response
+
+    except Exception as e:
+        logger.error(f"Failed to retrieve the signature of booking {booking_id}: {str(e)}", exc_info=True)
+        return jsonify({"error": "Failed to retrieve signature"}), 500
+
+
+@bookings_bp.route("/export", methods=["GET"])
+@limiter_bookings.limit("10/minute")
+@jwt_required()
+def export_bookings():
+    """Export all bookings as NDJSON, a JSON array, CSV or XLSX with admin authorization."""
+    try:
+        # Check if user has admin permissions
+        identity = get_jwt_identity()
+        if identity not in ["admin"]:
+            logger.warning(f"Unauthorized booking export attempt by {identity}, IP: {request.remote_addr}")
+            log_security_event('UNAUTHORIZED_EXPORT_ATTEMPT', {
+                'endpoint': 'export_bookings',
+                'user_identity': identity
+            })
+            return jsonify({"error": "Unauthorized"}), 403
+
+        export_format = request.args.get("format", "ndjson")
+        if export_format not in ALL_EXPORT_FORMATS:
+            return jsonify({"error": f"format must be one of: {', '.join(ALL_EXPORT_FORMATS)}"}), 400
+
+        logger.info(f"Admin {identity} exporting bookings as {export_format}")
+        if export_format in TABLE_FORMATS:
+            return table_export_response(BOOKINGS, export_format, "bookings")
+        return export_response(iter_bookings(), export_format, "bookings")
+
+    except Exception as e:
+        logger.error(f"Failed to export bookings: {str(e)}", exc_info=True)
+        return jsonify({"error": "Failed to export bookings"}), 500
@@ -1,11 +1,13 @@
 import time
-from flask import Blueprint, jsonify
-from flask_jwt_extended import jwt_required
+from flask import Blueprint, jsonify, request, make_response
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
-from src.services.booking_service import get_up_to_date_form_content
-from src.utils.logger import get_logger
+from src.services.booking_service import get_up_to_date_form_content, get_form_content_etag
+from src.services.formcontent_service import reload_form_content, get_form_content_snapshot, \
+    get_artist_form_content_snapshot
+from src.utils.logger import get_logger, log_security_event
 
 formcontent_bp = Blueprint("formcontent", __name__)
 limiter_formcontent = Limiter(get_remote_address)
@@ -14,6 +16,21 @@ limiter_formcontent = Limiter(get_remote_address)
 logger = get_logger(__name__)
 
 
+def form_content_response(etag: str, build_content):
+    """
+    Answers a form content request conditionally: 304 if the client's If-None-Match
+    still matches etag, otherwise the JSON built by build_content().
+    Clients must revalidate every time (no-cache), so availability never goes stale.
+    """
+    if request.if_none_match.contains(etag):
+        response = make_response("", 304)
+    else:
+        response = make_response(jsonify(build_content()), 200)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
 @formcontent_bp.route("/formcontent", methods=["GET"])
 @limiter_formcontent.limit("200/minute")
 @jwt_required()
@@ -24,18 +41,45 @@ def get_formcontent():
     try:
         logger.info("Form content requested")
 
-        data = get_up_to_date_form_content()
-        item_count = len(data.get('work_shifts', [])) if isinstance(data, dict) else 0
+        response = form_content_response(get_form_content_etag(), get_up_to_date_form_content)
 
         duration = time.time() - start_time
-        logger.info(f"Form content generated successfully with {item_count} work shifts in {duration:.3f}s")
+        logger.info(f"Form content answered with {response.status_code} in {duration:.3f}s")
 
         if duration > 1.0:  # Log slow form content generation
             logger.warning(f"Slow form content generation: {duration:.3f}s")
 
-        return jsonify(data), 200
+        return response
 
     except Exception as e:
         duration = time.time() - start_time
         logger.error(f"Error generating form content after {duration:.3f}s: {str(e)}", exc_info=True)
-        return jsonify({"error": "Failed to generate form content"}), 500
\ No newline at end of file
+        return jsonify({"error": "Failed to generate form content"}), 500
+
+
+@formcontent_bp.route("/formcontent/reload", methods=["POST"])
+@limiter_formcontent.limit("10/minute")
+@jwt_required()
+def reload_formcontent():
+    """Drop the cached form content so edited JSON files are picked up immediately."""
+    try:
+        identity = get_jwt_identity()
+        if identity != "admin":
+            logger.warning(f"Unauthorized form content reload attempt by {identity}")
+            log_security_event('UNAUTHORIZED_FORMCONTENT_RELOAD', {
+                'endpoint': 'reload_formcontent',
+                'user_identity': identity
+            })
+            return jsonify({"error": "Unauthorized"}), 403
+
+        reload_form_content()
+        versions = {
+            "form_content": get_form_content_snapshot().version,
+            "artist_form_content": get_artist_form_content_snapshot().version
+        }
+        logger.info(f"Form content reloaded by admin {identity}: {versions}")
+        return jsonify({"message": "Form content reloaded", "versions": versions}), 200
+
+    except Exception as e:
+        logger.error(f"Failed to reload form content: {str(e)}", exc_info=True)
+        return jsonify({"error": "Failed to reload form content"}), 500
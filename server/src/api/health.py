@@ -1,5 +1,6 @@
 import time
 import os
+from contextlib import closing
 from flask import Blueprint, jsonify
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
@@ -30,18 +31,27 @@ def health_check():
 
         # Check database connectivity
         try:
-            from src.services.booking_service import _connect_db
-            with _connect_db() as conn:
+            from src.services.booking_service import _connect_db, get_pool_stats, get_database_profile_status
+            with closing(_connect_db()) as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT 1")
                 cursor.fetchone()
 
+            profile_status = get_database_profile_status()
             health_status["checks"]["database"] = {
                 "status": "healthy",
-                "message": "Database connection successful"
+                "message": "Database connection successful",
+                "pool": get_pool_stats(),
+                "profile": profile_status
             }
             logger.debug("Database health check passed")
 
+            if not profile_status.get("ok"):
+                health_status["status"] = "degraded"
+                health_status["checks"]["database"]["status"] = "degraded"
+                health_status["checks"]["database"]["message"] = "Database PRAGMA profile not applied as configured"
+                logger.warning("Database PRAGMA profile mismatch")
+
         except Exception as db_error:
             health_status["status"] = "unhealthy"
             health_status["checks"]["database"] = {
@@ -75,6 +85,32 @@ def health_check():
             }
             logger.error(f"Logging health check failed: {str(log_error)}")
 
+        # Check mail outbox, mails that exhausted their retries need attention
+        try:
+            from src.services.booking_service import _connect_db
+            from src.services.outbox_service import get_outbox_stats
+            with closing(_connect_db()) as conn:
+                outbox_stats = get_outbox_stats(conn)
+
+            health_status["checks"]["mail_outbox"] = {
+                "status": "healthy",
+                "message": "No failed mails",
+                "counts": outbox_stats
+            }
+            if outbox_stats["failed"]:
+                health_status["status"] = "degraded"
+                health_status["checks"]["mail_outbox"]["status"] = "degraded"
+                health_status["checks"]["mail_outbox"]["message"] = f"{outbox_stats['failed']} mail(s) could not be sent"
+                logger.warning(f"Mail outbox has {outbox_stats['failed']} failed mails")
+
+        except Exception as outbox_error:
+            health_status["status"] = "degraded"
+            health_status["checks"]["mail_outbox"] = {
+                "status": "unhealthy",
+                "message": f"Mail outbox check failed: {str(outbox_error)}"
+            }
+            logger.error(f"Mail outbox health check failed: {str(outbox_error)}")
+
         # Check environment variables
         required_env_vars = ['JWT_SECRET_KEY', 'PASSWORD', 'ADMIN_PASSWORD']
         missing_vars = []
@@ -5,17 +5,17 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
 from src.models.datatypes import ShiftAssignment
+from src.services.assignment_engine import STRATEGIES, ORDER_DEPENDENT, SEARCH_MAX_TIME_BUDGET
 from src.services.shift_assignment_service import (
-    create_assignment,
+    create_assignment_checked,
+    apply_assignment_batch,
+    MAX_BATCH_OPERATIONS,
     update_assignment,
     delete_assignment,
     get_booking_assignments_summary,
     get_timeslot_summary,
     run_auto_assignment,
-    get_booking_shift_count,
-    get_booking_max_shifts,
-    get_timeslot_assignment_count,
-    get_timeslot_capacity
+    preview_auto_assignment
 )
 from src.utils.logger import get_logger, log_security_event
 
@@ -62,32 +62,7 @@ def create_shift_assignment():
 
         logger.info(f"Creating assignment: booking {booking_id} -> timeslot {timeslot_id}")
 
-        # Check if booking already has max shifts assigned
-        current_shifts = get_booking_shift_count(booking_id)
-        max_shifts = get_booking_max_shifts(booking_id)
-
-        if current_shifts >= max_shifts:
-            logger.warning(
-                f"Assignment rejected: booking {booking_id} already has {current_shifts}/{max_shifts} shifts")
-            return jsonify({
-                "error": "Booking already has maximum shifts assigned",
-                "current": current_shifts,
-                "max": max_shifts
-            }), 400
-
-        # Check if timeslot has capacity
-        current_assigned = get_timeslot_assignment_count(timeslot_id)
-        capacity = get_timeslot_capacity(timeslot_id)
-
-        if current_assigned >= capacity:
-            logger.warning(f"Assignment rejected: timeslot {timeslot_id} at capacity {current_assigned}/{capacity}")
-            return jsonify({
-                "error": "Timeslot is already at capacity",
-                "current": current_assigned,
-                "capacity": capacity
-            }), 400
-
-        # Create assignment
+        # Limits are checked and the assignment inserted in one transaction
         assignment = ShiftAssignment(
             booking_id=booking_id,
             timeslot_id=timeslot_id,
@@ -95,11 +70,19 @@ def create_shift_assignment():
             admin_notes=data.get('admin_notes', '')
         )
 
-        assignment_id = create_assignment(assignment)
+        result = create_assignment_checked(assignment)
 
-        if assignment_id < 0:
-            logger.error(f"Failed to create assignment: booking {booking_id} -> timeslot {timeslot_id}")
-            return jsonify({"error": "Assignment creation failed"}), 500
+        if 'reason' in result:
+            reason = result.pop('reason')
+            message = result.pop('message')
+            if reason == 'database_error':
+                logger.error(f"Failed to create assignment: booking {booking_id} -> timeslot {timeslot_id}")
+                return jsonify({"error": message}), 500
+            logger.warning(f"Assignment rejected ({reason}): booking {booking_id} -> timeslot {timeslot_id} {result}")
+            status = {'booking_not_found': 404, 'timeslot_not_found': 404, 'already_assigned': 409}.get(reason, 400)
+            return jsonify({"error": message, "reason": reason, **result}), status
+
+        assignment_id = result['assignment_id']
 
         duration = time.time() - start_time
         logger.info(
@@ -116,6 +99,78 @@ def create_shift_assignment():
         return jsonify({"error": "Assignment creation failed"}), 500
 
 
+def _valid_batch_operation(op) -> bool:
+    if not isinstance(op, dict) or op.get('op') not in ('create', 'update', 'delete'):
+        return False
+    required = ('booking_id', 'timeslot_id') if op['op'] == 'create' else ('id',)
+    id_fields = required + (('timeslot_id',) if op['op'] == 'update' and 'timeslot_id' in op else ())
+    if any(not isinstance(op.get(field), int) or isinstance(op.get(field), bool) for field in id_fields):
+        return False
+    if 'admin_notes' in op and not isinstance(op['admin_notes'], str):
+        return False
+    return True
+
+
+@shift_assignments_bp.route("/shifts/assignments/batch", methods=["POST"])
+@limiter_assignments.limit("60/minute")
+@jwt_required()
+def batch_shift_assignments():
+    """Apply a list of assignment creates, updates and deletes in one transaction."""
+    start_time = time.time()
+
+    try:
+        # Check if user has admin permissions
+        identity = get_jwt_identity()
+        if identity != "admin":
+            logger.warning(f"Unauthorized assignment batch attempt by {identity} from {request.remote_addr}")
+            log_security_event('UNAUTHORIZED_ASSIGNMENT_BATCH', {
+                'endpoint': 'batch_shift_assignments',
+                'user_identity': identity
+            })
+            return jsonify({"error": "Unauthorized"}), 403
+
+        if not request.json:
+            logger.warning("Assignment batch failed: missing JSON body")
+            return jsonify({"error": "Missing JSON body"}), 400
+
+        operations = request.json.get('operations')
+        if not isinstance(operations, list) or not operations:
+            logger.warning("Assignment batch failed: missing operations")
+            return jsonify({"error": "Missing operations"}), 400
+
+        if len(operations) > MAX_BATCH_OPERATIONS:
+            logger.warning(f"Assignment batch failed: {len(operations)} operations")
+            return jsonify({"error": f"At most {MAX_BATCH_OPERATIONS} operations per batch"}), 400
+
+        invalid = [index for index, op in enumerate(operations) if not _valid_batch_operation(op)]
+        if invalid:
+            logger.warning(f"Assignment batch failed: invalid operations at {invalid}")
+            return jsonify({"error": "Invalid operations", "invalid": invalid}), 400
+
+        logger.info(f"Admin {identity} applying assignment batch of {len(operations)} operations")
+
+        result = apply_assignment_batch(operations)
+
+        if 'error' in result:
+            logger.error(f"Assignment batch failed: {result['error']}")
+            return jsonify({"error": "Assignment batch failed"}), 500
+
+        duration = time.time() - start_time
+        if not result['applied']:
+            rejected = sum(1 for op_result in result['results'] if not op_result['ok'])
+            logger.warning(f"Assignment batch rejected in {duration:.3f}s: {rejected} of {len(operations)} "
+                           f"operations not possible, nothing applied")
+            return jsonify(result), 409
+
+        logger.info(f"Assignment batch of {len(operations)} operations applied in {duration:.3f}s")
+        return jsonify(result), 200
+
+    except Exception as e:
+        duration = time.time() - start_time
+        logger.error(f"Assignment batch failed after {duration:.3f}s: {str(e)}", exc_info=True)
+        return jsonify({"error": "Assignment batch failed"}), 500
+
+
 @shift_assignments_bp.route("/shifts/assignments/<int:assignment_id>", methods=["PUT"])
 @limiter_assignments.limit("100/minute")
 @jwt_required()
@@ -286,14 +341,50 @@ def auto_assign_shifts():
         data = request.json
         strategy = data.get('strategy', 'priority')
         reset = data.get('reset', False)
+        incremental = bool(data.get('incremental', False))
 
-        logger.info(f"Admin {identity} starting auto-assignment with strategy: {strategy}, reset: {reset}")
+        logger.info(f"Admin {identity} starting auto-assignment with strategy: {strategy}, reset: {reset}, "
+                    f"incremental: {incremental}")
 
-        if strategy not in ['priority', 'fill']:
+        if strategy not in STRATEGIES:
             logger.warning(f"Auto-assignment failed: invalid strategy '{strategy}'")
             return jsonify({"error": "Invalid strategy"}), 400
 
-        result = run_auto_assignment(strategy)
+        # Optional multi-seed search: {"time_budget": seconds, "workers": n, "seed": n}
+        search = data.get('search')
+        if search is not None:
+            if strategy not in ORDER_DEPENDENT:
+                logger.warning(f"Auto-assignment failed: search requested for strategy '{strategy}'")
+                return jsonify({"error": f"Search is only available for {', '.join(ORDER_DEPENDENT)}"}), 400
+            if not isinstance(search, dict):
+                return jsonify({"error": "Invalid search options"}), 400
+            try:
+                search = {key: value for key, value in {
+                    'time_budget': float(search['time_budget']) if 'time_budget' in search else None,
+                    'workers': int(search['workers']) if 'workers' in search else None,
+                    'seed': int(search['seed']) if search.get('seed') is not None else None
+                }.items() if value is not None}
+            except (TypeError, ValueError):
+                return jsonify({"error": "Invalid search options"}), 400
+            if not 0 < search.get('time_budget', 1) <= SEARCH_MAX_TIME_BUDGET or not 0 < search.get('workers', 1) <= 64 \
+                    or search.get('seed', 0) < 0:
+                return jsonify({"error": f"Invalid search options, time_budget is limited to "
+                                         f"{SEARCH_MAX_TIME_BUDGET:g} seconds, workers to 64"}), 400
+
+        if data.get('preview', False):
+            result = preview_auto_assignment(strategy, incremental, search)
+            if 'error' in result:
+                logger.error(f"Auto-assignment preview failed with strategy {strategy}: {result['error']}")
+                return jsonify({"error": result['error']}), 500
+            logger.info(f"Auto-assignment preview with strategy {strategy}: {len(result['added'])} added, "
+                        f"{len(result['removed'])} removed, {result['unchanged']} unchanged")
+            return jsonify(result), 200
+
+        result = run_auto_assignment(strategy, data.get('fingerprint'), incremental, search)
+
+        if result.get('conflict'):
+            logger.warning(f"Auto-assignment with strategy {strategy} rejected: {result['error']}")
+            return jsonify({"error": result['error']}), 409
 
         if 'error' in result:
             logger.error(f"Auto-assignment failed with strategy {strategy}: {result['error']}")
@@ -0,0 +1,304 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from flask import g, has_app_context
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '8'))
+DEFAULT_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '10'))
+
+_JOURNAL_MODES = ('WAL', 'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'OFF')
+_SYNCHRONOUS_LEVELS = {'OFF': 0, 'NORMAL': 1, 'FULL': 2, 'EXTRA': 3}
+_TEMP_STORE_LEVELS = {'DEFAULT': 0, 'FILE': 1, 'MEMORY': 2}
+
+
+def _pragma_choice(env_var: str, allowed, default: str) -> str:
+    # These end up in the PRAGMA statements as they are, so only known keywords get through
+    value = os.environ.get(env_var, default).strip().upper()
+    if value not in allowed:
+        logger.warning(f"Ignoring {env_var}={value!r}, expected one of {', '.join(allowed)}; using {default}")
+        return default
+    return value
+
+
+@dataclass
+class DatabaseProfile:
+    """
+    PRAGMA settings applied to every connection.
+    WAL lets admin reads run next to the single writer, busy_timeout makes
+    writers wait for the lock instead of failing with "database is locked".
+    """
+    journal_mode: str = 'WAL'
+    synchronous: str = 'NORMAL'
+    busy_timeout_ms: int = 5000
+    cache_size: int = -16000  # negative: KiB, i.e. ~16 MB page cache
+    mmap_size: int = 64 * 1024 * 1024
+    temp_store: str = 'MEMORY'
+
+    @classmethod
+    def from_env(cls) -> 'DatabaseProfile':
+        defaults = cls()
+        return cls(
+            journal_mode=_pragma_choice('DB_JOURNAL_MODE', _JOURNAL_MODES, defaults.journal_mode),
+            synchronous=_pragma_choice('DB_SYNCHRONOUS', tuple(_SYNCHRONOUS_LEVELS), defaults.synchronous),
+            busy_timeout_ms=int(os.environ.get('DB_BUSY_TIMEOUT_MS', defaults.busy_timeout_ms)),
+            cache_size=int(os.environ.get('DB_CACHE_SIZE', defaults.cache_size)),
+            mmap_size=int(os.environ.get('DB_MMAP_SIZE', defaults.mmap_size)),
+            temp_store=_pragma_choice('DB_TEMP_STORE', tuple(_TEMP_STORE_LEVELS), defaults.temp_store),
+        )
+
+
+def apply_database_profile(conn: sqlite3.Connection, profile: DatabaseProfile) -> None:
+    """
+    Applies the profile's PRAGMAs to a freshly opened connection.
+    """
+    # busy_timeout first, switching the journal mode may have to wait for other connections
+    conn.execute(f"PRAGMA busy_timeout = {int(profile.busy_timeout_ms)}")
+    conn.execute(f"PRAGMA journal_mode = {profile.journal_mode}")
+    conn.execute(f"PRAGMA synchronous = {profile.synchronous}")
+    conn.execute(f"PRAGMA cache_size = {int(profile.cache_size)}")
+    conn.execute(f"PRAGMA mmap_size = {int(profile.mmap_size)}")
+    conn.execute(f"PRAGMA temp_store = {profile.temp_store}")
+
+
+def verify_database_profile(conn: sqlite3.Connection, profile: DatabaseProfile) -> Dict:
+    """
+    Reads the PRAGMAs back from the connection and compares them with the profile.
+    """
+    expected = {
+        'journal_mode': profile.journal_mode.lower(),
+        'synchronous': _SYNCHRONOUS_LEVELS.get(profile.synchronous, profile.synchronous),
+        'busy_timeout': int(profile.busy_timeout_ms),
+        'cache_size': int(profile.cache_size),
+        'mmap_size': int(profile.mmap_size),
+        'temp_store': _TEMP_STORE_LEVELS.get(profile.temp_store, profile.temp_store),
+    }
+
+    settings = {}
+    for pragma, expected_value in expected.items():
+        actual = conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+        if isinstance(actual, str):
+            actual = actual.lower()
+        settings[pragma] = {
+            'expected': expected_value,
+            'actual': actual,
+            'ok': actual == expected_value
+        }
+
+    mismatches = [name for name, setting in settings.items() if not setting['ok']]
+    if mismatches:
+        logger.warning(f"Database profile mismatch for {', '.join(mismatches)}: {settings}")
+
+    return {'ok': not mismatches, 'settings': settings}
+
+
+class PooledConnection:
+    """
+    Handle to a pooled SQLite connection.
+    Behaves like a sqlite3.Connection, but close() hands the connection back
+    to the pool instead of closing it.
+    """
+
+    def __init__(self, pool: 'ConnectionPool', conn: sqlite3.Connection):
+        self._pool = pool
+        self._conn = conn
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Same semantics as sqlite3.Connection: commit or rollback, but keep it open
+        return self._conn.__exit__(exc_type, exc_value, traceback)
+
+    @property
+    def raw(self) -> sqlite3.Connection:
+        return self._conn
+
+    def close(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._pool.release()
+
+
+class ConnectionPool:
+    """
+    Process-wide pool of SQLite connections.
+
+    Each thread gets at most one connection at a time; nested calls in the same
+    thread share it. Inside a Flask app context the connection stays with the
+    thread until the context is torn down, outside of it the connection goes back
+    to the pool as soon as the last handle is closed.
+    """
+
+    def __init__(self, db_file_path: str,
+                 max_size: int = DEFAULT_POOL_SIZE,
+                 timeout: float = DEFAULT_POOL_TIMEOUT,
+                 configure: Optional[Callable[[sqlite3.Connection], None]] = None):
+        self.db_file_path = db_file_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self._configure = configure
+        self._lock = threading.Condition()
+        self._reset_state()
+
+    def _reset_state(self) -> None:
+        self._pid = os.getpid()
+        self._idle = deque()
+        self._local = threading.local()
+        self._created = 0
+        self._checked_out = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+
+    def _ensure_process(self) -> None:
+        # Connections must never cross a fork (e.g. gunicorn pre-fork workers)
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    logger.info(f"Process changed (pid {self._pid} -> {os.getpid()}), resetting connection pool")
+                    self._reset_state()
+
+    def _create_connection(self) -> sqlite3.Connection:
+        logger.debug("Establishing database connection")
+        conn = sqlite3.connect(self.db_file_path, timeout=self.timeout, check_same_thread=False)
+        if self._configure:
+            self._configure(conn)
+        return conn
+
+    def _checkout(self) -> sqlite3.Connection:
+        with self._lock:
+            wait_start = None
+            while True:
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if self._created < self.max_size:
+                    self._created += 1
+                    try:
+                        conn = self._create_connection()
+                    except sqlite3.Error:
+                        self._created -= 1
+                        raise
+                    break
+
+                if wait_start is None:
+                    wait_start = time.monotonic()
+                    self._waits += 1
+                remaining = self.timeout - (time.monotonic() - wait_start)
+                if remaining <= 0:
+                    raise sqlite3.OperationalError(
+                        f"Timed out after {self.timeout}s waiting for a database connection")
+                self._lock.wait(remaining)
+
+            if wait_start is not None:
+                waited = time.monotonic() - wait_start
+                self._wait_time_total += waited
+                self._wait_time_max = max(self._wait_time_max, waited)
+            self._checked_out += 1
+            self._checkouts += 1
+            return conn
+
+    def _checkin(self, conn: sqlite3.Connection) -> None:
+        try:
+            if conn.in_transaction:
+                # Never hand out a connection with someone else's open transaction
+                conn.rollback()
+        except sqlite3.Error as e:
+            logger.warning(f"Discarding broken database connection: {e}")
+            with self._lock:
+                self._checked_out -= 1
+                self._created -= 1
+                self._lock.notify()
+            return
+
+        with self._lock:
+            self._checked_out -= 1
+            self._idle.append(conn)
+            self._lock.notify()
+
+    def connection(self) -> PooledConnection:
+        """
+        Returns a handle to the connection bound to the current thread,
+        checking one out of the pool if necessary.
+        """
+        self._ensure_process()
+        local = self._local
+        if getattr(local, 'conn', None) is None:
+            local.conn = self._checkout()
+            local.depth = 0
+            local.pinned = False
+        if not local.pinned and has_app_context():
+            # Keep the connection for the rest of the app context, see release_app_context()
+            local.pinned = True
+            local.depth += 1
+            g._db_pool = self
+        local.depth += 1
+        return PooledConnection(self, local.conn)
+
+    def release(self, force: bool = False) -> None:
+        """
+        Drops one reference to the current thread's connection and returns it to
+        the pool once nothing uses it anymore.
+        """
+        local = self._local
+        conn = getattr(local, 'conn', None)
+        if conn is None:
+            return
+        local.depth = 0 if force else local.depth - 1
+        if local.depth <= 0:
+            local.conn = None
+            local.pinned = False
+            self._checkin(conn)
+        elif local.depth == 1 and local.pinned and conn.in_transaction:
+            # Only the app context holds it: don't leak a transaction into the next service call
+            conn.rollback()
+
+    def close_all(self) -> None:
+        """
+        Closes all idle connections.
+        """
+        with self._lock:
+            while self._idle:
+                conn = self._idle.pop()
+                self._created -= 1
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'max_size': self.max_size,
+                'created': self._created,
+                'checked_out': self._checked_out,
+                'idle': len(self._idle),
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'wait_time_total_ms': round(self._wait_time_total * 1000, 2),
+                'wait_time_max_ms': round(self._wait_time_max * 1000, 2),
+            }
+
+
+def release_app_context_connection(exception=None) -> None:
+    """
+    Flask teardown hook: returns the connection pinned to this app context to its pool.
+    """
+    pool = g.pop('_db_pool', None)
+    if pool is not None:
+        pool.release(force=True)
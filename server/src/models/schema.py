@@ -1,21 +1,27 @@
 import os
 import sqlite3
 from sqlite3 import Connection
-from typing import List
+from typing import Dict, List, Optional
 
+from src.models.database import DatabaseProfile, apply_database_profile, verify_database_profile
 from src.models.datatypes import FormContent
 
 
-def init_db(db_file_path: str, schema_paths: List[str], form_content: FormContent) -> None:
+def init_db(db_file_path: str, schema_paths: List[str], form_content: FormContent,
+            profile: Optional[DatabaseProfile] = None) -> Dict:
     """
     Creates the SQLite database and applies the schema if not already done.
+    Safe to call on every startup. Returns the verified database profile.
     """
+    profile = profile or DatabaseProfile.from_env()
+
     # Ensure the directory exists
     db_dir = os.path.dirname(db_file_path)
     os.makedirs(db_dir, exist_ok=True)
 
     # Connect to the DB
     conn = sqlite3.connect(db_file_path)
+    apply_database_profile(conn, profile)
 
     # Read schema.sql
     for schema_path in schema_paths:
@@ -26,7 +32,9 @@ def init_db(db_file_path: str, schema_paths: List[str], form_content: FormConten
 
         _init_db_data(conn, form_content)
 
+    profile_status = verify_database_profile(conn, profile)
     conn.close()
+    return profile_status
 
 
 def _init_db_data(connection: Connection, form_content: FormContent):
@@ -109,5 +117,3 @@ def _init_db_data(connection: Connection, form_content: FormContent):
     except Exception as e:
         connection.rollback()
         print(f"Error initializing database: {e}")
-    finally:
-        connection.close()
@@ -1,85 +1,104 @@
-import base64
-import os
 import sqlite3
 from contextlib import closing
-from typing import List, Optional
+from dataclasses import replace
+from typing import Iterator, List, Optional
 
 from src.models.datatypes import ArtistBooking, ArtistBookingWithTimestamp
-from src.services.booking_service import DB_FILE_PATH, DB_DIR
-from src.services.formcontent_service import get_artist_form_content_obj, update_artist_form_content_with_db_counts
+from src.services.booking_service import _connect_db, _split_ids, signature_store, \
+    iter_query_rows, EXPORT_BATCH_SIZE
+from src.services.signature_store import validate_signature
+from src.services.formcontent_service import get_artist_form_content_obj, update_artist_form_content_with_db_counts, \
+    get_artist_form_content_snapshot
+from src.services import counter_service, outbox_service
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _artist_booking_from_row(row: tuple, material_ids: List[int],
+                             profession_ids: List[int]) -> ArtistBookingWithTimestamp:
+    return ArtistBookingWithTimestamp(
+        id=row[0],
+        last_name=row[1],
+        first_name=row[2],
+        email=row[3],
+        phone=row[4],
+        ticket_id=row[5],
+        beverage_id=row[6],
+        food_id=row[7],
+        total_price=row[8],
+        timestamp=row[9],
+        signature=row[10] or "",
+        is_paid=True if row[11] == 1 else False,
+        paid_amount=row[12],
+        payment_notes=row[13],
+        payment_date=row[14],
+        equipment=row[15],
+        special_requests=row[16],
+        performance_details=row[17],
+        artist_material_ids=material_ids,
+        profession_ids=profession_ids
+    )
+
+
+# Artist booking list query without the signature (''), material and profession ids as GROUP_CONCAT columns
+_ARTIST_BOOKING_LIST_SELECT = """
+    SELECT b.id,
+           a.last_name,
+           a.first_name,
+           a.email,
+           a.phone_number,
+           b.ticket_option_id,
+           b.beverage_option_id,
+           b.food_option_id,
+           b.total_price,
+           b.timestamp,
+           '' AS signature,
+           b.is_paid,
+           b.paid_amount,
+           b.payment_notes,
+           b.payment_date,
+           b.equipment,
+           b.special_requests,
+           b.performance_details,
+           (SELECT GROUP_CONCAT(artist_material_id)
+            FROM (SELECT artist_material_id
+                  FROM ArtistBookingMaterials
+                  WHERE booking_id = b.id
+                  ORDER BY artist_material_id)),
+           (SELECT GROUP_CONCAT(profession_id)
+            FROM (SELECT profession_id
+                  FROM ArtistBookingProfessions
+                  WHERE booking_id = b.id
+                  ORDER BY profession_id))
+    FROM Artists a
+    JOIN ArtistBookings b ON a.id = b.artist_id
+"""
+
+
+def _artist_booking_from_list_row(row: tuple) -> ArtistBookingWithTimestamp:
+    return _artist_booking_from_row(row, _split_ids(row[18]), _split_ids(row[19]))
 
 
 def get_all_artist_bookings() -> List[ArtistBookingWithTimestamp]:
     """
     Returns all artist bookings with artist + booking info, including material_ids.
+    The signature is left out (empty), it is served on its own by get_artist_booking_signature.
+    Same single query as iter_artist_bookings, the child ids come along as GROUP_CONCAT columns.
     """
     with closing(_connect_db()) as conn:
         cursor = conn.cursor()
-        cursor.execute("""
-            SELECT b.id as booking_id,
-                   a.last_name,
-                   a.first_name,
-                   a.email,
-                   a.phone_number,
-                   b.ticket_option_id,
-                   b.beverage_option_id,
-                   b.food_option_id,
-                   b.total_price,
-                   b.timestamp,
-                   b.signature,
-                   b.is_paid,
-                   b.paid_amount,
-                   b.payment_notes,
-                   b.payment_date,
-                   b.equipment,
-                   b.special_requests,
-                   b.performance_details
-            FROM Artists a
-            JOIN ArtistBookings b ON a.id = b.artist_id
-            """)
-        rows = cursor.fetchall()
-
-        bookings: List[ArtistBookingWithTimestamp] = []
-        for row in rows:
-            booking_id = row[0]
-            cursor.execute("""
-                SELECT artist_material_id
-                FROM ArtistBookingMaterials
-                WHERE booking_id = ?
-                """, (booking_id,))
-            material_ids = [item[0] for item in cursor.fetchall()]
+        cursor.execute(f"{_ARTIST_BOOKING_LIST_SELECT} ORDER BY b.id")
+        return [_artist_booking_from_list_row(row) for row in cursor.fetchall()]
 
-            cursor.execute("""
-                           SELECT profession_id
-                           FROM ArtistBookingProfessions
-                           WHERE booking_id = ?
-                           """, (booking_id,))
-            profession_ids = [item[0] for item in cursor.fetchall()]
-
-            booking = ArtistBookingWithTimestamp(
-                id=booking_id,
-                last_name=row[1],
-                first_name=row[2],
-                email=row[3],
-                phone=row[4],
-                ticket_id=row[5],
-                beverage_id=row[6],
-                food_id=row[7],
-                total_price=row[8],
-                timestamp=row[9],
-                signature=row[10] or "",
-                is_paid=True if row[11] == 1 else False,
-                paid_amount=row[12],
-                payment_notes=row[13],
-                payment_date=row[14],
-                equipment=row[15],
-                special_requests=row[16],
-                performance_details=row[17],
-                artist_material_ids=material_ids,
-                profession_ids=profession_ids
-            )
-            bookings.append(booking)
-        return bookings
+
+def iter_artist_bookings(batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[List[ArtistBookingWithTimestamp]]:
+    """
+    Yields all artist bookings ordered by id, batch_size at a time, without the signature.
+    Feeds the same export_chunks pipeline as the participant bookings.
+    """
+    for rows in iter_query_rows(f"{_ARTIST_BOOKING_LIST_SELECT} ORDER BY b.id", (), batch_size):
+        yield [_artist_booking_from_list_row(row) for row in rows]
 
 
 def get_artist_booking_by_id(booking_id: int) -> Optional[ArtistBookingWithTimestamp]:
@@ -118,9 +137,18 @@ def get_artist_booking_by_id(booking_id: int) -> Optional[ArtistBookingWithTimes
                        SELECT artist_material_id
                        FROM ArtistBookingMaterials
                        WHERE booking_id = ?
+                       ORDER BY artist_material_id
                        """, (booking_id,))
         material_ids = [item[0] for item in cursor.fetchall()]
 
+        cursor.execute("""
+                       SELECT profession_id
+                       FROM ArtistBookingProfessions
+                       WHERE booking_id = ?
+                       ORDER BY profession_id
+                       """, (booking_id,))
+        profession_ids = [item[0] for item in cursor.fetchall()]
+
         return ArtistBookingWithTimestamp(
             id=row[0],
             last_name=row[1],
@@ -140,10 +168,26 @@ def get_artist_booking_by_id(booking_id: int) -> Optional[ArtistBookingWithTimes
             equipment=row[15],
             special_requests=row[16],
             performance_details=row[17],
-            artist_material_ids=material_ids
+            artist_material_ids=material_ids,
+            profession_ids=profession_ids
         )
 
 
+def get_artist_booking_signature(booking_id: int) -> Optional[str]:
+    """
+    Returns the stored signature of an artist booking: a signature store reference, or inline
+    base64 for rows from before the store. None if the booking or its signature doesn't exist.
+    Load the PNG with signature_store.load().
+    """
+    try:
+        with closing(_connect_db()) as conn:
+            row = conn.execute("SELECT signature FROM ArtistBookings WHERE id = ?", (booking_id,)).fetchone()
+    except sqlite3.Error as e:
+        logger.error(f"Database error reading the signature of artist booking {booking_id}: {e}", exc_info=True)
+        return None
+    return row[0] if row and row[0] else None
+
+
 def update_artist_booking(booking_id: int, booking_data: dict) -> bool:
     """
     Updates an existing artist booking in the database.
@@ -221,6 +265,8 @@ def update_artist_booking(booking_id: int, booking_data: dict) -> bool:
                         (booking_id, material_id)
                     )
 
+            counter_service.bump_generation(cursor, counter_service.GENERATION_ARTIST_BOOKINGS)
+
             # Commit transaction
             conn.commit()
             return True
@@ -270,19 +316,41 @@ def update_artist_payment(booking_id: int, payment_data: dict) -> bool:
             return False
 
 
-def insert_artist_booking(booking: ArtistBooking) -> bool:
+def insert_artist_booking(booking: ArtistBooking, enqueue_confirmation: bool = False) -> bool:
     """
     Inserts an artist booking if it does not already exist. Returns True if inserted, False if duplicate.
+    Artist, booking, materials and professions (and with enqueue_confirmation the confirmation mail)
+    are written in a single BEGIN IMMEDIATE transaction.
+    The signature is checked first, an invalid one raises SignatureError. It is written to the
+    signature store after the duplicate check.
     """
-    if _artist_booking_exists(booking):
-        return False
-
-    artist_id = _create_artist(booking)
-    booking_id = _create_artist_booking(artist_id, booking)
-    _assign_artist_materials(booking_id, booking.artist_material_ids)
-    _assign_artist_professions(booking_id, booking.profession_ids)  # Add this line
-    # Save signature as a file
-    _save_artist_signature_image(booking)
+    png = validate_signature(booking.signature)
+    with closing(_connect_db()) as conn:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            if _artist_booking_exists(cursor, booking):
+                conn.rollback()
+                return False
+
+            # Removes the image again if the insert fails
+            with signature_store.storing(png) as signature:
+                booking = replace(booking, signature=signature)
+                artist_id = _create_artist(cursor, booking)
+                booking_id = _create_artist_booking(cursor, artist_id, booking)
+                _assign_artist_materials(cursor, booking_id, booking.artist_material_ids)
+                _assign_artist_professions(cursor, booking_id, booking.profession_ids)
+                counter_service.bump_generation(cursor, counter_service.GENERATION_ARTIST_BOOKINGS)
+                if enqueue_confirmation:
+                    outbox_service.enqueue_mail(cursor, outbox_service.ARTIST_CONFIRMATION, booking)
+                conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    if enqueue_confirmation:
+        outbox_service.notify_outbox()
+
     return True
 
 
@@ -294,6 +362,16 @@ def get_up_to_date_artist_form_content() -> dict:
     return update_artist_form_content_with_db_counts(form_content_obj, _connect_db)
 
 
+def get_artist_form_content_etag() -> str:
+    """
+    Returns the ETag of the artist form content: the content file version plus the
+    artist booking generation.
+    """
+    with closing(_connect_db()) as conn:
+        generation = counter_service.get_booking_generation(conn.cursor(), counter_service.GENERATION_ARTIST_BOOKINGS)
+    return f"{get_artist_form_content_snapshot().version[:16]}-{generation}"
+
+
 def delete_artist_booking(booking_id: int) -> bool:
     """
     Deletes an artist booking and all related data.
@@ -329,6 +407,8 @@ def delete_artist_booking(booking_id: int) -> bool:
             if cursor.fetchone()[0] == 0:
                 cursor.execute("DELETE FROM Artists WHERE id = ?", (artist_id,))
 
+            counter_service.bump_generation(cursor, counter_service.GENERATION_ARTIST_BOOKINGS)
+
             # Commit transaction
             conn.commit()
             return True
@@ -343,120 +423,71 @@ def delete_artist_booking(booking_id: int) -> bool:
 
 ################## helper methods
 
-def _connect_db() -> sqlite3.Connection:
-    """
-    Returns a new SQLite connection.
-    """
-    return sqlite3.connect(DB_FILE_PATH)
-
-def _artist_booking_exists(booking: ArtistBooking) -> bool:
+def _artist_booking_exists(cursor: sqlite3.Cursor, booking: ArtistBooking) -> bool:
     """
     Checks if an artist booking already exists with the same name and email.
     """
-    with closing(_connect_db()) as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT COUNT(*)
-            FROM Artists a 
-            JOIN ArtistBookings b ON a.id = b.artist_id
-            WHERE a.first_name = ? 
-            AND a.last_name = ? 
-            AND a.email = ?
-            """, (booking.first_name, booking.last_name, booking.email))
-        return cursor.fetchone()[0] > 0
-
-
-def _create_artist(booking: ArtistBooking) -> int:
+    cursor.execute("""
+        SELECT COUNT(*)
+        FROM Artists a 
+        JOIN ArtistBookings b ON a.id = b.artist_id
+        WHERE a.first_name = ? 
+        AND a.last_name = ? 
+        AND a.email = ?
+        """, (booking.first_name, booking.last_name, booking.email))
+    return cursor.fetchone()[0] > 0
+
+
+def _create_artist(cursor: sqlite3.Cursor, booking: ArtistBooking) -> int:
     """
     Creates an artist in the Artists table and returns the artist_id.
     """
-    with closing(_connect_db()) as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO Artists (last_name, first_name, email, phone_number)
-            VALUES (?, ?, ?, ?)
-            """, (booking.last_name, booking.first_name, booking.email, booking.phone))
-        conn.commit()
-        return cursor.lastrowid
+    cursor.execute("""
+        INSERT INTO Artists (last_name, first_name, email, phone_number)
+        VALUES (?, ?, ?, ?)
+        """, (booking.last_name, booking.first_name, booking.email, booking.phone))
+    return cursor.lastrowid
 
 
-def _create_artist_booking(artist_id: int, booking: ArtistBooking) -> int:
+def _create_artist_booking(cursor: sqlite3.Cursor, artist_id: int, booking: ArtistBooking) -> int:
     """
     Creates an artist booking in the ArtistBookings table and returns the booking_id.
     """
-    with closing(_connect_db()) as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO ArtistBookings (
-                artist_id, ticket_option_id, beverage_option_id, food_option_id,
-                signature, total_price, is_paid, paid_amount, payment_notes, payment_date,
-                equipment, special_requests, performance_details
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                artist_id, booking.ticket_id, booking.beverage_id, booking.food_id,
-                booking.signature, booking.total_price, booking.is_paid,
-                booking.paid_amount, booking.payment_notes, booking.payment_date,
-                booking.equipment, booking.special_requests, booking.performance_details
-            ))
-        conn.commit()
-        return cursor.lastrowid
-
-
-def _assign_artist_materials(booking_id: int, material_ids: List[int]) -> None:
+    cursor.execute("""
+        INSERT INTO ArtistBookings (
+            artist_id, ticket_option_id, beverage_option_id, food_option_id,
+            signature, total_price, is_paid, paid_amount, payment_notes, payment_date,
+            equipment, special_requests, performance_details
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            artist_id, booking.ticket_id, booking.beverage_id, booking.food_id,
+            booking.signature, booking.total_price, booking.is_paid,
+            booking.paid_amount, booking.payment_notes, booking.payment_date,
+            booking.equipment, booking.special_requests, booking.performance_details
+        ))
+    return cursor.lastrowid
+
+
+def _assign_artist_materials(cursor: sqlite3.Cursor, booking_id: int, material_ids: List[int]) -> None:
     """
     Inserts the chosen artist materials into ArtistBookingMaterials.
     """
     if not material_ids:
         return
-    with closing(_connect_db()) as conn:
-        cursor = conn.cursor()
-        for material_id in material_ids:
-            cursor.execute("""
-                INSERT INTO ArtistBookingMaterials (booking_id, artist_material_id)
-                VALUES (?, ?)
-                """, (booking_id, material_id))
-        conn.commit()
+    cursor.executemany("""
+        INSERT INTO ArtistBookingMaterials (booking_id, artist_material_id)
+        VALUES (?, ?)
+        """, [(booking_id, material_id) for material_id in material_ids])
 
 
-def _assign_artist_professions(booking_id: int, profession_ids: List[int]) -> None:
+def _assign_artist_professions(cursor: sqlite3.Cursor, booking_id: int, profession_ids: List[int]) -> None:
     """
     Inserts the chosen professions into ArtistBookingProfessions.
     """
     if not profession_ids:
         return
-    with closing(_connect_db()) as conn:
-        cursor = conn.cursor()
-        for profession_id in profession_ids:
-            cursor.execute("""
-                INSERT INTO ArtistBookingProfessions (booking_id, profession_id)
-                VALUES (?, ?)
-                """, (booking_id, profession_id))
-        conn.commit()
-
-def _save_artist_signature_image(booking: ArtistBooking) -> None:
-    """
-    Decodes the signature from base64 and saves it as an image.
-    """
-    signature = booking.signature
-    if ',' in signature:
-        # Remove possible 'data:image/png;base64,' prefix
-        signature = signature.split(',', 1)[1]
-
-    signature_dir = os.path.join(DB_DIR, 'artist_signatures')
-    if not os.path.exists(signature_dir):
-        os.makedirs(signature_dir)
-
-    img_data = base64.b64decode(signature)
-    file_path = os.path.join(
-        signature_dir, f'artist_{booking.last_name}_{booking.first_name}.png'
-    )
-
-    with open(file_path, 'wb') as file:
-        file.write(img_data)
-
-
-
-
-
-
+    cursor.executemany("""
+        INSERT INTO ArtistBookingProfessions (booking_id, profession_id)
+        VALUES (?, ?)
+        """, [(booking_id, profession_id) for profession_id in profession_ids])
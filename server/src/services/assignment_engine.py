@@ -0,0 +1,518 @@
+import hashlib
+import heapq
+import multiprocessing
+import os
+import random
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# A proposed assignment: (booking_id, timeslot_id)
+Assignment = Tuple[int, int]
+
+
+@dataclass
+class AssignmentProblem:
+    """
+    Everything the strategies need, loaded once: per booking its id, amount of shifts and
+    its 1st/2nd/3rd priority timeslot (None where there is none), per timeslot its capacity.
+    """
+    booking_ids: List[int]
+    max_shifts: List[int]
+    preferences: List[Tuple[Optional[int], Optional[int], Optional[int]]]
+    capacities: Dict[int, int]
+
+    @classmethod
+    def from_rows(cls, booking_rows: List[tuple], timeslot_rows: List[tuple]) -> 'AssignmentProblem':
+        """
+        Builds the problem from (id, p1, p2, p3, amount_shifts) and (id, num_needed) rows.
+        Preferences that are missing or point to a timeslot that doesn't exist are dropped,
+        a timeslot listed twice only counts at its best priority.
+        """
+        capacities = {ts_id: num_needed or 0 for ts_id, num_needed in timeslot_rows}
+        booking_ids, max_shifts, preferences = [], [], []
+        for booking_id, p1, p2, p3, amount_shifts in booking_rows:
+            prefs = []
+            for ts_id in (p1, p2, p3):
+                prefs.append(ts_id if ts_id in capacities and ts_id not in prefs else None)
+            booking_ids.append(booking_id)
+            max_shifts.append(amount_shifts)
+            preferences.append(tuple(prefs))
+        return cls(booking_ids, max_shifts, preferences, capacities)
+
+    def priority_of(self, index: int, timeslot_id: int) -> int:
+        """
+        Priority rank (1-3) of the timeslot for the booking at index, 0 if it isn't a preference.
+        """
+        prefs = self.preferences[index]
+        return prefs.index(timeslot_id) + 1 if timeslot_id is not None and timeslot_id in prefs else 0
+
+
+def load_problem(cursor: sqlite3.Cursor) -> AssignmentProblem:
+    """
+    Loads the bookings that want shifts and all timeslot capacities in two queries.
+    """
+    cursor.execute("""
+                   SELECT id,
+                          first_priority_timeslot_id,
+                          second_priority_timeslot_id,
+                          third_priority_timeslot_id,
+                          amount_shifts
+                   FROM Bookings
+                   WHERE amount_shifts > 0
+                   """)
+    booking_rows = cursor.fetchall()
+    cursor.execute("SELECT id, num_needed FROM TimeSlots")
+    return AssignmentProblem.from_rows(booking_rows, cursor.fetchall())
+
+
+def load_residual_problem(cursor: sqlite3.Cursor) -> Tuple[AssignmentProblem, int]:
+    """
+    Loads only the open demand: bookings with fewer assignments than amount_shifts (their
+    remaining shifts as max_shifts, already assigned timeslots removed from their preferences)
+    and timeslots with remaining capacity. One aggregate query, also returns the number of
+    existing assignments.
+    """
+    cursor.execute("""
+                   SELECT 'booking',
+                          b.id,
+                          b.first_priority_timeslot_id,
+                          b.second_priority_timeslot_id,
+                          b.third_priority_timeslot_id,
+                          b.amount_shifts - COUNT(sa.id),
+                          GROUP_CONCAT(sa.timeslot_id)
+                   FROM Bookings b
+                            LEFT JOIN ShiftAssignments sa ON sa.booking_id = b.id
+                   WHERE b.amount_shifts > 0
+                   GROUP BY b.id
+                   HAVING COUNT(sa.id) < b.amount_shifts
+                   UNION ALL
+                   SELECT 'timeslot', ts.id, NULL, NULL, NULL, COALESCE(ts.num_needed, 0) - COUNT(sa.id), NULL
+                   FROM TimeSlots ts
+                            LEFT JOIN ShiftAssignments sa ON sa.timeslot_id = ts.id
+                   GROUP BY ts.id
+                   HAVING COUNT(sa.id) < COALESCE(ts.num_needed, 0)
+                   UNION ALL
+                   SELECT 'existing', COUNT(*), NULL, NULL, NULL, NULL, NULL
+                   FROM ShiftAssignments
+                   """)
+    booking_rows, timeslot_rows = [], []
+    existing_count = 0
+    for kind, row_id, p1, p2, p3, remaining, assigned in cursor.fetchall():
+        if kind == 'booking':
+            assigned_ids = {int(ts_id) for ts_id in assigned.split(',')} if assigned else set()
+            booking_rows.append((row_id, *(None if ts_id in assigned_ids else ts_id for ts_id in (p1, p2, p3)),
+                                 remaining))
+        elif kind == 'timeslot':
+            timeslot_rows.append((row_id, remaining))
+        else:
+            existing_count = row_id
+    return AssignmentProblem.from_rows(booking_rows, timeslot_rows), existing_count
+
+
+def solve_priority(problem: AssignmentProblem, order: Optional[List[int]] = None) -> List[Assignment]:
+    """
+    Gives every booking its 1st choice where there is room, then its 2nd, then its 3rd.
+    order is the sequence of booking indexes to visit, default is load order.
+    """
+    order = range(len(problem.booking_ids)) if order is None else order
+    assigned = [0] * len(problem.booking_ids)
+    remaining = dict(problem.capacities)
+    assignments = []
+    for rank in range(3):
+        for i in order:
+            ts_id = problem.preferences[i][rank]
+            # Timeslot id 0 has always meant "no preference" for this strategy
+            if not ts_id or assigned[i] >= problem.max_shifts[i] or remaining[ts_id] <= 0:
+                continue
+            remaining[ts_id] -= 1
+            assigned[i] += 1
+            assignments.append((problem.booking_ids[i], ts_id))
+    return assignments
+
+
+def solve_fill(problem: AssignmentProblem, order: Optional[List[int]] = None) -> List[Assignment]:
+    """
+    Walks the timeslots (those without capacity last) and fills each one with the bookings
+    that prefer it, best priority first, skipping bookings that already have all their shifts.
+    """
+    order = range(len(problem.booking_ids)) if order is None else order
+    candidates: Dict[int, List[Tuple[int, int]]] = {ts_id: [] for ts_id in problem.capacities}
+    for i in order:
+        for rank, ts_id in enumerate(problem.preferences[i]):
+            if ts_id is not None:
+                candidates[ts_id].append((rank, i))
+
+    assigned = [0] * len(problem.booking_ids)
+    assignments = []
+    timeslot_order = sorted(problem.capacities, key=lambda ts_id: 0 if problem.capacities[ts_id] > 0 else 1)
+    for ts_id in timeslot_order:
+        room = problem.capacities[ts_id]
+        if room <= 0:
+            continue
+        # Stable sort keeps the visiting order within a priority rank
+        for _, i in sorted(candidates[ts_id], key=lambda candidate: candidate[0]):
+            if assigned[i] >= problem.max_shifts[i]:
+                continue
+            assigned[i] += 1
+            assignments.append((problem.booking_ids[i], ts_id))
+            room -= 1
+            if room == 0:
+                break
+    return assignments
+
+
+class MinCostFlow:
+    """
+    Min-cost max-flow on an edge list (edge e and its residual e ^ 1 side by side).
+    Primal-dual: Dijkstra with node potentials finds the current shortest path cost, then a
+    Dinic blocking flow pushes as much as possible along all paths of that cost at once.
+    Everything is iterative, so it handles tens of thousands of nodes without recursion limits.
+    """
+
+    def __init__(self, num_nodes: int):
+        self.num_nodes = num_nodes
+        self.adjacency: List[List[int]] = [[] for _ in range(num_nodes)]
+        self.to: List[int] = []
+        self.capacity: List[int] = []
+        self.cost: List[int] = []
+
+    def add_edge(self, u: int, v: int, capacity: int, cost: int) -> int:
+        """
+        Adds an edge and its residual, returns the edge index (flow on it is capacity_of_residual).
+        """
+        edge = len(self.to)
+        self.adjacency[u].append(edge)
+        self.to.append(v)
+        self.capacity.append(capacity)
+        self.cost.append(cost)
+        self.adjacency[v].append(edge + 1)
+        self.to.append(u)
+        self.capacity.append(0)
+        self.cost.append(-cost)
+        return edge
+
+    def flow_on(self, edge: int) -> int:
+        return self.capacity[edge ^ 1]
+
+    def solve(self, source: int, sink: int) -> Tuple[int, int]:
+        """
+        Pushes the maximum flow from source to sink at minimum cost, returns (flow, cost).
+        Costs must be non-negative.
+        """
+        adjacency, to, capacity, cost = self.adjacency, self.to, self.capacity, self.cost
+        potential = [0] * self.num_nodes
+        total_flow = total_cost = 0
+        inf = float('inf')
+
+        while True:
+            # Shortest reduced distances from the source
+            dist = [inf] * self.num_nodes
+            dist[source] = 0
+            heap = [(0, source)]
+            while heap:
+                d, u = heapq.heappop(heap)
+                if d > dist[u]:
+                    continue
+                pu = potential[u]
+                for e in adjacency[u]:
+                    if capacity[e]:
+                        v = to[e]
+                        nd = d + cost[e] + pu - potential[v]
+                        if nd < dist[v]:
+                            dist[v] = nd
+                            heapq.heappush(heap, (nd, v))
+            if dist[sink] == inf:
+                break
+            for v in range(self.num_nodes):
+                if dist[v] < inf:
+                    potential[v] += dist[v]
+
+            # Blocking flows on the admissible (zero reduced cost) residual graph
+            while True:
+                level = [-1] * self.num_nodes
+                level[source] = 0
+                queue = [source]
+                for u in queue:
+                    pu = potential[u]
+                    for e in adjacency[u]:
+                        v = to[e]
+                        if capacity[e] and level[v] < 0 and cost[e] + pu - potential[v] == 0:
+                            level[v] = level[u] + 1
+                            queue.append(v)
+                if level[sink] < 0:
+                    break
+                pushed = self._blocking_flow(source, sink, level, potential)
+                total_flow += pushed
+                total_cost += pushed * (potential[sink] - potential[source])
+        return total_flow, total_cost
+
+    def _blocking_flow(self, source: int, sink: int, level: List[int], potential: List[int]) -> int:
+        adjacency, to, capacity, cost = self.adjacency, self.to, self.capacity, self.cost
+        next_edge = [0] * self.num_nodes
+        pushed_total = 0
+        path: List[int] = []
+        u = source
+        while True:
+            if u == sink:
+                pushed = min(capacity[e] for e in path)
+                for e in path:
+                    capacity[e] -= pushed
+                    capacity[e ^ 1] += pushed
+                pushed_total += pushed
+                # Restart from the tail of the first saturated edge
+                for i, e in enumerate(path):
+                    if not capacity[e]:
+                        del path[i:]
+                        break
+                u = to[path[-1]] if path else source
+                continue
+            edges = adjacency[u]
+            advanced = False
+            while next_edge[u] < len(edges):
+                e = edges[next_edge[u]]
+                v = to[e]
+                if capacity[e] and level[v] == level[u] + 1 and cost[e] + potential[u] - potential[v] == 0:
+                    path.append(e)
+                    u = v
+                    advanced = True
+                    break
+                next_edge[u] += 1
+            if advanced:
+                continue
+            # Dead end, never try this node again in this phase
+            level[u] = -1
+            if not path:
+                return pushed_total
+            e = path.pop()
+            u = to[e ^ 1]
+            next_edge[u] += 1
+
+
+# Preference cost of an assignment by priority rank, what the 'optimal' strategy minimises
+PRIORITY_COSTS = (1, 2, 3)
+
+
+def solve_optimal(problem: AssignmentProblem, order: Optional[List[int]] = None) -> List[Assignment]:
+    """
+    Maximum number of assignments, and among those the lowest total preference cost.
+    Flow network: source -> booking (amount_shifts) -> preferred timeslot (1, cost by rank)
+    -> sink (num_needed). The result doesn't depend on the booking order.
+    """
+    num_bookings = len(problem.booking_ids)
+    timeslot_ids = list(problem.capacities)
+    timeslot_node = {ts_id: num_bookings + j for j, ts_id in enumerate(timeslot_ids)}
+    source = num_bookings + len(timeslot_ids)
+    sink = source + 1
+    network = MinCostFlow(sink + 1)
+
+    preference_edges = []
+    for i in range(num_bookings):
+        if problem.max_shifts[i] <= 0:
+            continue
+        edges = [(network.add_edge(i, timeslot_node[ts_id], 1, PRIORITY_COSTS[rank]), ts_id)
+                 for rank, ts_id in enumerate(problem.preferences[i]) if ts_id is not None]
+        if edges:
+            network.add_edge(source, i, min(problem.max_shifts[i], len(edges)), 0)
+            preference_edges.append((i, edges))
+    for ts_id in timeslot_ids:
+        if problem.capacities[ts_id] > 0:
+            network.add_edge(timeslot_node[ts_id], sink, problem.capacities[ts_id], 0)
+
+    network.solve(source, sink)
+    return [(problem.booking_ids[i], ts_id)
+            for i, edges in preference_edges for edge, ts_id in edges if network.flow_on(edge)]
+
+
+STRATEGIES = {
+    'priority': solve_priority,
+    'fill': solve_fill,
+    'optimal': solve_optimal,
+}
+
+
+def assignment_stats(problem: AssignmentProblem, assignments: List[Assignment]) -> Dict:
+    """
+    The statistics run_auto_assignment reports for a set of assignments.
+    """
+    index_of = {booking_id: i for i, booking_id in enumerate(problem.booking_ids)}
+    per_booking: Dict[int, int] = {}
+    per_timeslot: Dict[int, int] = {}
+    objective = 0
+    for booking_id, ts_id in assignments:
+        per_booking[booking_id] = per_booking.get(booking_id, 0) + 1
+        per_timeslot[ts_id] = per_timeslot.get(ts_id, 0) + 1
+        rank = problem.priority_of(index_of[booking_id], ts_id)
+        if rank:
+            objective += PRIORITY_COSTS[rank - 1]
+    return {
+        'assignments_made': len(assignments),
+        'bookings_total': len(problem.booking_ids),
+        'bookings_fully_assigned': sum(
+            1 for booking_id, max_shifts in zip(problem.booking_ids, problem.max_shifts)
+            if per_booking.get(booking_id, 0) >= max_shifts
+        ),
+        'timeslots_total': len(problem.capacities),
+        'timeslots_filled': sum(
+            1 for ts_id, capacity in problem.capacities.items() if per_timeslot.get(ts_id, 0) >= capacity
+        ),
+        # Total preference cost (PRIORITY_COSTS), lower is better for the same assignments_made
+        'objective': objective
+    }
+
+
+# Strategies whose result depends on the booking order, the ones a search can improve
+ORDER_DEPENDENT = ('priority', 'fill')
+
+SEARCH_TIME_BUDGET = float(os.environ.get('AUTOASSIGN_SEARCH_TIME_BUDGET', '5'))
+SEARCH_WORKERS = int(os.environ.get('AUTOASSIGN_SEARCH_WORKERS', '0')) or os.cpu_count() or 1
+SEARCH_MAX_SEEDS = 100000
+# The search runs inside the request, keep it well below the gunicorn worker timeout (see Dockerfile)
+SEARCH_MAX_TIME_BUDGET = float(os.environ.get('AUTOASSIGN_SEARCH_MAX_TIME_BUDGET', '20'))
+
+# Weights of the search score, coverage dominates
+SCORE_WEIGHTS = {'coverage': 1.0, 'first_priority_rate': 0.25, 'fairness': 0.25}
+
+
+def score_assignments(problem: AssignmentProblem, assignments: List[Assignment]) -> Dict[str, float]:
+    """
+    Quality of a set of assignments, each part between 0 and 1:
+    - coverage: assigned shifts / shifts that could be assigned (demand capped by capacity)
+    - first_priority_rate: bookings that got their 1st priority / bookings that have one
+    - fairness: Jain's index over the per-booking fulfilment (assigned / amount_shifts)
+    and their weighted sum as 'total'.
+    """
+    index_of = {booking_id: i for i, booking_id in enumerate(problem.booking_ids)}
+    assigned = [0] * len(problem.booking_ids)
+    first_hits = 0
+    for booking_id, ts_id in assignments:
+        i = index_of[booking_id]
+        assigned[i] += 1
+        if problem.preferences[i][0] == ts_id:
+            first_hits += 1
+
+    possible = min(sum(problem.max_shifts), sum(c for c in problem.capacities.values() if c > 0))
+    with_first = sum(1 for prefs in problem.preferences if prefs[0] is not None)
+    fulfilment = [a / m for a, m in zip(assigned, problem.max_shifts) if m > 0]
+    squares = sum(x * x for x in fulfilment)
+    score = {
+        'coverage': len(assignments) / possible if possible else 1.0,
+        'first_priority_rate': first_hits / with_first if with_first else 1.0,
+        'fairness': sum(fulfilment) ** 2 / (len(fulfilment) * squares) if squares else 1.0
+    }
+    score['total'] = sum(SCORE_WEIGHTS[key] * value for key, value in score.items())
+    return score
+
+
+def seed_order(num_bookings: int, seed: int) -> List[int]:
+    """
+    Booking visiting order for a seed, seed 0 is the load order.
+    """
+    order = list(range(num_bookings))
+    if seed:
+        random.Random(seed).shuffle(order)
+    return order
+
+
+# Search worker state, set once per process by _init_search
+_search_problem: Optional[AssignmentProblem] = None
+_search_strategy: Optional[str] = None
+
+
+def _init_search(problem: AssignmentProblem, strategy: str) -> None:
+    global _search_problem, _search_strategy
+    _search_problem = problem
+    _search_strategy = strategy
+
+
+def _search_seeds(seeds: range, deadline: float) -> Tuple[Optional[Tuple[float, int]], int]:
+    """
+    Tries the seeds until the deadline, returns ((best total score, best seed), seeds tried).
+    Only the score travels back, the winning assignments are recomputed from the seed.
+    """
+    solve = STRATEGIES[_search_strategy]
+    best = None
+    tried = 0
+    for seed in seeds:
+        if tried and time.time() >= deadline:
+            break
+        assignments = solve(_search_problem, seed_order(len(_search_problem.booking_ids), seed))
+        candidate = (score_assignments(_search_problem, assignments)['total'], -seed)
+        if best is None or candidate > best:
+            best = candidate
+        tried += 1
+    return (best[0], -best[1]) if best else None, tried
+
+
+def search(problem: AssignmentProblem, strategy: str = 'priority', time_budget: float = SEARCH_TIME_BUDGET,
+           workers: int = SEARCH_WORKERS, seed: Optional[int] = None) -> Tuple[List[Assignment], Dict]:
+    """
+    Runs an order-dependent strategy with many randomized booking orders, spread over worker
+    processes until the time budget is used, and returns the best scoring assignments and
+    details about the search. Seed 0 (the plain load order) is always tried, so the result
+    is never worse than the strategy alone. With seed, only that order is computed, which
+    reproduces an earlier search result.
+    """
+    if strategy not in ORDER_DEPENDENT:
+        raise ValueError(f"Strategy {strategy} doesn't depend on the booking order")
+
+    start = time.perf_counter()
+    tried = 1
+    if seed is None:
+        deadline = time.time() + time_budget
+        workers = max(1, workers)
+        if workers == 1:
+            _init_search(problem, strategy)
+            results = [_search_seeds(range(SEARCH_MAX_SEEDS), deadline)]
+        else:
+            # Spawned, not forked: the server process has threads (mail outbox) and holds pool and logging locks
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_search, initargs=(problem, strategy),
+                                     mp_context=multiprocessing.get_context('spawn')) as executor:
+                # Worker k tries seeds k, k + workers, k + 2 * workers, ...
+                futures = [executor.submit(_search_seeds, range(k, SEARCH_MAX_SEEDS, workers), deadline)
+                           for k in range(workers)]
+                results = [future.result() for future in futures]
+        tried = sum(count for _, count in results)
+        seed = max((best for best, _ in results if best), key=lambda best: (best[0], -best[1]))[1]
+
+    assignments = STRATEGIES[strategy](problem, seed_order(len(problem.booking_ids), seed))
+    return assignments, {
+        'strategy': strategy,
+        'seed': seed,
+        'seeds_evaluated': tried,
+        'workers': workers if tried > 1 else 1,
+        'search_time_ms': round((time.perf_counter() - start) * 1000, 2),
+        'score': {key: round(value, 4) for key, value in score_assignments(problem, assignments).items()}
+    }
+
+
+def load_current_assignments(cursor: sqlite3.Cursor) -> List[Assignment]:
+    cursor.execute("SELECT booking_id, timeslot_id FROM ShiftAssignments")
+    return cursor.fetchall()
+
+
+def diff_assignments(current: List[Assignment], proposed: List[Assignment]) -> Dict[str, List[Assignment]]:
+    """
+    Splits proposed against current assignments into added, removed and unchanged (each sorted).
+    """
+    current_set, proposed_set = set(current), set(proposed)
+    return {
+        'added': sorted(proposed_set - current_set),
+        'removed': sorted(current_set - proposed_set),
+        'unchanged': sorted(current_set & proposed_set)
+    }
+
+
+def assignment_fingerprint(strategy: str, current: List[Assignment], proposed: List[Assignment]) -> str:
+    """
+    Identifies a preview: the strategy, the assignments it was computed against and its result.
+    Applying with this fingerprint only succeeds if recomputing gives exactly the same.
+    Incremental runs only add, they pass no current assignments.
+    """
+    digest = hashlib.sha256(strategy.encode())
+    for assignments in (current, proposed):
+        digest.update(b'|')
+        digest.update(','.join(f"{booking_id}:{ts_id}" for booking_id, ts_id in sorted(assignments)).encode())
+    return digest.hexdigest()[:32]
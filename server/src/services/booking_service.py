@@ -1,14 +1,21 @@
 import base64
+import json
 import os
 import sqlite3
 import time
 
+from collections import defaultdict
 from contextlib import closing
-from typing import List
+from dataclasses import replace
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 from src.models.datatypes import Booking, BookingWithTimestamp
-from src.services.formcontent_service import get_form_content_obj, update_form_content_with_db_counts
+from src.services.formcontent_service import get_form_content_obj, update_form_content_with_db_counts, \
+    get_form_content_snapshot
 from src.models.schema import init_db
+from src.models.database import ConnectionPool, DatabaseProfile, apply_database_profile
+from src.services import counter_service, outbox_service
+from src.services.signature_store import SignatureStore, validate_signature
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -17,39 +24,170 @@ IN_DOCKER = os.environ.get('IN_DOCKER', 'False').lower() == 'true'
 
 if IN_DOCKER:
     # Docker paths
-    DB_DIR='/app/user_data'
+    DB_DIR = os.environ.get('DB_DIR', '/app/user_data')
     DB_FILE_PATH = os.path.join(DB_DIR, 'bookings.db')
     DATA_DIR='/app/data'
     REGULAR_SCHEMA_PATH = os.path.join(DATA_DIR, 'schema.sql')
 
 else:
     # Local development paths
-    DB_DIR = os.path.join(os.path.dirname(__file__), '../../db')
+    DB_DIR = os.environ.get('DB_DIR', os.path.join(os.path.dirname(__file__), '../../db'))
     DB_FILE_PATH = os.path.join(DB_DIR, 'bookings.db')
     DATA_DIR=os.path.join(os.path.dirname(__file__), '../../data')
     REGULAR_SCHEMA_PATH = os.path.join(DATA_DIR, 'schema.sql')
 
 
 
-# Ensure database is initialized on import
+DB_PROFILE = DatabaseProfile.from_env()
 
-if not os.path.exists(DB_FILE_PATH):
-    init_db(DB_FILE_PATH, [REGULAR_SCHEMA_PATH], get_form_content_obj())
+# Ensure database is initialized on import (idempotent, also verifies the PRAGMA profile)
+DB_PROFILE_STATUS = init_db(DB_FILE_PATH, [REGULAR_SCHEMA_PATH], get_form_content_obj(), DB_PROFILE)
+
+signature_store = SignatureStore(os.path.join(DB_DIR, 'signature_store'))
+
+_pool = ConnectionPool(DB_FILE_PATH, configure=lambda conn: apply_database_profile(conn, DB_PROFILE))
 
 
 def _connect_db() -> sqlite3.Connection:
     """
-    Returns a new SQLite connection.
+    Returns a pooled SQLite connection. Closing it hands it back to the pool.
     """
     try:
-        logger.debug("Establishing database connection")
-        conn = sqlite3.connect(DB_FILE_PATH)
-        return conn
+        return _pool.connection()
     except sqlite3.Error as e:
         logger.error(f"Failed to connect to database: {e}", exc_info=True)
         raise
 
 
+# Build the booking counters for databases created before the BookingCounters table
+with closing(_connect_db()) as _conn:
+    counter_service.ensure_booking_counters(_conn)
+
+
+def get_pool_stats() -> dict:
+    """
+    Returns the connection pool counters (checked out, idle, wait time).
+    """
+    return _pool.stats()
+
+
+def get_database_profile_status() -> dict:
+    """
+    Returns the PRAGMA profile as verified by init_db on startup.
+    """
+    return DB_PROFILE_STATUS
+
+
+def _load_counter_keys(cursor: sqlite3.Cursor, booking_id: int, include_materials: bool = True) -> list:
+    """
+    Returns the BookingCounters keys the stored booking currently contributes to, [] if it doesn't exist.
+    """
+    cursor.execute("""
+                   SELECT ticket_option_id,
+                          beverage_option_id,
+                          food_option_id,
+                          first_priority_timeslot_id,
+                          second_priority_timeslot_id,
+                          third_priority_timeslot_id,
+                          amount_shifts
+                   FROM Bookings
+                   WHERE id = ?
+                   """, (booking_id,))
+    row = cursor.fetchone()
+    if not row:
+        return []
+    material_ids = []
+    if include_materials:
+        cursor.execute("SELECT material_id FROM BookingMaterials WHERE booking_id = ?", (booking_id,))
+        material_ids = [material_id for (material_id,) in cursor.fetchall()]
+    return counter_service.booking_counter_keys(*row, material_ids=material_ids)
+
+
+def _booking_exists(cursor: sqlite3.Cursor, booking: Booking) -> bool:
+    """
+    Same check as booking_exists(), on the caller's transaction.
+    """
+    cursor.execute("""
+                   SELECT COUNT(*)
+                   FROM Users u
+                            JOIN Bookings b ON u.id = b.user_id
+                   WHERE u.first_name = ?
+                     AND u.last_name = ?
+                     AND u.email = ?
+                   """, (booking.first_name, booking.last_name, booking.email))
+    return cursor.fetchone()[0] > 0
+
+
+def _insert_user(cursor: sqlite3.Cursor, booking: Booking) -> int:
+    """
+    Inserts the Users row and returns its id.
+    """
+    cursor.execute("""
+                   INSERT INTO Users (last_name, first_name, email, phone_number)
+                   VALUES (?, ?, ?, ?)
+                   """, (booking.last_name, booking.first_name, booking.email, booking.phone))
+    return cursor.lastrowid
+
+
+def _insert_booking(cursor: sqlite3.Cursor, user_id: int, booking: Booking) -> int:
+    """
+    Inserts the Bookings row and counts it, without its materials (see _insert_materials).
+    """
+    cursor.execute("""
+                   INSERT INTO Bookings (user_id, ticket_option_id, beverage_option_id, food_option_id,
+                                         first_priority_timeslot_id, second_priority_timeslot_id,
+                                         third_priority_timeslot_id,
+                                         amount_shifts, supporter_buddy, signature, total_price, is_paid,
+                                         paid_amount, payment_notes, payment_date)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   """, (
+                       user_id,
+                       booking.ticket_id,
+                       booking.beverage_id,
+                       booking.food_id,
+                       booking.timeslot_priority_1,
+                       booking.timeslot_priority_2,
+                       booking.timeslot_priority_3,
+                       booking.amount_shifts,
+                       booking.supporter_buddy,
+                       booking.signature,
+                       booking.total_price,
+                       booking.is_paid,
+                       booking.paid_amount,
+                       booking.payment_notes,
+                       booking.payment_date
+                   ))
+    booking_id = cursor.lastrowid
+    counter_service.apply_counter_delta(cursor, counter_service.booking_counter_keys(
+        booking.ticket_id, booking.beverage_id, booking.food_id,
+        booking.timeslot_priority_1, booking.timeslot_priority_2, booking.timeslot_priority_3,
+        booking.amount_shifts
+    ), 1)
+    return booking_id
+
+
+def _insert_materials(cursor: sqlite3.Cursor, booking_id: int, material_ids: List[int]) -> None:
+    """
+    Inserts the BookingMaterials rows and counts them.
+    """
+    cursor.executemany("""
+                       INSERT INTO BookingMaterials (booking_id, material_id)
+                       VALUES (?, ?)
+                       """, [(booking_id, material_id) for material_id in material_ids])
+    counter_service.apply_counter_delta(
+        cursor, [(counter_service.MATERIAL, material_id) for material_id in material_ids], 1)
+
+
+def _insert_professions(cursor: sqlite3.Cursor, booking_id: int, profession_ids: List[int]) -> None:
+    """
+    Inserts the BookingProfessions rows.
+    """
+    cursor.executemany("""
+                       INSERT INTO BookingProfessions (booking_id, profession_id)
+                       VALUES (?, ?)
+                       """, [(booking_id, profession_id) for profession_id in profession_ids])
+
+
 def booking_exists(booking: Booking) -> bool:
     """
     Checks if a booking already exists with the same first name, last name, and email.
@@ -57,16 +195,7 @@ def booking_exists(booking: Booking) -> bool:
     try:
         logger.debug(f"Checking for existing booking: {booking.first_name} {booking.last_name} ({booking.email})")
         with closing(_connect_db()) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                           SELECT COUNT(*)
-                           FROM Users u
-                                    JOIN Bookings b ON u.id = b.user_id
-                           WHERE u.first_name = ?
-                             AND u.last_name = ?
-                             AND u.email = ?
-                           """, (booking.first_name, booking.last_name, booking.email))
-            exists = cursor.fetchone()[0] > 0
+            exists = _booking_exists(conn.cursor(), booking)
             if exists:
                 logger.debug(f"Existing booking found for {booking.first_name} {booking.last_name}")
             return exists
@@ -80,13 +209,8 @@ def create_user(booking: Booking) -> int:
     try:
         logger.debug(f"Creating user: {booking.first_name} {booking.last_name}")
         with closing(_connect_db()) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                           INSERT INTO Users (last_name, first_name, email, phone_number)
-                           VALUES (?, ?, ?, ?)
-                           """, (booking.last_name, booking.first_name, booking.email, booking.phone))
+            user_id = _insert_user(conn.cursor(), booking)
             conn.commit()
-            user_id = cursor.lastrowid
             logger.info(f"User created successfully with ID {user_id}: {booking.first_name} {booking.last_name}")
             return user_id
     except sqlite3.Error as e:
@@ -101,33 +225,8 @@ def create_booking(user_id: int, booking: Booking) -> int:
     try:
         logger.debug(f"Creating booking for user {user_id}")
         with closing(_connect_db()) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                           INSERT INTO Bookings (user_id, ticket_option_id, beverage_option_id, food_option_id,
-                                                 first_priority_timeslot_id, second_priority_timeslot_id,
-                                                 third_priority_timeslot_id,
-                                                 amount_shifts, supporter_buddy, signature, total_price, is_paid,
-                                                 paid_amount, payment_notes, payment_date)
-                           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                           """, (
-                               user_id,
-                               booking.ticket_id,
-                               booking.beverage_id,
-                               booking.food_id,
-                               booking.timeslot_priority_1,
-                               booking.timeslot_priority_2,
-                               booking.timeslot_priority_3,
-                               booking.amount_shifts,
-                               booking.supporter_buddy,
-                               booking.signature,
-                               booking.total_price,
-                               booking.is_paid,
-                               booking.paid_amount,
-                               booking.payment_notes,
-                               booking.payment_date
-                           ))
+            booking_id = _insert_booking(conn.cursor(), user_id, booking)
             conn.commit()
-            booking_id = cursor.lastrowid
             logger.info(f"Booking created successfully with ID {booking_id} for user {user_id}")
             return booking_id
     except sqlite3.Error as e:
@@ -144,42 +243,26 @@ def assign_materials(booking_id: int, material_ids: List[int]) -> None:
         if not material_ids:
             return
         with closing(_connect_db()) as conn:
-            cursor = conn.cursor()
-            for material_id in material_ids:
-                cursor.execute("""
-                               INSERT INTO BookingMaterials (booking_id, material_id)
-                               VALUES (?, ?)
-                               """, (booking_id, material_id))
+            _insert_materials(conn.cursor(), booking_id, material_ids)
             conn.commit()
         logger.info(f"Materials {material_ids} to booking_id assigned successfully to booking {booking_id}")
     except Exception as e:
         logger.error(f"Unexpected error assigning materials {material_ids} to booking_id {booking_id}: {str(e)}", exc_info=True)
 
 
-def save_signature_image(booking: Booking) -> None:
+def get_booking_signature(booking_id: int) -> Optional[str]:
     """
-    Decodes the signature from base64 and saves it as an image.
+    Returns the stored signature of a booking: a signature store reference, or inline
+    base64 for rows from before the store. None if the booking or its signature doesn't exist.
+    Load the PNG with signature_store.load().
     """
     try:
-        logger.info(f"Saving signature image of booking {booking.first_name + ' ' + booking.last_name}")
-        signature = booking.signature
-        if ',' in signature:
-            # Remove possible 'data:image/png;base64,' prefix
-            signature = signature.split(',', 1)[1]
-
-        signature_dir = os.path.join(DB_DIR, 'signatures')
-        if not os.path.exists(signature_dir):
-            os.makedirs(signature_dir)
-
-        img_data = base64.b64decode(signature)
-        file_path = os.path.join(
-            signature_dir, f'{booking.last_name}_{booking.first_name}.png'
-        )
-
-        with open(file_path, 'wb') as file:
-            file.write(img_data)
-    except Exception as e:
-        logger.error(f"Failed to save the signature image of booking {booking.first_name + ' ' + booking.last_name}: {str(e)}", exc_info=True)
+        with closing(_connect_db()) as conn:
+            row = conn.execute("SELECT signature FROM Bookings WHERE id = ?", (booking_id,)).fetchone()
+    except sqlite3.Error as e:
+        logger.error(f"Database error reading the signature of booking {booking_id}: {e}", exc_info=True)
+        return None
+    return row[0] if row and row[0] else None
 
 
 def assign_professions(booking_id: int, profession_ids: List[int]) -> None:
@@ -190,37 +273,54 @@ def assign_professions(booking_id: int, profession_ids: List[int]) -> None:
         if not profession_ids:
             return
         with closing(_connect_db()) as conn:
-            cursor = conn.cursor()
-            for profession_id in profession_ids:
-                cursor.execute("""
-                               INSERT INTO BookingProfessions (booking_id, profession_id)
-                               VALUES (?, ?)
-                               """, (booking_id, profession_id))
+            _insert_professions(conn.cursor(), booking_id, profession_ids)
             conn.commit()
     except Exception as e:
         logger.error(f"Unexpected Error assingin profession ids: {profession_ids} to booking id {booking_id}: {e}", exc_info=True)
 
 
-def insert_booking(booking: Booking) -> bool:
-    """Inserts a booking with comprehensive logging."""
+def insert_booking(booking: Booking, enqueue_confirmation: bool = False) -> bool:
+    """
+    Inserts a booking with its user, materials and professions in a single transaction.
+    BEGIN IMMEDIATE takes the write lock before the duplicate check, so two concurrent
+    submits of the same person cannot both pass it.
+    With enqueue_confirmation the confirmation mail is queued in the same transaction.
+    The signature is checked before the transaction, an invalid or oversized one raises SignatureError.
+    It is written to the signature store after the duplicate check and only its reference is saved.
+    """
     start_time = time.time()
+    png = validate_signature(booking.signature)
 
     try:
         logger.info(f"Starting booking insertion for {booking.first_name} {booking.last_name}")
 
-        if booking_exists(booking):
-            logger.warning(f"Duplicate booking attempt for {booking.first_name} {booking.last_name} ({booking.email})")
-            return False
+        with closing(_connect_db()) as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                if _booking_exists(cursor, booking):
+                    conn.rollback()
+                    logger.warning(f"Duplicate booking attempt for {booking.first_name} {booking.last_name} ({booking.email})")
+                    return False
 
-        user_id = create_user(booking)
-        if user_id == -1:
-            logger.error(f"Failed to create user for booking: {booking.first_name} {booking.last_name}")
-            return False
+                # Removes the image again if the insert fails
+                with signature_store.storing(png) as signature:
+                    booking = replace(booking, signature=signature)
+                    user_id = _insert_user(cursor, booking)
+                    booking_id = _insert_booking(cursor, user_id, booking)
+                    if booking.material_ids:
+                        _insert_materials(cursor, booking_id, booking.material_ids)
+                    if booking.profession_ids:
+                        _insert_professions(cursor, booking_id, booking.profession_ids)
+                    if enqueue_confirmation:
+                        outbox_service.enqueue_mail(cursor, outbox_service.CONFIRMATION, booking)
+                    conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
 
-        booking_id = create_booking(user_id, booking)
-        if booking_id == -1:
-            logger.error(f"Failed to create booking for user {user_id}")
-            return False
+        if enqueue_confirmation:
+            outbox_service.notify_outbox()
 
         duration = time.time() - start_time
         logger.info(
@@ -239,9 +339,96 @@ def insert_booking(booking: Booking) -> bool:
         return False
 
 
+def _group_child_ids(cursor: sqlite3.Cursor) -> Dict[int, List[int]]:
+    """
+    Groups (booking_id, child_id) rows of an executed query into {booking_id: [child_id, ...]}.
+    """
+    grouped: Dict[int, List[int]] = defaultdict(list)
+    for booking_id, child_id in cursor.fetchall():
+        grouped[booking_id].append(child_id)
+    return grouped
+
+
+def _booking_from_row(row: tuple, material_ids: List[int], profession_ids: List[int]) -> BookingWithTimestamp:
+    """
+    Maps the booking columns of a _BOOKING_LIST_SELECT row to a BookingWithTimestamp.
+    """
+    return BookingWithTimestamp(
+        id=row[0],
+        last_name=row[1],
+        first_name=row[2],
+        email=row[3],
+        phone=row[4],
+        ticket_id=row[5],
+        beverage_id=row[6],
+        food_id=row[7],
+        timeslot_priority_1=row[8],
+        timeslot_priority_2=row[9],
+        timeslot_priority_3=row[10],
+        amount_shifts=row[11],
+        supporter_buddy=row[12],
+        total_price=row[13],
+        timestamp=row[14],
+        signature=row[15] or "",
+        is_paid=True if row[16] == 1 else False,
+        paid_amount=row[17],
+        payment_notes=row[18],
+        payment_date=row[19],
+        profession_ids=profession_ids,
+        material_ids=material_ids
+    )
+
+
+def _split_ids(concatenated: Optional[str]) -> List[int]:
+    return [int(child_id) for child_id in concatenated.split(',')] if concatenated else []
+
+
+# Booking list query without the signature (''), material and profession ids as GROUP_CONCAT columns
+_BOOKING_LIST_SELECT = """
+                       SELECT b.id,
+                              u.last_name,
+                              u.first_name,
+                              u.email,
+                              u.phone_number,
+                              b.ticket_option_id,
+                              b.beverage_option_id,
+                              b.food_option_id,
+                              b.first_priority_timeslot_id,
+                              b.second_priority_timeslot_id,
+                              b.third_priority_timeslot_id,
+                              b.amount_shifts,
+                              b.supporter_buddy,
+                              b.total_price,
+                              b.Timestamp,
+                              '' AS signature,
+                              b.is_paid,
+                              b.paid_amount,
+                              b.payment_notes,
+                              b.payment_date,
+                              (SELECT GROUP_CONCAT(material_id)
+                               FROM (SELECT material_id
+                                     FROM BookingMaterials
+                                     WHERE booking_id = b.id
+                                     ORDER BY material_id)),
+                              (SELECT GROUP_CONCAT(profession_id)
+                               FROM (SELECT profession_id
+                                     FROM BookingProfessions
+                                     WHERE booking_id = b.id
+                                     ORDER BY profession_id))
+                       FROM Users u
+                                JOIN Bookings b ON u.id = b.user_id
+"""
+
+
+def _booking_from_list_row(row: tuple) -> BookingWithTimestamp:
+    return _booking_from_row(row, _split_ids(row[20]), _split_ids(row[21]))
+
+
 def get_all_bookings() -> List[BookingWithTimestamp]:
     """
     Returns all bookings with user + booking info, including material_ids, as a list of BookingWithTimestamp.
+    The signature is left out (empty), it is served on its own by get_booking_signature.
+    Same single query as find_bookings, the child ids come along as GROUP_CONCAT columns.
     """
     start_time = time.time()
 
@@ -250,87 +437,256 @@ def get_all_bookings() -> List[BookingWithTimestamp]:
 
         with closing(_connect_db()) as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                           SELECT b.id as booking_id,
-                                  u.last_name,
-                                  u.first_name,
-                                  u.email,
-                                  u.phone_number,
-                                  b.ticket_option_id,
-                                  b.beverage_option_id,
-                                  b.food_option_id,
-                                  b.first_priority_timeslot_id,
-                                  b.second_priority_timeslot_id,
-                                  b.third_priority_timeslot_id,
-                                  b.amount_shifts,
-                                  b.supporter_buddy,
-                                  b.total_price,
-                                  b.Timestamp,
-                                  b.signature,
-                                  b.is_paid,
-                                  b.paid_amount,
-                                  b.payment_notes,
-                                  b.payment_date
-                           FROM Users u
-                                    JOIN Bookings b ON u.id = b.user_id
-                           """)
-            rows = cursor.fetchall()
-
-            bookings: List[BookingWithTimestamp] = []
-            for row in rows:
-                booking_id = row[0]
-                cursor.execute("""
-                               SELECT material_id
-                               FROM BookingMaterials
-                               WHERE booking_id = ?
-                               """, (booking_id,))
-                material_ids = [item[0] for item in cursor.fetchall()]
+            cursor.execute(f"{_BOOKING_LIST_SELECT} ORDER BY b.id")
+            bookings: List[BookingWithTimestamp] = [_booking_from_list_row(row) for row in cursor.fetchall()]
 
-                cursor.execute("""
-                               SELECT profession_id
-                               FROM BookingProfessions
-                               WHERE booking_id = ?
-                               """, (booking_id,))
-                profession_ids = [item[0] for item in cursor.fetchall()]
-
-                booking = BookingWithTimestamp(
-                    id=booking_id,
-                    last_name=row[1],
-                    first_name=row[2],
-                    email=row[3],
-                    phone=row[4],
-                    ticket_id=row[5],
-                    beverage_id=row[6],
-                    food_id=row[7],
-                    timeslot_priority_1=row[8],
-                    timeslot_priority_2=row[9],
-                    timeslot_priority_3=row[10],
-                    amount_shifts=row[11],
-                    supporter_buddy=row[12],
-                    total_price=row[13],
-                    timestamp=row[14],
-                    signature=row[15] or "",
-                    is_paid=True if row[16] == 1 else False,
-                    paid_amount= row[17],
-                    payment_notes=row[18],
-                    payment_date=row[19],
-                    profession_ids=profession_ids,
-                    material_ids=material_ids
-                )
-                bookings.append(booking)
-            duration = time.time() - start_time
-            logger.info(f"Retrieved {len(bookings)} bookings in {duration:.3f}s")
+        duration = time.time() - start_time
+        logger.info(f"Retrieved {len(bookings)} bookings in {duration:.3f}s")
 
-            if duration > 2.0:
-                logger.warning(f"Slow booking retrieval: {duration:.3f}s for {len(bookings)} bookings")
+        if duration > 2.0:
+            logger.warning(f"Slow booking retrieval: {duration:.3f}s for {len(bookings)} bookings")
 
-            return bookings
+        return bookings
     except sqlite3.Error as e:
         duration = time.time() - start_time
         logger.error(f"Database error retrieving bookings after {duration:.3f}s: {e}", exc_info=True)
         return []
 
 
+def find_bookings(unpaid: bool = False,
+                  missing_shift: bool = False,
+                  ticket_ids: Optional[List[int]] = None,
+                  booking_ids: Optional[List[int]] = None,
+                  emails: Optional[List[str]] = None) -> List[BookingWithTimestamp]:
+    """
+    Returns the bookings matching all given filters in a single query, ordered by id.
+    missing_shift selects bookings with fewer assigned shifts than they volunteered for.
+    The signature is left out (empty), material_ids and profession_ids are included.
+    """
+    start_time = time.time()
+
+    conditions = []
+    params: list = []
+    if unpaid:
+        conditions.append("COALESCE(b.is_paid, 0) = 0")
+    if missing_shift:
+        conditions.append("""(SELECT COUNT(*) FROM ShiftAssignments sa WHERE sa.booking_id = b.id)
+                             < COALESCE(b.amount_shifts, 0)""")
+    for column, values in (("b.ticket_option_id", ticket_ids), ("b.id", booking_ids), ("u.email", emails)):
+        if values:
+            conditions.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    try:
+        with closing(_connect_db()) as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"{_BOOKING_LIST_SELECT} {where} ORDER BY b.id", params)
+            bookings = [_booking_from_list_row(row) for row in cursor.fetchall()]
+
+        duration = time.time() - start_time
+        logger.info(f"Found {len(bookings)} bookings matching filters in {duration:.3f}s")
+        return bookings
+    except sqlite3.Error as e:
+        logger.error(f"Database error filtering bookings: {e}", exc_info=True)
+        return []
+
+
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', '500'))
+EXPORT_FORMATS = ('ndjson', 'json')
+
+
+def iter_query_rows(query: str, params: tuple = (), batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[list]:
+    """
+    Runs a query on a pooled connection and yields the rows in fetchmany(batch_size) batches.
+    The connection is held until the generator is exhausted or closed. A slow consumer keeps
+    one read snapshot open, which doesn't block writers (WAL).
+    """
+    with closing(_connect_db()) as conn:
+        cursor = conn.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield rows
+
+
+def iter_bookings(batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[List[BookingWithTimestamp]]:
+    """
+    Yields all bookings ordered by id, batch_size at a time, without the signature.
+    """
+    for rows in iter_query_rows(f"{_BOOKING_LIST_SELECT} ORDER BY b.id", (), batch_size):
+        yield [_booking_from_list_row(row) for row in rows]
+
+
+def export_chunks(batches: Iterable[list], export_format: str) -> Iterator[str]:
+    """
+    Serializes batches of bookings for a streaming response, one chunk per batch, so memory
+    stays bounded by the batch size. 'ndjson' writes one object per line, 'json' one array.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+
+    def generate():
+        first = True
+        if export_format == 'json':
+            yield '['
+        for batch in batches:
+            if not batch:
+                continue
+            encoded = [json.dumps(vars(booking), separators=(',', ':')) for booking in batch]
+            if export_format == 'ndjson':
+                yield '\n'.join(encoded) + '\n'
+            else:
+                yield ('' if first else ',\n') + ',\n'.join(encoded)
+            first = False
+        if export_format == 'json':
+            yield ']\n'
+
+    return generate()
+
+
+# Sort keys of get_bookings_page: column plus the id as tie breaker, both covered by an index
+BOOKING_SORTS = {
+    'id': 'b.id',
+    'timestamp': 'b.Timestamp',
+}
+MAX_PAGE_SIZE = 500
+
+# Total counts per filter set, valid as long as the booking and payment generations are unchanged
+_total_cache: Dict[tuple, Tuple[Tuple[int, int], int]] = {}
+_TOTAL_CACHE_SIZE = 256
+
+
+def encode_page_cursor(values: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_page_cursor(cursor: str) -> list:
+    """
+    Decodes a cursor of get_bookings_page, raises ValueError if it isn't one.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(values, list) or not values or not isinstance(values[-1], int):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def _escape_like(prefix: str) -> str:
+    return prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def get_bookings_page(limit: int,
+                      cursor: Optional[str] = None,
+                      sort: str = 'id',
+                      descending: bool = False,
+                      is_paid: Optional[bool] = None,
+                      ticket_ids: Optional[List[int]] = None,
+                      timeslot_id: Optional[int] = None,
+                      name_prefix: Optional[str] = None,
+                      email_prefix: Optional[str] = None,
+                      date_from: Optional[str] = None,
+                      date_to: Optional[str] = None) -> Dict:
+    """
+    Returns one page of bookings: {'items': [...], 'next_cursor': str or None, 'total': int}.
+    Keyset pagination on (sort column, id), so a page costs the same however deep it is.
+    timeslot_id matches any of the three priorities, name_prefix first or last name,
+    date_from / date_to (YYYY-MM-DD, inclusive) the booking timestamp.
+    The signature is left out (empty). The total ignores the cursor and is cached until
+    a booking or payment changes. Raises ValueError for an invalid sort or cursor.
+    """
+    start_time = time.time()
+    if sort not in BOOKING_SORTS:
+        raise ValueError(f"Invalid sort: {sort}")
+    column = BOOKING_SORTS[sort]
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    conditions = []
+    params: list = []
+    if is_paid is not None:
+        conditions.append("COALESCE(b.is_paid, 0) = ?")
+        params.append(1 if is_paid else 0)
+    if ticket_ids:
+        conditions.append(f"b.ticket_option_id IN ({', '.join('?' * len(ticket_ids))})")
+        params.extend(ticket_ids)
+    if timeslot_id is not None:
+        conditions.append("? IN (b.first_priority_timeslot_id, b.second_priority_timeslot_id, "
+                          "b.third_priority_timeslot_id)")
+        params.append(timeslot_id)
+    if name_prefix:
+        conditions.append("(u.first_name LIKE ? ESCAPE '\\' OR u.last_name LIKE ? ESCAPE '\\')")
+        params.extend([_escape_like(name_prefix)] * 2)
+    if email_prefix:
+        conditions.append("u.email LIKE ? ESCAPE '\\'")
+        params.append(_escape_like(email_prefix))
+    if date_from:
+        conditions.append("b.Timestamp >= ?")
+        params.append(date_from)
+    if date_to:
+        conditions.append("b.Timestamp < date(?, '+1 day')")
+        params.append(date_to)
+    filter_key = (tuple(conditions), tuple(params))
+
+    page_conditions = list(conditions)
+    page_params = list(params)
+    if cursor is not None:
+        values = decode_page_cursor(cursor)
+        comparison = '<' if descending else '>'
+        if sort == 'id':
+            page_conditions.append(f"b.id {comparison} ?")
+            page_params.append(values[-1])
+        else:
+            if len(values) != 2:
+                raise ValueError("Cursor doesn't match the sort")
+            page_conditions.append(f"({column}, b.id) {comparison} (?, ?)")
+            page_params.extend(values)
+    where = f"WHERE {' AND '.join(page_conditions)}" if page_conditions else ""
+    direction = 'DESC' if descending else 'ASC'
+    order = f"b.id {direction}" if sort == 'id' else f"{column} {direction}, b.id {direction}"
+
+    try:
+        with closing(_connect_db()) as conn:
+            db_cursor = conn.cursor()
+            # Fetch one extra row to know whether there is a next page
+            db_cursor.execute(f"{_BOOKING_LIST_SELECT} {where} ORDER BY {order} LIMIT ?", (*page_params, limit + 1))
+            rows = db_cursor.fetchall()
+
+            generations = (counter_service.get_booking_generation(db_cursor),
+                           counter_service.get_booking_generation(db_cursor,
+                                                                  counter_service.GENERATION_BOOKING_PAYMENTS))
+            cached = _total_cache.get(filter_key)
+            if cached is not None and cached[0] == generations:
+                total = cached[1]
+            else:
+                count_where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+                db_cursor.execute(f"""
+                                  SELECT COUNT(*)
+                                  FROM Users u
+                                           JOIN Bookings b ON u.id = b.user_id
+                                  {count_where}
+                                  """, params)
+                total = db_cursor.fetchone()[0]
+                if len(_total_cache) >= _TOTAL_CACHE_SIZE:
+                    _total_cache.clear()
+                _total_cache[filter_key] = (generations, total)
+
+        items = [_booking_from_list_row(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_page_cursor([last[0]] if sort == 'id' else [last[14], last[0]])
+
+        duration = time.time() - start_time
+        logger.info(f"Retrieved page of {len(items)} bookings (total {total}) in {duration:.3f}s")
+        return {'items': items, 'next_cursor': next_cursor, 'total': total}
+    except sqlite3.Error as e:
+        logger.error(f"Database error retrieving booking page: {e}", exc_info=True)
+        return {'error': str(e)}
+
+
 def check_email_exists(email: str) -> bool:
     """
     Returns True if there's already a user with the specified email.
@@ -368,6 +724,16 @@ def get_up_to_date_form_content() -> dict:
         return {}
 
 
+def get_form_content_etag() -> str:
+    """
+    Returns the ETag of the participant form content: the content file version plus the
+    booking counter generation. Costs a single primary key lookup, no aggregation.
+    """
+    with closing(_connect_db()) as conn:
+        generation = counter_service.get_booking_generation(conn.cursor())
+    return f"{get_form_content_snapshot().version[:16]}-{generation}"
+
+
 def update_booking_db(booking_id: int, booking_data: dict) -> bool:
     """
     Updates an existing booking in the database.
@@ -389,6 +755,8 @@ def update_booking_db(booking_id: int, booking_data: dict) -> bool:
             # Start a transaction
             conn.execute("BEGIN TRANSACTION")
             try:
+                old_counter_keys = _load_counter_keys(cursor, booking_id, 'material_ids' in booking_data)
+
                 # Update User information
                 cursor.execute("""
                                UPDATE Users
@@ -443,6 +811,18 @@ def update_booking_db(booking_id: int, booking_data: dict) -> bool:
                             (booking_id, material_id)
                         )
 
+                new_counter_keys = counter_service.booking_counter_keys(
+                    booking_data['ticket_id'],
+                    booking_data['beverage_id'],
+                    booking_data['food_id'],
+                    booking_data['timeslot_priority_1'],
+                    booking_data['timeslot_priority_2'],
+                    booking_data['timeslot_priority_3'],
+                    booking_data['amount_shifts'],
+                    material_ids=booking_data.get('material_ids', [])
+                )
+                counter_service.apply_counter_changes(cursor, old_counter_keys, new_counter_keys)
+
                 # Commit transaction
                 conn.commit()
                 logger.info(f"Booking {booking_id} updated successfully")
@@ -492,6 +872,7 @@ def update_booking_payment(booking_id: int, payment_data: dict) -> bool:
                                    payment_data.get('payment_date'),
                                    booking_id
                                ))
+                counter_service.bump_generation(cursor, counter_service.GENERATION_BOOKING_PAYMENTS)
 
                 conn.commit()
                 logger.info(f"Payment status updated for booking {booking_id}")
@@ -517,6 +898,9 @@ def delete_booking(booking_id: int) -> bool:
                 # Start a transaction
                 conn.execute("BEGIN TRANSACTION")
 
+                # Read what the booking counted towards before its materials are gone
+                counter_keys = _load_counter_keys(cursor, booking_id)
+
                 # Delete related records first
                 cursor.execute("DELETE FROM BookingMaterials WHERE booking_id = ?", (booking_id,))
                 cursor.execute("DELETE FROM BookingProfessions WHERE booking_id = ?", (booking_id,))
@@ -535,6 +919,7 @@ def delete_booking(booking_id: int) -> bool:
 
                 # Delete the booking
                 cursor.execute("DELETE FROM Bookings WHERE id = ?", (booking_id,))
+                counter_service.apply_counter_delta(cursor, counter_keys, -1)
 
                 # Check if user has other bookings, if not, delete the user
                 cursor.execute("SELECT COUNT(*) FROM Bookings WHERE user_id = ?", (user_id,))
@@ -0,0 +1,188 @@
+import sqlite3
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# BookingCounters scopes, one row per (scope, option id)
+TICKET = 'ticket'
+BEVERAGE = 'beverage'
+FOOD = 'food'
+MATERIAL = 'material'
+ARTIST_MATERIAL = 'artist_material'
+TIMESLOT = 'timeslot'
+# Bumped on every change so readers (e.g. ETags) can detect that counts moved.
+# One row per booking kind, the option_id tells them apart.
+GENERATION = 'generation'
+GENERATION_BOOKINGS = 0
+GENERATION_ARTIST_BOOKINGS = 1
+# Payment updates don't move any counts, booking list totals still need to notice them
+GENERATION_BOOKING_PAYMENTS = 2
+
+CounterKey = Tuple[str, int]
+
+
+def booking_counter_keys(ticket_id: Optional[int], beverage_id: Optional[int], food_id: Optional[int],
+                         timeslot_priority_1: Optional[int], timeslot_priority_2: Optional[int],
+                         timeslot_priority_3: Optional[int], amount_shifts: Optional[int],
+                         material_ids: Iterable[int] = ()) -> List[CounterKey]:
+    """
+    Returns the counter keys a single booking contributes to.
+    A timeslot priority only counts if the booking volunteers for at least that many shifts.
+    """
+    keys = [(TICKET, ticket_id), (BEVERAGE, beverage_id), (FOOD, food_id)]
+    keys.append((TIMESLOT, timeslot_priority_1))
+    if amount_shifts is not None and amount_shifts >= 2:
+        keys.append((TIMESLOT, timeslot_priority_2))
+    if amount_shifts is not None and amount_shifts >= 3:
+        keys.append((TIMESLOT, timeslot_priority_3))
+    keys.extend((MATERIAL, material_id) for material_id in material_ids)
+    return [(scope, option_id) for scope, option_id in keys if option_id is not None]
+
+
+def apply_counter_delta(cursor: sqlite3.Cursor, keys: Iterable[CounterKey], delta: int) -> None:
+    """
+    Adds delta to every key (keys may repeat) and bumps the generation.
+    Runs on the caller's cursor so it commits or rolls back together with the booking change.
+    """
+    increments = Counter(keys)
+    rows = [(scope, option_id, delta * times) for (scope, option_id), times in increments.items()]
+    rows.append((GENERATION, GENERATION_BOOKINGS, 1))
+    cursor.executemany("""
+                       INSERT INTO BookingCounters (scope, option_id, count)
+                       VALUES (?, ?, ?)
+                       ON CONFLICT(scope, option_id) DO UPDATE SET count = count + excluded.count
+                       """, rows)
+
+
+def apply_counter_changes(cursor: sqlite3.Cursor, old_keys: Iterable[CounterKey],
+                          new_keys: Iterable[CounterKey]) -> None:
+    """
+    Moves counts from old_keys to new_keys, only touching keys that actually changed.
+    """
+    changes = Counter(new_keys)
+    changes.subtract(Counter(old_keys))
+    rows = [(scope, option_id, change) for (scope, option_id), change in changes.items() if change != 0]
+    rows.append((GENERATION, GENERATION_BOOKINGS, 1))
+    cursor.executemany("""
+                       INSERT INTO BookingCounters (scope, option_id, count)
+                       VALUES (?, ?, ?)
+                       ON CONFLICT(scope, option_id) DO UPDATE SET count = count + excluded.count
+                       """, rows)
+
+
+def bump_generation(cursor: sqlite3.Cursor, kind: int = GENERATION_BOOKINGS) -> None:
+    """
+    Bumps a generation without touching any counts, for changes that are not counted here.
+    """
+    cursor.execute("""
+                   INSERT INTO BookingCounters (scope, option_id, count)
+                   VALUES (?, ?, 1)
+                   ON CONFLICT(scope, option_id) DO UPDATE SET count = count + 1
+                   """, (GENERATION, kind))
+
+
+def get_booking_counters(cursor: sqlite3.Cursor) -> Dict[str, Dict[int, int]]:
+    """
+    Returns all counters as {scope: {option_id: count}}.
+    """
+    cursor.execute("SELECT scope, option_id, count FROM BookingCounters")
+    counters: Dict[str, Dict[int, int]] = defaultdict(dict)
+    for scope, option_id, count in cursor.fetchall():
+        counters[scope][option_id] = count
+    return counters
+
+
+def get_booking_generation(cursor: sqlite3.Cursor, kind: int = GENERATION_BOOKINGS) -> int:
+    """
+    Returns the current generation, 0 if it was never bumped.
+    """
+    cursor.execute("SELECT count FROM BookingCounters WHERE scope = ? AND option_id = ?", (GENERATION, kind))
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def reconcile_booking_counters(conn: sqlite3.Connection) -> Dict[str, Dict[int, Tuple[int, int]]]:
+    """
+    Rebuilds BookingCounters from scratch out of Bookings/BookingMaterials.
+    Returns the counters that were off as {scope: {option_id: (stored, actual)}}.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        stored = get_booking_counters(cursor)
+
+        queries = {
+            TICKET: "SELECT ticket_option_id, COUNT(*) FROM Bookings GROUP BY ticket_option_id",
+            BEVERAGE: "SELECT beverage_option_id, COUNT(*) FROM Bookings GROUP BY beverage_option_id",
+            FOOD: "SELECT food_option_id, COUNT(*) FROM Bookings GROUP BY food_option_id",
+            MATERIAL: "SELECT material_id, COUNT(*) FROM BookingMaterials GROUP BY material_id",
+            ARTIST_MATERIAL: "SELECT artist_material_id, COUNT(*) FROM BookingArtistMaterials GROUP BY artist_material_id",
+        }
+        actual: Dict[str, Dict[int, int]] = defaultdict(dict)
+        for scope, query in queries.items():
+            cursor.execute(query)
+            actual[scope] = {option_id: count for option_id, count in cursor.fetchall() if option_id is not None}
+
+        cursor.execute("""
+                       SELECT timeslot_id, SUM(num)
+                       FROM (SELECT first_priority_timeslot_id AS timeslot_id, COUNT(*) AS num
+                             FROM Bookings
+                             WHERE first_priority_timeslot_id IS NOT NULL
+                             GROUP BY first_priority_timeslot_id
+                             UNION ALL
+                             SELECT second_priority_timeslot_id, COUNT(*)
+                             FROM Bookings
+                             WHERE second_priority_timeslot_id IS NOT NULL
+                               AND amount_shifts >= 2
+                             GROUP BY second_priority_timeslot_id
+                             UNION ALL
+                             SELECT third_priority_timeslot_id, COUNT(*)
+                             FROM Bookings
+                             WHERE third_priority_timeslot_id IS NOT NULL
+                               AND amount_shifts >= 3
+                             GROUP BY third_priority_timeslot_id)
+                       GROUP BY timeslot_id
+                       """)
+        actual[TIMESLOT] = dict(cursor.fetchall())
+
+        drift: Dict[str, Dict[int, Tuple[int, int]]] = {}
+        for scope in set(stored) | set(actual):
+            if scope == GENERATION:
+                continue
+            option_ids = set(stored.get(scope, {})) | set(actual.get(scope, {}))
+            for option_id in option_ids:
+                stored_count = stored.get(scope, {}).get(option_id, 0)
+                actual_count = actual.get(scope, {}).get(option_id, 0)
+                if stored_count != actual_count:
+                    drift.setdefault(scope, {})[option_id] = (stored_count, actual_count)
+
+        # Keep the generations, they must only ever grow
+        cursor.execute("DELETE FROM BookingCounters WHERE scope != ?", (GENERATION,))
+        rows = [(scope, option_id, count)
+                for scope, counts in actual.items()
+                for option_id, count in counts.items()]
+        cursor.executemany("INSERT INTO BookingCounters (scope, option_id, count) VALUES (?, ?, ?)", rows)
+        bump_generation(cursor)
+        conn.commit()
+
+        if drift:
+            logger.warning(f"Booking counters reconciled, corrected drift: {drift}")
+        else:
+            logger.info("Booking counters reconciled, no drift found")
+        return drift
+
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+
+def ensure_booking_counters(conn: sqlite3.Connection) -> None:
+    """
+    Builds the counters once for databases that predate the BookingCounters table.
+    """
+    if get_booking_generation(conn.cursor()) == 0:
+        logger.info("Booking counters not initialized yet, building them")
+        reconcile_booking_counters(conn)
@@ -0,0 +1,185 @@
+import csv
+import io
+from contextlib import closing
+from typing import Callable, Dict, IO, Iterable, Iterator, List, Tuple
+
+from src.services.artist_service import iter_artist_bookings
+from src.services.booking_service import iter_bookings, _connect_db, _group_child_ids
+from src.services.formcontent_service import get_form_content_snapshot, get_artist_form_content_snapshot
+from src.services.mail_service import FormContentIndex, form_content_index
+
+try:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+except ImportError:  # XLSX export is optional, CSV works without it
+    Workbook = None
+
+TABLE_FORMATS = ('csv', 'xlsx')
+
+BOOKINGS = 'bookings'
+ARTIST_BOOKINGS = 'artist_bookings'
+
+def xlsx_available() -> bool:
+    return Workbook is not None
+
+
+# Leading characters that make Excel and LibreOffice treat a cell as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def neutralize_cell(value):
+    """
+    Prefixes text that a spreadsheet would run as a formula with a quote, so values from the
+    public form (names, notes, equipment) can't plant formulas in the organizers' exports.
+    """
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+def _title(options: Dict[int, Dict], option_id) -> str:
+    option = options.get(option_id)
+    if option is not None:
+        return option['title']
+    return "" if option_id is None else f"#{option_id}"
+
+
+def _titles(options: Dict[int, Dict], option_ids: List[int]) -> str:
+    return "; ".join(_title(options, option_id) for option_id in option_ids)
+
+
+def _timeslot_title(index: FormContentIndex, timeslot_id) -> str:
+    found = index.timeslots.get(timeslot_id)
+    if found is None:
+        return "" if timeslot_id is None else f"#{timeslot_id}"
+    ws, ts = found
+    return f"{ws['title']}: {ts['title']} ({ts['start_time']}-{ts['end_time']})"
+
+
+# (header, value of a booking) per column. Booking columns also get the ids of the assigned timeslots.
+BOOKING_COLUMNS: List[Tuple[str, Callable]] = [
+    ("ID", lambda b, index, assigned: b.id),
+    ("Timestamp", lambda b, index, assigned: b.timestamp),
+    ("Last name", lambda b, index, assigned: b.last_name),
+    ("First name", lambda b, index, assigned: b.first_name),
+    ("Email", lambda b, index, assigned: b.email),
+    ("Phone", lambda b, index, assigned: b.phone),
+    ("Ticket", lambda b, index, assigned: _title(index.ticket_options, b.ticket_id)),
+    ("Beverage", lambda b, index, assigned: _title(index.beverage_options, b.beverage_id)),
+    ("Food", lambda b, index, assigned: _title(index.food_options, b.food_id)),
+    ("Priority 1", lambda b, index, assigned: _timeslot_title(index, b.timeslot_priority_1)),
+    ("Priority 2", lambda b, index, assigned: _timeslot_title(index, b.timeslot_priority_2)),
+    ("Priority 3", lambda b, index, assigned: _timeslot_title(index, b.timeslot_priority_3)),
+    ("Shifts", lambda b, index, assigned: b.amount_shifts),
+    ("Assigned shifts", lambda b, index, assigned: "; ".join(_timeslot_title(index, ts_id) for ts_id in assigned)),
+    ("Materials", lambda b, index, assigned: _titles(index.materials, b.material_ids)),
+    ("Professions", lambda b, index, assigned: _titles(index.professions, b.profession_ids)),
+    ("Supporter buddy", lambda b, index, assigned: b.supporter_buddy),
+    ("Total price", lambda b, index, assigned: b.total_price),
+    ("Paid", lambda b, index, assigned: "yes" if b.is_paid else "no"),
+    ("Paid amount", lambda b, index, assigned: b.paid_amount),
+    ("Payment date", lambda b, index, assigned: b.payment_date),
+    ("Payment notes", lambda b, index, assigned: b.payment_notes),
+]
+
+ARTIST_BOOKING_COLUMNS: List[Tuple[str, Callable]] = [
+    ("ID", lambda b, index: b.id),
+    ("Timestamp", lambda b, index: b.timestamp),
+    ("Last name", lambda b, index: b.last_name),
+    ("First name", lambda b, index: b.first_name),
+    ("Email", lambda b, index: b.email),
+    ("Phone", lambda b, index: b.phone),
+    ("Ticket", lambda b, index: _title(index.ticket_options, b.ticket_id)),
+    ("Beverage", lambda b, index: _title(index.beverage_options, b.beverage_id)),
+    ("Food", lambda b, index: _title(index.food_options, b.food_id)),
+    ("Materials", lambda b, index: _titles(index.artist_materials, b.artist_material_ids)),
+    ("Professions", lambda b, index: _titles(index.professions, b.profession_ids)),
+    ("Equipment", lambda b, index: b.equipment),
+    ("Special requests", lambda b, index: b.special_requests),
+    ("Performance details", lambda b, index: b.performance_details),
+    ("Total price", lambda b, index: b.total_price),
+    ("Paid", lambda b, index: "yes" if b.is_paid else "no"),
+    ("Paid amount", lambda b, index: b.paid_amount),
+    ("Payment date", lambda b, index: b.payment_date),
+    ("Payment notes", lambda b, index: b.payment_notes),
+]
+
+
+def _assigned_timeslots(booking_ids: List[int]) -> Dict[int, List[int]]:
+    """
+    Returns {booking_id: [timeslot_id, ...]} of the shift assignments of the given bookings.
+    """
+    with closing(_connect_db()) as conn:
+        cursor = conn.execute(f"""
+                              SELECT booking_id, timeslot_id
+                              FROM ShiftAssignments
+                              WHERE booking_id IN ({', '.join('?' * len(booking_ids))})
+                              ORDER BY booking_id, timeslot_id
+                              """, booking_ids)
+        return _group_child_ids(cursor)
+
+
+def iter_table_rows(kind: str) -> Iterator[List[list]]:
+    """
+    Yields the header row, then the bookings of kind (BOOKINGS or ARTIST_BOOKINGS) as rows of
+    display values, one batch at a time. Option, timeslot, material and profession ids are
+    resolved to titles through the form content index, which is built once per form content version.
+    Text values are passed through neutralize_cell.
+    """
+    if kind == BOOKINGS:
+        columns = BOOKING_COLUMNS
+    elif kind == ARTIST_BOOKINGS:
+        columns = ARTIST_BOOKING_COLUMNS
+    else:
+        raise ValueError(f"Unknown export kind: {kind}")
+
+    def generate():
+        index = form_content_index(get_form_content_snapshot() if kind == BOOKINGS
+                                   else get_artist_form_content_snapshot())
+        yield [[header for header, _ in columns]]
+        if kind == BOOKINGS:
+            for batch in iter_bookings():
+                assigned = _assigned_timeslots([b.id for b in batch])
+                yield [[neutralize_cell(value(b, index, assigned.get(b.id, []))) for _, value in columns]
+                       for b in batch]
+        else:
+            for batch in iter_artist_bookings():
+                yield [[neutralize_cell(value(b, index)) for _, value in columns] for b in batch]
+
+    return generate()
+
+
+def csv_chunks(row_batches: Iterable[List[list]]) -> Iterator[str]:
+    """
+    Writes row batches as CSV, one chunk per batch. Starts with a BOM so Excel reads UTF-8.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    yield '\ufeff'
+    for rows in row_batches:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def write_xlsx(row_batches: Iterable[List[list]], file: IO[bytes], sheet_title: str) -> None:
+    """
+    Writes row batches to an XLSX workbook in openpyxl's write-only mode, which keeps
+    rows on disk instead of in memory. An XLSX is a zip, so it can only be sent once complete.
+    Text is always written as a string cell, openpyxl would otherwise store '=...' as a formula.
+    """
+    if Workbook is None:
+        raise RuntimeError("XLSX export needs openpyxl")
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_title)
+    for rows in row_batches:
+        for row in rows:
+            sheet.append([_string_cell(sheet, value) if isinstance(value, str) else value for value in row])
+    workbook.save(file)
+
+
+def _string_cell(sheet, value: str):
+    cell = WriteOnlyCell(sheet, value=value)
+    cell.data_type = 's'
+    return cell
@@ -1,224 +1,268 @@
+import hashlib
 import json
 import os
 import sqlite3
+import threading
 import time
 import logging
-from dataclasses import asdict
-from typing import Callable
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Tuple, Union
 
 from src.models.datatypes import (
     FormContent,
     TicketOption, BeverageOption, FoodOption, WorkShift, TimeSlot, Material, ArtistMaterial, ArtistFormContent,
     Profession
 )
+from src.services import counter_service
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), '../../data')
 FORM_CONTENT_PATH = os.path.join(DATA_DIR, 'form_content.json')
+ARTIST_FORM_CONTENT_PATH = os.path.join(DATA_DIR, 'artist_form_content.json')
 
 
-def get_form_content_obj() -> FormContent:
+@dataclass
+class FormContentSnapshot:
     """
-    Loads and returns a FormContent object from JSON (without DB-based booked counts).
+    Parsed form content file, cached in-process.
+    version is the SHA-256 of the file contents; file_key identifies the file state it was read from.
     """
-    start_time = time.time()
+    version: str
+    content: Union[FormContent, ArtistFormContent]
+    file_key: Tuple[int, int, int]
+    loaded_at: float
 
-    try:
-        logger.debug(f"Loading form content from {FORM_CONTENT_PATH}")
-
-        if not os.path.exists(FORM_CONTENT_PATH):
-            logger.error(f"Form content file not found: {FORM_CONTENT_PATH}")
-            raise FileNotFoundError(f"Form content file not found: {FORM_CONTENT_PATH}")
-
-        with open(FORM_CONTENT_PATH, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        logger.debug("Form content JSON loaded successfully")
-
-        # Reconstruct the nested objects with IDs
-        # We'll auto-assign IDs in a consistent manner
-        ticket_options = [
-            TicketOption(id=idx, **ticket)
-            for idx, ticket in enumerate(data['ticket_options'])
-        ]
-        logger.debug(f"Processed {len(ticket_options)} ticket options")
-
-        beverage_options = [
-            BeverageOption(id=idx, **bev)
-            for idx, bev in enumerate(data['beverage_options'])
-        ]
-        logger.debug(f"Processed {len(beverage_options)} beverage options")
-
-        food_options = [
-            FoodOption(id=idx, **food)
-            for idx, food in enumerate(data['food_options'])
-        ]
-        logger.debug(f"Processed {len(food_options)} food options")
-
-        professions = [
-            Profession(id=idx, **profession)
-            for idx, profession in enumerate(data.get('professions', []))
-        ]
-        logger.debug(f"Processed {len(professions)} professions")
-
-        # For work_shifts, we also auto-assign shift.id and timeslot.id
-        work_shifts: list[WorkShift] = []
-        timeslot_global_id = 0
-        for ws_id, ws_data in enumerate(data['work_shifts']):
-            timeslots_list = []
-            for ts_data in ws_data['time_slots']:
-                ts = TimeSlot(
-                    id=timeslot_global_id,
-                    title=ts_data['title'],
-                    start_time=ts_data['start_time'],
-                    end_time=ts_data['end_time'],
-                    num_needed=ts_data['num_needed']
-                )
-                timeslot_global_id += 1
-                timeslots_list.append(ts)
-            work_shifts.append(
-                WorkShift(
-                    id=ws_id,
-                    title=ws_data['title'],
-                    description=ws_data['description'],
-                    time_slots=timeslots_list
-                )
+
+_snapshot_cache: Dict[str, FormContentSnapshot] = {}
+_snapshot_lock = threading.Lock()
+
+
+def _file_key(path: str) -> Tuple[int, int, int]:
+    stat = os.stat(path)
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def _get_snapshot(path: str, builder: Callable[[dict], Union[FormContent, ArtistFormContent]],
+                  label: str) -> FormContentSnapshot:
+    """
+    Returns the cached snapshot for path, re-reading the file only if its inode, mtime or size changed.
+    """
+    if not os.path.exists(path):
+        logger.error(f"{label} file not found: {path}")
+        raise FileNotFoundError(f"{label} file not found: {path}")
+
+    file_key = _file_key(path)
+    snapshot = _snapshot_cache.get(path)
+    if snapshot is not None and snapshot.file_key == file_key:
+        return snapshot
+
+    with _snapshot_lock:
+        # Another thread may have reloaded it while we were waiting
+        snapshot = _snapshot_cache.get(path)
+        if snapshot is not None and snapshot.file_key == file_key:
+            return snapshot
+
+        start_time = time.time()
+        try:
+            logger.debug(f"Loading {label} from {path}")
+
+            with open(path, 'rb') as f:
+                raw = f.read()
+            data = json.loads(raw.decode('utf-8'))
+            logger.debug(f"{label} JSON loaded successfully")
+
+            snapshot = FormContentSnapshot(
+                version=hashlib.sha256(raw).hexdigest(),
+                content=builder(data),
+                file_key=file_key,
+                loaded_at=time.time()
             )
-        logger.debug(f"Processed {len(work_shifts)} work shifts with {timeslot_global_id} total timeslots")
-
-        materials = [
-            Material(id=idx, **material)
-            for idx, material in enumerate(data['materials'])
-        ]
-        logger.debug(f"Processed {len(materials)} materials")
-
-        # For artist materials
-        artist_materials = [
-            ArtistMaterial(id=idx, **am)
-            for idx, am in enumerate(data.get('artist_materials', []))
-        ]
-        logger.debug(f"Processed {len(artist_materials)} artist materials")
-
-        form_content = FormContent(
-            ticket_options=ticket_options,
-            beverage_options=beverage_options,
-            food_options=food_options,
-            work_shifts=work_shifts,
-            materials=materials,
-            artist_materials=artist_materials,
-            professions=professions
-        )
+            _snapshot_cache[path] = snapshot
 
-        duration = time.time() - start_time
-        logger.info(f"Form content object created successfully in {duration:.3f}s")
+            duration = time.time() - start_time
+            logger.info(f"{label} object created successfully in {duration:.3f}s (version {snapshot.version[:12]})")
 
-        if duration > 0.5:
-            logger.warning(f"Slow form content loading: {duration:.3f}s")
+            if duration > 0.5:
+                logger.warning(f"Slow {label} loading: {duration:.3f}s")
 
-        return form_content
+            return snapshot
 
-    except FileNotFoundError as e:
-        duration = time.time() - start_time
-        logger.error(f"Form content file not found after {duration:.3f}s: {str(e)}")
-        raise
-    except json.JSONDecodeError as e:
-        duration = time.time() - start_time
-        logger.error(f"Invalid JSON in form content file after {duration:.3f}s: {str(e)}")
-        raise
-    except KeyError as e:
-        duration = time.time() - start_time
-        logger.error(f"Missing required key in form content after {duration:.3f}s: {str(e)}")
-        raise
-    except Exception as e:
-        duration = time.time() - start_time
-        logger.error(f"Unexpected error loading form content after {duration:.3f}s: {str(e)}", exc_info=True)
-        raise
+        except json.JSONDecodeError as e:
+            duration = time.time() - start_time
+            logger.error(f"Invalid JSON in {label} file after {duration:.3f}s: {str(e)}")
+            raise
+        except KeyError as e:
+            duration = time.time() - start_time
+            logger.error(f"Missing required key in {label} after {duration:.3f}s: {str(e)}")
+            raise
+        except Exception as e:
+            duration = time.time() - start_time
+            logger.error(f"Unexpected error loading {label} after {duration:.3f}s: {str(e)}", exc_info=True)
+            raise
 
 
-def get_artist_form_content_obj() -> ArtistFormContent:
+def reload_form_content() -> None:
     """
-    Loads and returns an ArtistFormContent object from JSON.
+    Drops all cached form content snapshots, the next access re-reads the JSON files.
     """
-    start_time = time.time()
-    ARTIST_FORM_CONTENT_PATH = os.path.join(DATA_DIR, 'artist_form_content.json')
+    with _snapshot_lock:
+        _snapshot_cache.clear()
+    logger.info("Form content cache cleared")
 
-    try:
-        logger.debug(f"Loading artist form content from {ARTIST_FORM_CONTENT_PATH}")
-
-        if not os.path.exists(ARTIST_FORM_CONTENT_PATH):
-            logger.error(f"Artist form content file not found: {ARTIST_FORM_CONTENT_PATH}")
-            raise FileNotFoundError(f"Artist form content file not found: {ARTIST_FORM_CONTENT_PATH}")
-
-        with open(ARTIST_FORM_CONTENT_PATH, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        logger.debug("Artist form content JSON loaded successfully")
-
-        # Reconstruct the nested objects with IDs
-        ticket_options = [
-            TicketOption(id=idx, **ticket)
-            for idx, ticket in enumerate(data['ticket_options'])
-        ]
-        logger.debug(f"Processed {len(ticket_options)} artist ticket options")
-
-        beverage_options = [
-            BeverageOption(id=idx, **bev)
-            for idx, bev in enumerate(data['beverage_options'])
-        ]
-        logger.debug(f"Processed {len(beverage_options)} artist beverage options")
-
-        food_options = [
-            FoodOption(id=idx, **food)
-            for idx, food in enumerate(data['food_options'])
-        ]
-        logger.debug(f"Processed {len(food_options)} artist food options")
-
-        artist_materials = [
-            ArtistMaterial(id=idx, **am)
-            for idx, am in enumerate(data['artist_materials'])
-        ]
-        logger.debug(f"Processed {len(artist_materials)} artist materials")
-
-        professions = [
-            Profession(id=idx, **profession)
-            for idx, profession in enumerate(data.get('professions', []))
-        ]
-        logger.debug(f"Processed {len(professions)} artist professions")
-
-        artist_form_content = ArtistFormContent(
-            ticket_options=ticket_options,
-            beverage_options=beverage_options,
-            food_options=food_options,
-            artist_materials=artist_materials,
-            professions=professions
-        )
 
-        duration = time.time() - start_time
-        logger.info(f"Artist form content object created successfully in {duration:.3f}s")
+def get_form_content_snapshot() -> FormContentSnapshot:
+    """
+    Returns the cached FormContent snapshot of form_content.json.
+    """
+    return _get_snapshot(FORM_CONTENT_PATH, _build_form_content, "Form content")
 
-        if duration > 0.5:
-            logger.warning(f"Slow artist form content loading: {duration:.3f}s")
 
-        return artist_form_content
+def get_artist_form_content_snapshot() -> FormContentSnapshot:
+    """
+    Returns the cached ArtistFormContent snapshot of artist_form_content.json.
+    """
+    return _get_snapshot(ARTIST_FORM_CONTENT_PATH, _build_artist_form_content, "Artist form content")
 
-    except FileNotFoundError as e:
-        duration = time.time() - start_time
-        logger.error(f"Artist form content file not found after {duration:.3f}s: {str(e)}")
-        raise
-    except json.JSONDecodeError as e:
-        duration = time.time() - start_time
-        logger.error(f"Invalid JSON in artist form content file after {duration:.3f}s: {str(e)}")
-        raise
-    except KeyError as e:
-        duration = time.time() - start_time
-        logger.error(f"Missing required key in artist form content after {duration:.3f}s: {str(e)}")
-        raise
-    except Exception as e:
-        duration = time.time() - start_time
-        logger.error(f"Unexpected error loading artist form content after {duration:.3f}s: {str(e)}", exc_info=True)
-        raise
+
+def get_form_content_obj() -> FormContent:
+    """
+    Returns the FormContent object from JSON (without DB-based booked counts).
+    The object is cached and shared, treat it as read-only.
+    """
+    return get_form_content_snapshot().content
+
+
+def get_artist_form_content_obj() -> ArtistFormContent:
+    """
+    Returns the ArtistFormContent object from JSON.
+    The object is cached and shared, treat it as read-only.
+    """
+    return get_artist_form_content_snapshot().content
+
+
+def _build_form_content(data: dict) -> FormContent:
+    """
+    Reconstructs the nested FormContent objects from the parsed JSON.
+    """
+    # Reconstruct the nested objects with IDs
+    # We'll auto-assign IDs in a consistent manner
+    ticket_options = [
+        TicketOption(id=idx, **ticket)
+        for idx, ticket in enumerate(data['ticket_options'])
+    ]
+    logger.debug(f"Processed {len(ticket_options)} ticket options")
+
+    beverage_options = [
+        BeverageOption(id=idx, **bev)
+        for idx, bev in enumerate(data['beverage_options'])
+    ]
+    logger.debug(f"Processed {len(beverage_options)} beverage options")
+
+    food_options = [
+        FoodOption(id=idx, **food)
+        for idx, food in enumerate(data['food_options'])
+    ]
+    logger.debug(f"Processed {len(food_options)} food options")
+
+    professions = [
+        Profession(id=idx, **profession)
+        for idx, profession in enumerate(data.get('professions', []))
+    ]
+    logger.debug(f"Processed {len(professions)} professions")
+
+    # For work_shifts, we also auto-assign shift.id and timeslot.id
+    work_shifts: list[WorkShift] = []
+    timeslot_global_id = 0
+    for ws_id, ws_data in enumerate(data['work_shifts']):
+        timeslots_list = []
+        for ts_data in ws_data['time_slots']:
+            ts = TimeSlot(
+                id=timeslot_global_id,
+                title=ts_data['title'],
+                start_time=ts_data['start_time'],
+                end_time=ts_data['end_time'],
+                num_needed=ts_data['num_needed']
+            )
+            timeslot_global_id += 1
+            timeslots_list.append(ts)
+        work_shifts.append(
+            WorkShift(
+                id=ws_id,
+                title=ws_data['title'],
+                description=ws_data['description'],
+                time_slots=timeslots_list
+            )
+        )
+    logger.debug(f"Processed {len(work_shifts)} work shifts with {timeslot_global_id} total timeslots")
+
+    materials = [
+        Material(id=idx, **material)
+        for idx, material in enumerate(data['materials'])
+    ]
+    logger.debug(f"Processed {len(materials)} materials")
+
+    # For artist materials
+    artist_materials = [
+        ArtistMaterial(id=idx, **am)
+        for idx, am in enumerate(data.get('artist_materials', []))
+    ]
+    logger.debug(f"Processed {len(artist_materials)} artist materials")
+
+    return FormContent(
+        ticket_options=ticket_options,
+        beverage_options=beverage_options,
+        food_options=food_options,
+        work_shifts=work_shifts,
+        materials=materials,
+        artist_materials=artist_materials,
+        professions=professions
+    )
+
+
+def _build_artist_form_content(data: dict) -> ArtistFormContent:
+    """
+    Reconstructs the nested ArtistFormContent objects from the parsed JSON.
+    """
+    # Reconstruct the nested objects with IDs
+    ticket_options = [
+        TicketOption(id=idx, **ticket)
+        for idx, ticket in enumerate(data['ticket_options'])
+    ]
+    logger.debug(f"Processed {len(ticket_options)} artist ticket options")
+
+    beverage_options = [
+        BeverageOption(id=idx, **bev)
+        for idx, bev in enumerate(data['beverage_options'])
+    ]
+    logger.debug(f"Processed {len(beverage_options)} artist beverage options")
+
+    food_options = [
+        FoodOption(id=idx, **food)
+        for idx, food in enumerate(data['food_options'])
+    ]
+    logger.debug(f"Processed {len(food_options)} artist food options")
+
+    artist_materials = [
+        ArtistMaterial(id=idx, **am)
+        for idx, am in enumerate(data['artist_materials'])
+    ]
+    logger.debug(f"Processed {len(artist_materials)} artist materials")
+
+    professions = [
+        Profession(id=idx, **profession)
+        for idx, profession in enumerate(data.get('professions', []))
+    ]
+    logger.debug(f"Processed {len(professions)} artist professions")
+
+    return ArtistFormContent(
+        ticket_options=ticket_options,
+        beverage_options=beverage_options,
+        food_options=food_options,
+        artist_materials=artist_materials,
+        professions=professions
+    )
 
 
 def update_form_content_with_db_counts(
@@ -227,7 +271,7 @@ def update_form_content_with_db_counts(
 ) -> dict:
     """
     Given a loaded FormContent object and a DB connection function,
-    queries the DB for existing bookings, updates num_booked fields,
+    reads the booking counters, updates num_booked fields,
     and returns a dictionary.
     """
     start_time = time.time()
@@ -235,135 +279,51 @@ def update_form_content_with_db_counts(
     try:
         logger.debug("Starting form content database count update")
 
+        # Counts go into a copy, the cached form content object is shared between requests
+        result = asdict(form_content_obj)
+
         conn = db_connect_func()
         cursor = conn.cursor()
 
-        # TICKETS
-        logger.debug("Querying ticket booking counts")
-        cursor.execute("SELECT ticket_option_id, COUNT(*) FROM Bookings GROUP BY ticket_option_id")
-        ticket_bookings = dict(cursor.fetchall())
-        logger.debug(f"Found booking counts for {len(ticket_bookings)} ticket options")
-
-        # BEVERAGE
-        logger.debug("Querying beverage booking counts")
-        cursor.execute("SELECT beverage_option_id, COUNT(*) FROM Bookings GROUP BY beverage_option_id")
-        beverage_bookings = dict(cursor.fetchall())
-        logger.debug(f"Found booking counts for {len(beverage_bookings)} beverage options")
-
-        # FOOD
-        logger.debug("Querying food booking counts")
-        cursor.execute("SELECT food_option_id, COUNT(*) FROM Bookings GROUP BY food_option_id")
-        food_bookings = dict(cursor.fetchall())
-        logger.debug(f"Found booking counts for {len(food_bookings)} food options")
-
-        # MATERIAL
-        logger.debug("Querying material booking counts")
-        cursor.execute("SELECT material_id, COUNT(*) FROM BookingMaterials GROUP BY material_id")
-        material_bookings = dict(cursor.fetchall())
-        logger.debug(f"Found booking counts for {len(material_bookings)} materials")
-
-        # ARTIST MATERIAL
-        logger.debug("Querying artist material booking counts")
-        cursor.execute("SELECT artist_material_id, COUNT(*) FROM BookingArtistMaterials GROUP BY artist_material_id")
-        artist_material_bookings = dict(cursor.fetchall())
-        logger.debug(f"Found booking counts for {len(artist_material_bookings)} artist materials")
+        # Counts are maintained incrementally by booking_service, see counter_service
+        logger.debug("Reading booking counters")
+        counters = counter_service.get_booking_counters(cursor)
+        ticket_bookings = counters.get(counter_service.TICKET, {})
+        beverage_bookings = counters.get(counter_service.BEVERAGE, {})
+        food_bookings = counters.get(counter_service.FOOD, {})
+        material_bookings = counters.get(counter_service.MATERIAL, {})
+        artist_material_bookings = counters.get(counter_service.ARTIST_MATERIAL, {})
+        timeslot_bookings = counters.get(counter_service.TIMESLOT, {})
+        logger.debug(f"Found booking counters for {sum(len(c) for c in counters.values())} options")
 
-        # Update the in-memory object section, add after the Materials section:
         # Artist Materials
-        for am in form_content_obj.artist_materials:
-            am.num_booked = artist_material_bookings.get(am.id, 0)
-
-        # TIMESLOT: first priority
-        logger.debug("Querying first priority timeslot counts")
-        cursor.execute("""
-                       SELECT first_priority_timeslot_id, COUNT(*)
-                       FROM Bookings
-                       WHERE first_priority_timeslot_id IS NOT NULL
-                       GROUP BY first_priority_timeslot_id
-                       """)
-        timeslot_bookings_1 = dict(cursor.fetchall())
-        logger.debug(f"Found first priority counts for {len(timeslot_bookings_1)} timeslots")
-
-        # second priority
-        logger.debug("Querying second priority timeslot counts")
-        cursor.execute("""
-                       SELECT second_priority_timeslot_id, COUNT(*)
-                       FROM Bookings
-                       WHERE second_priority_timeslot_id IS NOT NULL
-                         AND amount_shifts >= 2
-                       GROUP BY second_priority_timeslot_id
-                       """)
-        timeslot_bookings_2 = dict(cursor.fetchall())
-        logger.debug(f"Found second priority counts for {len(timeslot_bookings_2)} timeslots")
-
-        # third priority
-        logger.debug("Querying third priority timeslot counts")
-        cursor.execute("""
-                       SELECT third_priority_timeslot_id, COUNT(*)
-                       FROM Bookings
-                       WHERE third_priority_timeslot_id IS NOT NULL
-                         AND amount_shifts >= 3
-                       GROUP BY third_priority_timeslot_id
-                       """)
-        timeslot_bookings_3 = dict(cursor.fetchall())
-        logger.debug(f"Found third priority counts for {len(timeslot_bookings_3)} timeslots")
+        for am in result['artist_materials']:
+            am['num_booked'] = artist_material_bookings.get(am['id'], 0)
 
         conn.close()
         logger.debug("Database connection closed")
 
-        # Now update the in-memory object
+        # Fill the counts into the copy
         # Ticket
-        updated_tickets = 0
-        for t in form_content_obj.ticket_options:
-            old_count = getattr(t, 'num_booked', 0)
-            t.num_booked = ticket_bookings.get(t.id, 0)
-            if t.num_booked != old_count:
-                updated_tickets += 1
-        logger.debug(f"Updated booking counts for {updated_tickets} ticket options")
+        for t in result['ticket_options']:
+            t['num_booked'] = ticket_bookings.get(t['id'], 0)
 
         # Beverage
-        updated_beverages = 0
-        for b in form_content_obj.beverage_options:
-            old_count = getattr(b, 'num_booked', 0)
-            b.num_booked = beverage_bookings.get(b.id, 0)
-            if b.num_booked != old_count:
-                updated_beverages += 1
-        logger.debug(f"Updated booking counts for {updated_beverages} beverage options")
+        for b in result['beverage_options']:
+            b['num_booked'] = beverage_bookings.get(b['id'], 0)
 
         # Food
-        updated_food = 0
-        for f in form_content_obj.food_options:
-            old_count = getattr(f, 'num_booked', 0)
-            f.num_booked = food_bookings.get(f.id, 0)
-            if f.num_booked != old_count:
-                updated_food += 1
-        logger.debug(f"Updated booking counts for {updated_food} food options")
+        for f in result['food_options']:
+            f['num_booked'] = food_bookings.get(f['id'], 0)
 
         # Materials
-        updated_materials = 0
-        for m in form_content_obj.materials:
-            old_count = getattr(m, 'num_booked', 0)
-            m.num_booked = material_bookings.get(m.id, 0)
-            if m.num_booked != old_count:
-                updated_materials += 1
-        logger.debug(f"Updated booking counts for {updated_materials} materials")
+        for m in result['materials']:
+            m['num_booked'] = material_bookings.get(m['id'], 0)
 
         # Timeslots
-        updated_timeslots = 0
-        total_timeslots = 0
-        for ws in form_content_obj.work_shifts:
-            for ts in ws.time_slots:
-                total_timeslots += 1
-                old_count = getattr(ts, 'num_booked', 0)
-                num1 = timeslot_bookings_1.get(ts.id, 0)
-                num2 = timeslot_bookings_2.get(ts.id, 0)
-                num3 = timeslot_bookings_3.get(ts.id, 0)
-                ts.num_booked = num1 + num2 + num3
-                if ts.num_booked != old_count:
-                    updated_timeslots += 1
-        logger.debug(f"Updated booking counts for {updated_timeslots}/{total_timeslots} timeslots")
-
-        result = asdict(form_content_obj)
+        for ws in result['work_shifts']:
+            for ts in ws['time_slots']:
+                ts['num_booked'] = timeslot_bookings.get(ts['id'], 0)
 
         duration = time.time() - start_time
         logger.info(f"Form content database counts updated successfully in {duration:.3f}s")
@@ -407,6 +367,9 @@ def update_artist_form_content_with_db_counts(
     try:
         logger.debug("Starting artist form content database count update")
 
+        # Counts go into a copy, the cached form content object is shared between requests
+        result = asdict(form_content_obj)
+
         conn = db_connect_func()
         cursor = conn.cursor()
 
@@ -434,57 +397,25 @@ def update_artist_form_content_with_db_counts(
         artist_material_bookings = dict(cursor.fetchall())
         logger.debug(f"Found artist booking counts for {len(artist_material_bookings)} artist materials")
 
-        # Update the in-memory object section, add after the Materials section:
-        # Artist Materials
-        updated_artist_materials = 0
-        for am in form_content_obj.artist_materials:
-            old_count = getattr(am, 'num_booked', 0)
-            am.num_booked = artist_material_bookings.get(am.id, 0)
-            if am.num_booked != old_count:
-                updated_artist_materials += 1
-        logger.debug(f"Updated artist booking counts for {updated_artist_materials} artist materials")
-
         conn.close()
         logger.debug("Database connection closed")
 
-        # Now update the in-memory object
+        # Fill the counts into the copy
         # Ticket
-        updated_tickets = 0
-        for t in form_content_obj.ticket_options:
-            old_count = getattr(t, 'num_booked', 0)
-            t.num_booked = ticket_bookings.get(t.id, 0)
-            if t.num_booked != old_count:
-                updated_tickets += 1
-        logger.debug(f"Updated artist booking counts for {updated_tickets} ticket options")
+        for t in result['ticket_options']:
+            t['num_booked'] = ticket_bookings.get(t['id'], 0)
 
         # Beverage
-        updated_beverages = 0
-        for b in form_content_obj.beverage_options:
-            old_count = getattr(b, 'num_booked', 0)
-            b.num_booked = beverage_bookings.get(b.id, 0)
-            if b.num_booked != old_count:
-                updated_beverages += 1
-        logger.debug(f"Updated artist booking counts for {updated_beverages} beverage options")
+        for b in result['beverage_options']:
+            b['num_booked'] = beverage_bookings.get(b['id'], 0)
 
         # Food
-        updated_food = 0
-        for f in form_content_obj.food_options:
-            old_count = getattr(f, 'num_booked', 0)
-            f.num_booked = food_bookings.get(f.id, 0)
-            if f.num_booked != old_count:
-                updated_food += 1
-        logger.debug(f"Updated artist booking counts for {updated_food} food options")
+        for f in result['food_options']:
+            f['num_booked'] = food_bookings.get(f['id'], 0)
 
         # Materials
-        updated_materials = 0
-        for m in form_content_obj.artist_materials:
-            old_count = getattr(m, 'num_booked', 0)
-            m.num_booked = artist_material_bookings.get(m.id, 0)
-            if m.num_booked != old_count:
-                updated_materials += 1
-        logger.debug(f"Updated artist booking counts for {updated_materials} artist materials")
-
-        result = asdict(form_content_obj)
+        for m in result['artist_materials']:
+            m['num_booked'] = artist_material_bookings.get(m['id'], 0)
 
         duration = time.time() - start_time
         logger.info(f"Artist form content database counts updated successfully in {duration:.3f}s")
@@ -1,48 +1,430 @@
 import json
 import os
+import re
 import smtplib
+import socket
+import threading
+import time
+from dataclasses import asdict, dataclass
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from dotenv import load_dotenv
 
 from src.models.datatypes import Booking, ArtistBooking
-from typing import Dict
+from src.services.formcontent_service import FormContentSnapshot
+from src.utils.logger import get_logger
+from typing import Dict, List, Optional, Tuple, Union
 
 load_dotenv()
 
+logger = get_logger(__name__)
+
 PAYPAL_LINK = "https://www.paypal.me/Wiesenwahn"
 
-def get_booking_details(booking: Booking, form_content: Dict) -> str:
+SMTP_HOST = os.environ.get("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.environ.get("SMTP_PORT", "465"))
+# ssl (implicit TLS, Gmail on 465), starttls (587) or none (local test server)
+SMTP_SECURITY = os.environ.get("SMTP_SECURITY", "ssl").lower()
+SMTP_POOL_SIZE = int(os.environ.get("SMTP_POOL_SIZE", "2"))
+SMTP_RATE_LIMIT = float(os.environ.get("SMTP_RATE_LIMIT", "2"))  # messages per second, 0 = unlimited
+SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.environ.get("SMTP_MAX_MESSAGES_PER_CONNECTION", "100"))
+SMTP_IDLE_CHECK_AFTER = float(os.environ.get("SMTP_IDLE_CHECK_AFTER", "30"))
+SMTP_TIMEOUT = float(os.environ.get("SMTP_TIMEOUT", "30"))
+
+# Errors after which the session is dropped and the message retried once on a fresh one
+_RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, socket.timeout)
+
+
+class RateLimiter:
     """
-    Returns a human-readable textual summary of the booking in German.
+    Token bucket: allows rate messages per second on average, bursts of up to burst messages.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+
+
+class _SmtpSession:
+    """
+    One authenticated SMTP connection plus its bookkeeping.
+    """
+
+    def __init__(self, server: smtplib.SMTP):
+        self.server = server
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+class SmtpPool:
+    """
+    Keeps up to max_size authenticated SMTP connections open and reuses them across sends,
+    so a burst of mails pays for connect, TLS and login once instead of per message.
+    """
+
+    def __init__(self, host: str = SMTP_HOST, port: int = SMTP_PORT, security: str = SMTP_SECURITY,
+                 user: Optional[str] = None, password: Optional[str] = None,
+                 max_size: int = SMTP_POOL_SIZE, rate_limit: float = SMTP_RATE_LIMIT,
+                 max_messages_per_connection: int = SMTP_MAX_MESSAGES_PER_CONNECTION,
+                 timeout: float = SMTP_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.security = security
+        self.user = user if user is not None else os.environ.get("SMTP_USER", os.environ.get("GMAIL_USER"))
+        self.password = password if password is not None else os.environ.get("SMTP_PASS", os.environ.get("GMAIL_PASS"))
+        self.max_size = max_size
+        self.max_messages_per_connection = max_messages_per_connection
+        self.timeout = timeout
+        self.rate_limiter = RateLimiter(rate_limit, burst=max_size)
+        self._idle: List[_SmtpSession] = []
+        self._open = 0
+        self._lock = threading.Condition()
+        self.stats = {'connects': 0, 'reconnects': 0, 'sent': 0, 'failed': 0}
+
+    def _connect(self) -> _SmtpSession:
+        if self.security == "ssl":
+            server = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            server.ehlo()
+            if self.security == "starttls":
+                server.starttls()
+                server.ehlo()
+            if self.user and self.password:
+                server.login(self.user, self.password)
+        except Exception:
+            self._close_server(server)
+            raise
+        self.stats['connects'] += 1
+        logger.debug(f"Opened SMTP connection to {self.host}:{self.port}")
+        return _SmtpSession(server)
+
+    @staticmethod
+    def _close_server(server: smtplib.SMTP) -> None:
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _acquire(self) -> _SmtpSession:
+        with self._lock:
+            while not self._idle and self._open >= self.max_size:
+                self._lock.wait()
+            if self._idle:
+                session = self._idle.pop()
+            else:
+                session = None
+                self._open += 1
+        if session is None:
+            try:
+                return self._connect()
+            except Exception:
+                self._discard(None)
+                raise
+        if time.monotonic() - session.last_used > SMTP_IDLE_CHECK_AFTER:
+            # Servers drop idle connections, check before trusting it with a message
+            try:
+                if session.server.noop()[0] != 250:
+                    raise smtplib.SMTPServerDisconnected("NOOP failed")
+            except Exception:
+                self._close_server(session.server)
+                self.stats['reconnects'] += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._discard(None)
+                    raise
+        return session
+
+    def _release(self, session: _SmtpSession) -> None:
+        session.last_used = time.monotonic()
+        if session.sent >= self.max_messages_per_connection:
+            self._discard(session)
+            return
+        with self._lock:
+            self._idle.append(session)
+            self._lock.notify()
+
+    def _discard(self, session: Optional[_SmtpSession]) -> None:
+        if session is not None:
+            self._close_server(session.server)
+        with self._lock:
+            self._open -= 1
+            self._lock.notify()
+
+    def _send_on(self, session: _SmtpSession, msg: MIMEMultipart) -> None:
+        """
+        Sends msg on session, reconnecting once if the server dropped the connection.
+        The new connection replaces the dropped one in session itself, so the caller keeps
+        a live session even if the retried send is refused.
+        """
+        self.rate_limiter.acquire()
+        from_addr = msg['From'] or self.user
+        try:
+            session.server.sendmail(from_addr, msg['To'], msg.as_string())
+        except _RECONNECT_ERRORS as e:
+            logger.info(f"SMTP connection lost ({e}), reconnecting")
+            self._close_server(session.server)
+            self.stats['reconnects'] += 1
+            reconnected = self._connect()
+            session.server = reconnected.server
+            session.sent = 0
+            session.server.sendmail(from_addr, msg['To'], msg.as_string())
+        session.sent += 1
+        self.stats['sent'] += 1
+
+    def send(self, msg: MIMEMultipart) -> None:
+        """
+        Sends a single message. Raises on failure.
+        """
+        error = self.send_many([msg])[0]
+        if error is not None:
+            raise error
+
+    def send_many(self, messages: List[MIMEMultipart]) -> List[Optional[Exception]]:
+        """
+        Sends the messages over one pooled session. Returns one entry per message:
+        None if it was sent, otherwise the exception. A rejected recipient doesn't stop the batch.
+        """
+        results: List[Optional[Exception]] = []
+        try:
+            session = self._acquire()
+        except Exception as e:
+            logger.warning(f"Could not open SMTP connection to {self.host}:{self.port}: {e}")
+            self.stats['failed'] += len(messages)
+            return [e] * len(messages)
+        try:
+            for msg in messages:
+                try:
+                    self._send_on(session, msg)
+                    results.append(None)
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError, smtplib.SMTPSenderRefused) as e:
+                    # The session is still fine, only this message was refused
+                    self.stats['failed'] += 1
+                    results.append(e)
+                except UnicodeEncodeError as e:
+                    # Non-ASCII address the server can't take, abort the half-started transaction
+                    session.server.rset()
+                    self.stats['failed'] += 1
+                    results.append(e)
+        except Exception as e:
+            missing = len(messages) - len(results)
+            logger.warning(f"SMTP session failed, {missing} message(s) not sent: {e}")
+            self._discard(session)
+            session = None
+            self.stats['failed'] += missing
+            results.extend([e] * missing)
+        finally:
+            if session is not None:
+                self._release(session)
+        return results
+
+    def close(self) -> None:
+        """
+        Closes all idle connections.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._lock.notify_all()
+        for session in idle:
+            self._close_server(session.server)
+
+
+_smtp_pool: Optional[SmtpPool] = None
+_smtp_pool_lock = threading.Lock()
+
+
+def get_smtp_pool() -> SmtpPool:
+    """
+    Returns the process-wide SMTP pool, configured from the SMTP_* environment variables.
+    """
+    global _smtp_pool
+    with _smtp_pool_lock:
+        if _smtp_pool is None:
+            _smtp_pool = SmtpPool()
+        return _smtp_pool
+
+
+def send_message(msg: MIMEMultipart) -> None:
+    """
+    Sends a prepared message over a pooled SMTP connection. Raises on failure so callers can retry.
+    """
+    get_smtp_pool().send(msg)
+
+
+def send_messages(messages: List[MIMEMultipart]) -> List[Optional[Exception]]:
+    """
+    Sends several messages over one pooled SMTP connection, see SmtpPool.send_many().
+    """
+    return get_smtp_pool().send_many(messages)
+
+
+MAIL_TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), '../../data/mail_templates')
+_SLOT_PATTERN = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+ARTIST_NO_PAYMENT_HTML = '<p>Für dich als Künstler*in fallen keine Kosten an.</p>'
+
+
+class MailTemplate:
+    """
+    HTML template compiled once into its literal chunks and the {{slot}} names between them.
+    Rendering only joins the chunks with the per-mail values.
+    """
+
+    def __init__(self, text: str):
+        parts = _SLOT_PATTERN.split(text)
+        self.chunks: List[str] = parts[0::2]
+        self.slots: List[str] = parts[1::2]
+
+    @classmethod
+    def load(cls, name: str) -> 'MailTemplate':
+        with open(os.path.join(MAIL_TEMPLATE_DIR, name), 'r', encoding='utf-8') as f:
+            return cls(f.read())
+
+    def render(self, values: Dict[str, str]) -> str:
+        out = [self.chunks[0]]
+        for slot, chunk in zip(self.slots, self.chunks[1:]):
+            out.append(values[slot])
+            out.append(chunk)
+        return ''.join(out)
+
+
+_templates: Dict[str, MailTemplate] = {}
+
+
+def get_mail_template(name: str) -> MailTemplate:
+    """
+    Returns the compiled template from data/mail_templates, loading it on first use.
     """
-    # Retrieve ticket option
-    ticket_option = next((
-        to for to in form_content["ticket_options"]
-        if to["id"] == booking.ticket_id
-    ), None)
+    template = _templates.get(name)
+    if template is None:
+        template = _templates[name] = MailTemplate.load(name)
+    return template
+
+
+@dataclass
+class FormContentIndex:
+    """
+    Form content options keyed by id, so rendering a mail does dict lookups instead of list scans.
+    """
+    ticket_options: Dict[int, Dict]
+    beverage_options: Dict[int, Dict]
+    food_options: Dict[int, Dict]
+    materials: Dict[int, Dict]
+    artist_materials: Dict[int, Dict]
+    professions: Dict[int, Dict]
+    timeslots: Dict[int, Tuple[Dict, Dict]]  # timeslot id -> (work shift, timeslot)
+
+    @classmethod
+    def from_form_content(cls, form_content: Dict) -> 'FormContentIndex':
+        def by_id(items) -> Dict[int, Dict]:
+            # First one wins, like the list scans did
+            index = {}
+            for item in items:
+                index.setdefault(item['id'], item)
+            return index
+
+        timeslots = {}
+        for ws in form_content.get('work_shifts', []):
+            for ts in ws['time_slots']:
+                timeslots.setdefault(ts['id'], (ws, ts))
+
+        return cls(
+            ticket_options=by_id(form_content['ticket_options']),
+            beverage_options=by_id(form_content['beverage_options']),
+            food_options=by_id(form_content['food_options']),
+            materials=by_id(form_content.get('materials', [])),
+            artist_materials=by_id(form_content.get('artist_materials', [])),
+            professions=by_id(form_content.get('professions', [])),
+            timeslots=timeslots
+        )
+
+
+# One index per form content kind (bookings, artists), rebuilt when its file version changes
+_form_content_indexes: Dict[type, Tuple[str, FormContentIndex]] = {}
+
+
+def form_content_index(snapshot: FormContentSnapshot) -> FormContentIndex:
+    """
+    Returns the FormContentIndex of a form content snapshot, built once per snapshot version.
+    """
+    kind = type(snapshot.content)
+    cached = _form_content_indexes.get(kind)
+    if cached is None or cached[0] != snapshot.version:
+        cached = _form_content_indexes[kind] = (snapshot.version,
+                                                FormContentIndex.from_form_content(asdict(snapshot.content)))
+    return cached[1]
+
+
+def _as_index(form_content: Union[Dict, FormContentIndex]) -> FormContentIndex:
+    if isinstance(form_content, FormContentIndex):
+        return form_content
+    return FormContentIndex.from_form_content(form_content)
+
+
+def _option_infos(booking, index: FormContentIndex) -> Tuple[str, str, str]:
+    ticket_option = index.ticket_options.get(booking.ticket_id)
     ticket_info = f"Ticket: {ticket_option['title']} - Preis: {ticket_option['price']}€" if ticket_option else "Ticket: Nicht gefunden"
 
-    # Retrieve beverage option
-    beverage_option = next((
-        bo for bo in form_content['beverage_options']
-        if bo['id'] == booking.beverage_id
-    ), None)
+    beverage_option = index.beverage_options.get(booking.beverage_id)
     beverage_info = f"Getränkeoption: {beverage_option['title']} - Preis: {beverage_option['price']}€" if beverage_option else "Getränkeoption: Nicht gefunden"
 
-    # Retrieve food option
-    food_option = next((
-        fo for fo in form_content['food_options']
-        if fo['id'] == booking.food_id
-    ), None)
+    food_option = index.food_options.get(booking.food_id)
     food_info = f"Essensoption: {food_option['title']} - Preis: {food_option['price']}€" if food_option else "Essensoption: Nicht gefunden"
 
+    return ticket_info, beverage_info, food_info
+
+
+def _title_values(booking, index: FormContentIndex) -> Dict[str, str]:
+    """
+    Slot values shared by all confirmation templates (name and option titles for the transfer subject).
+    """
+    ticket_option = index.ticket_options.get(booking.ticket_id)
+    beverage_option = index.beverage_options.get(booking.beverage_id)
+    food_option = index.food_options.get(booking.food_id)
+    return {
+        'first_name': str(booking.first_name),
+        'last_name': str(booking.last_name),
+        'paypal_link': PAYPAL_LINK,
+        'ticket_title': ticket_option['title'] if ticket_option else "Ticket nicht gefunden",
+        'beverage_title': beverage_option['title'] if beverage_option else "Getränkeoption nicht gefunden",
+        'food_title': food_option['title'] if food_option else "Essensoption nicht gefunden",
+    }
+
+
+def get_booking_details(booking: Booking, form_content: Union[Dict, FormContentIndex]) -> str:
+    """
+    Returns a human-readable textual summary of the booking in German.
+    """
+    index = _as_index(form_content)
+    ticket_info, beverage_info, food_info = _option_infos(booking, index)
+
     # Format timeslot info
     def format_timeslot_info(timeslot_id):
-        for ws in form_content['work_shifts']:
-            for ts in ws['time_slots']:
-                if ts['id'] == timeslot_id:
-                    return f"{ws['title']}, Zeitfenster: {ts['title']}, Von: {ts['start_time']}, Bis: {ts['end_time']}"
+        found = index.timeslots.get(timeslot_id)
+        if found:
+            ws, ts = found
+            return f"{ws['title']}, Zeitfenster: {ts['title']}, Von: {ts['start_time']}, Bis: {ts['end_time']}"
         return "Zeitfenster: Nicht gefunden"
 
     timeslot_info = "Du hast folgende Prioritäten für deine Supporterschicht gewählt:\n"
@@ -55,11 +437,12 @@ def get_booking_details(booking: Booking, form_content: Dict) -> str:
 
     timeslot_info += f"Du hast dich bereit erklärt, maximal {booking.amount_shifts} Schicht(en) zu übernehmen.\n"
 
-    # Materials
+    # Materials, listed in form content order
     if booking.material_ids:
+        selected = set(booking.material_ids)
         materials_info = "Du bringst mit:\n"
-        for material in form_content['materials']:
-            if material['id'] in booking.material_ids:
+        for material_id, material in index.materials.items():
+            if material_id in selected:
                 materials_info += f"- {material['title']}\n"
     else:
         materials_info = "Du bringst keine Materialien mit.\n"
@@ -75,423 +458,85 @@ def get_booking_details(booking: Booking, form_content: Dict) -> str:
     return details
 
 
-def send_confirmation_mail(booking: Booking, form_content: Dict) -> None:
+def send_confirmation_mail(booking: Booking, form_content: Union[Dict, FormContentIndex]) -> None:
     """
     Sends a confirmation email to the user based on the booking details.
     """
-    gmail_user = os.environ.get("GMAIL_USER")
-    gmail_password = os.environ.get("GMAIL_PASS")
-
-    booking_details_html = get_booking_details(booking, form_content).replace('\n', '<br>')
-
-    # Ticket, beverage, and food title (for PayPal subject)
-    ticket_option = next((to for to in form_content["ticket_options"] if to["id"] == booking.ticket_id), None)
-    beverage_option = next((bo for bo in form_content['beverage_options'] if bo['id'] == booking.beverage_id), None)
-    food_option = next((fo for fo in form_content['food_options'] if fo['id'] == booking.food_id), None)
-
-    ticket_title = ticket_option['title'] if ticket_option else "Ticket nicht gefunden"
-    beverage_title = beverage_option['title'] if beverage_option else "Getränkeoption nicht gefunden"
-    food_title = food_option['title'] if food_option else "Essensoption nicht gefunden"
-
-    subject = "Weiher Wald & Weltall-Wahn - Deine Mission ist bestätigt!"
-
-    html = f"""
-    <html>
-    <head>
-    <style>
-      @import url('https://fonts.googleapis.com/css2?family=Orbitron:wght@400;700&display=swap');
-
-      body {{
-        font-family: 'Helvetica', sans-serif;
-        margin: 0;
-        padding: 0;
-        color: #C0C0C0;
-        background-color: #0d0d0d;
-        background-image: 
-          radial-gradient(white, rgba(255,255,255,.2) 2px, transparent 40px),
-          radial-gradient(white, rgba(255,255,255,.15) 1px, transparent 30px),
-          radial-gradient(white, rgba(255,255,255,.1) 2px, transparent 40px);
-        background-size: 550px 550px, 350px 350px, 250px 250px;
-        background-position: 0 0, 40px 60px, 130px 270px;
-      }}
-
-      h1, h2, h3 {{
-        font-family: 'Orbitron', sans-serif;
-        color: white;
-      }}
-
-      .container {{
-        max-width: 600px;
-        margin: 20px auto;
-        border: 1px solid #333;
-      }}
-
-      .header {{
-        background-color: #1a1a1a;
-        background-image: linear-gradient(145deg, #222222, #1a1a1a);
-        color: #ffffff;
-        padding: 20px;
-        text-align: center;
-        border-bottom: 2px solid #C0C0C0;
-        position: relative;
-        overflow: hidden;
-      }}
-
-      .header::before {{
-        content: "";
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        bottom: 0;
-        background-image: 
-          radial-gradient(circle, rgba(255,255,255,0.2) 1px, transparent 1px);
-        background-size: 15px 15px;
-        z-index: 0;
-      }}
-
-      .header h1 {{
-        position: relative;
-        margin: 0;
-        text-shadow: 0 0 10px rgba(192, 192, 192, 0.8);
-        letter-spacing: 2px;
-      }}
-
-      .content {{
-        margin-top: 0;
-        background-color: rgba(26, 26, 26, 0.9);
-        padding: 20px;
-        border-radius: 5px;
-        box-shadow: 0 4px 8px rgba(0,0,0,0.5);
-      }}
-
-      .details {{
-        background-color: rgba(0, 0, 0, 0.3);
-        border: 1px solid #333;
-        padding: 15px;
-        border-radius: 5px;
-        margin: 15px 0;
-      }}
-
-      .btn {{
-        display: inline-block;
-        background: linear-gradient(145deg, #222222, #1a1a1a);
-        color: #C0C0C0;
-        padding: 10px 20px;
-        text-decoration: none;
-        border-radius: 3px;
-        border: 1px solid #C0C0C0;
-        margin: 15px 0;
-        text-align: center;
-        box-shadow: 0 0 6px #C0C0C0;
-        transition: all 0.3s ease;
-      }}
-
-      .btn:hover {{
-        box-shadow: 0 0 12px #FFFFFF;
-        color: #FFFFFF;
-      }}
-
-      .footer {{
-        margin-top: 20px;
-        text-align: center;
-        font-size: 0.9em;
-        color: #777;
-      }}
-
-      .mission-data {{
-        padding: 10px;
-        background-color: rgba(50, 50, 50, 0.3);
-        border-radius: 5px;
-      }}
-
-    </style>
-    </head>
-    <body>
-      <div class="container">
-        <div class="header">
-          <h1>WEIHER WALD & WELTALL-WAHN</h1>
-          <p>DO, 28.08.2025 - SO, 31.08.2025</p>
-        </div>
-
-        <div class="content">
-          <h2>Mission bestätigt, Astronaut {booking.first_name}!</h2>
-
-          <p>Willkommen an Bord! Die Flugleitung hat deine Teilnahme an der interstellaren Mission "Weiher Wald & Weltall-Wahn" registriert.</p>
-
-          <div class="details mission-data">
-            <h3>Missionsdaten:</h3>
-            {booking_details_html}
-          </div>
-
-          <p>Für den Start deiner Mission ist noch ein Treibstofftransfer erforderlich:</p>
-
-          <a href="{PAYPAL_LINK}" class="btn">TREIBSTOFFTRANSFER STARTEN</a>
-
-          <p>Betreff für den Transfer:<br>
-          <strong>WW26 - {booking.first_name}, {booking.last_name} - {ticket_title} - {beverage_title} - {food_title}</strong></p>
-
-          <p>Weitere Missionsdaten werden über den Kommunikationskanal "WhatsApp" übermittelt.</p>
-
-          <p>Countdown läuft! Wir sehen uns im Orbit über Poppenwind!</p>
-
-          <p>&#128640; Dein Weltall-Wahn Missionskontrollteam &#x1F680;</p>
-        </div>
-
-        <div class="footer">
-          Dies ist eine automatisch generierte Nachricht. Bei Fragen kontaktiere die Missionszentrale.
-        </div>
-      </div>
-    </body>
-    </html>
-    """
-
-    msg = MIMEMultipart('alternative')
-    msg['From'] = gmail_user
-    msg['To'] = booking.email
-    msg['Subject'] = subject
-
-    msg.attach(MIMEText(html, 'html'))
-
     try:
-        server = smtplib.SMTP_SSL('smtp.gmail.com', 465)
-        server.ehlo()
-        server.login(gmail_user, gmail_password)
-        server.sendmail(gmail_user, booking.email, msg.as_string())
-        server.close()
+        send_message(build_confirmation_mail(booking, form_content))
         print("Email erfolgreich gesendet!")
     except Exception as e:
         print(f"Fehler beim Senden der E-Mail: {e}")
 
 
-def send_artist_confirmation_mail(booking: ArtistBooking, form_content: Dict) -> None:
+def render_confirmation_html(booking: Booking, form_content: Union[Dict, FormContentIndex]) -> str:
     """
-    Sends a confirmation email to the artist based on the booking details.
-    """
-    gmail_user = os.environ.get("GMAIL_USER")
-    gmail_password = os.environ.get("GMAIL_PASS")
-
-    # Get booking details in HTML format
-    booking_details_html = get_artist_booking_details(booking, form_content).replace('\n', '<br>')
-
-    # Get ticket, beverage, and food titles for PayPal subject
-    ticket_option = next((to for to in form_content["ticket_options"] if to["id"] == booking.ticket_id), None)
-    beverage_option = next((bo for bo in form_content['beverage_options'] if bo['id'] == booking.beverage_id), None)
-    food_option = next((fo for fo in form_content['food_options'] if fo['id'] == booking.food_id), None)
-
-    ticket_title = ticket_option['title'] if ticket_option else "Ticket nicht gefunden"
-    beverage_title = beverage_option['title'] if beverage_option else "Getränkeoption nicht gefunden"
-    food_title = food_option['title'] if food_option else "Essensoption nicht gefunden"
-
-    subject = "Weiher Wald & Weltall-Wahn - Schön, dass du zu uns kommst!"
-
-    html = f"""
-    <html>
-    <head>
-    <style>
-      @import url('https://fonts.googleapis.com/css2?family=Orbitron:wght@400;700&display=swap');
-
-      body {{
-        font-family: 'Helvetica', sans-serif;
-        margin: 0;
-        padding: 0;
-        color: #C0C0C0;
-        background-color: #0d0d0d;
-        background-image: 
-          radial-gradient(white, rgba(255,255,255,.2) 2px, transparent 40px),
-          radial-gradient(white, rgba(255,255,255,.15) 1px, transparent 30px),
-          radial-gradient(white, rgba(255,255,255,.1) 2px, transparent 40px);
-        background-size: 550px 550px, 350px 350px, 250px 250px;
-        background-position: 0 0, 40px 60px, 130px 270px;
-      }}
-
-      h1, h2, h3 {{
-        font-family: 'Orbitron', sans-serif;
-        color: white;
-      }}
-
-      .container {{
-        max-width: 600px;
-        margin: 20px auto;
-        border: 1px solid #333;
-      }}
-
-      .header {{
-        background-color: #1a1a1a;
-        background-image: linear-gradient(145deg, #222222, #1a1a1a);
-        color: #ffffff;
-        padding: 20px;
-        text-align: center;
-        border-bottom: 2px solid #C0C0C0;
-        position: relative;
-        overflow: hidden;
-      }}
-
-      .header::before {{
-        content: "";
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        bottom: 0;
-        background-image: 
-          radial-gradient(circle, rgba(255,255,255,0.2) 1px, transparent 1px);
-        background-size: 15px 15px;
-        z-index: 0;
-      }}
-
-      .header h1 {{
-        position: relative;
-        margin: 0;
-        text-shadow: 0 0 10px rgba(192, 192, 192, 0.8);
-        letter-spacing: 2px;
-      }}
-
-      .content {{
-        margin-top: 0;
-        background-color: rgba(26, 26, 26, 0.9);
-        padding: 20px;
-        border-radius: 5px;
-        box-shadow: 0 4px 8px rgba(0,0,0,0.5);
-      }}
-
-      .details {{
-        background-color: rgba(0, 0, 0, 0.3);
-        border: 1px solid #333;
-        padding: 15px;
-        border-radius: 5px;
-        margin: 15px 0;
-      }}
-
-      .artist-badge {{
-        display: inline-block;
-        background-color: #1976d2;
-        color: white;
-        padding: 5px 10px;
-        border-radius: 4px;
-        font-weight: bold;
-        margin-bottom: 10px;
-      }}
-
-      .btn {{
-        display: inline-block;
-        background: linear-gradient(145deg, #222222, #1a1a1a);
-        color: #C0C0C0;
-        padding: 10px 20px;
-        text-decoration: none;
-        border-radius: 3px;
-        border: 1px solid #C0C0C0;
-        margin: 15px 0;
-        text-align: center;
-        box-shadow: 0 0 6px #C0C0C0;
-        transition: all 0.3s ease;
-      }}
-
-      .btn:hover {{
-        box-shadow: 0 0 12px #FFFFFF;
-        color: #FFFFFF;
-      }}
-
-      .footer {{
-        margin-top: 20px;
-        text-align: center;
-        font-size: 0.9em;
-        color: #777;
-      }}
-
-      .mission-data {{
-        padding: 10px;
-        background-color: rgba(50, 50, 50, 0.3);
-        border-radius: 5px;
-      }}
-
-    </style>
-    </head>
-    <body>
-      <div class="container">
-        <div class="header">
-          <h1>WEIHER WALD & WELTALL-WAHN</h1>
-          <p>DO, 28.08.2025 - SO, 31.08.2025</p>
-        </div>
-
-        <div class="content">
-          <div class="artist-badge">KÜNSTLER</div>
-          <h2>Anmeldung bestätigt, {booking.first_name}!</h2>
-
-          <p>Willkommen! Wir freuen uns, dass du uns als Künstler*in beim Weiher Wald & Weltall-Wahn bereicherst!</p>
-
-          <div class="details mission-data">
-            <h3>Deine Buchungsdaten:</h3>
-            {booking_details_html}
-          </div>
-
-          {booking.total_price > 0 and f'''
-          <p>Für deine Buchung ist noch ein Beitrag erforderlich:</p>
-
-          <a href="{PAYPAL_LINK}" class="btn">BEITRAG JETZT ÜBERWEISEN</a>
-
-          <p>Betreff für die Überweisung:<br>
-          <strong>WWWW ARTIST - {booking.first_name}, {booking.last_name} - {ticket_title} - {beverage_title} - {food_title}</strong></p>
-          ''' or '<p>Für dich als Künstler*in fallen keine Kosten an.</p>'}
-
-          <p>Weitere Informationen zu deinem Auftritt besprechen wir rechtzeit vorm Festival. Dazu werden wir dich zu einer Whatsapp Gruppe hinzufügen.</p>
-
-          <p>Bei Fragen zu deinem Auftritt, Technik oder Ablauf kannst du uns jederzeit kontaktieren.</p>
-
-          <p>Wir freuen uns auf dich!</p>
-
-          <p>&#128640; Dein Weltall-Wahn Team &#x1F680;</p>
-        </div>
-
-        <div class="footer">
-          Dies ist eine automatisch generierte Nachricht. Bei Fragen kontaktiere uns.
-        </div>
-      </div>
-    </body>
-    </html>
+    Renders the HTML body of the confirmation email.
     """
+    index = _as_index(form_content)
+    values = _title_values(booking, index)
+    values['booking_details'] = get_booking_details(booking, index).replace('\n', '<br>')
+    return get_mail_template('confirmation.html').render(values)
+
 
+def build_confirmation_mail(booking: Booking, form_content: Union[Dict, FormContentIndex]) -> MIMEMultipart:
+    """
+    Builds the confirmation email for the user based on the booking details.
+    """
     msg = MIMEMultipart('alternative')
-    msg['From'] = gmail_user
+    msg['From'] = os.environ.get("GMAIL_USER")
     msg['To'] = booking.email
-    msg['Subject'] = subject
+    msg['Subject'] = "Weiher Wald & Weltall-Wahn - Deine Mission ist bestätigt!"
 
-    msg.attach(MIMEText(html, 'html'))
+    msg.attach(MIMEText(render_confirmation_html(booking, form_content), 'html'))
+    return msg
 
+
+def send_artist_confirmation_mail(booking: ArtistBooking, form_content: Union[Dict, FormContentIndex]) -> None:
+    """
+    Sends a confirmation email to the artist based on the booking details.
+    """
     try:
-        server = smtplib.SMTP_SSL('smtp.gmail.com', 465)
-        server.ehlo()
-        server.login(gmail_user, gmail_password)
-        server.sendmail(gmail_user, booking.email, msg.as_string())
-        server.close()
+        send_message(build_artist_confirmation_mail(booking, form_content))
         print("Artist email sent successfully!")
     except Exception as e:
         print(f"Error sending artist email: {e}")
 
-def get_artist_booking_details(booking: ArtistBooking, form_content: Dict) -> str:
+
+def render_artist_confirmation_html(booking: ArtistBooking, form_content: Union[Dict, FormContentIndex]) -> str:
     """
-    Returns a human-readable textual summary of the artist booking in German.
+    Renders the HTML body of the artist confirmation email.
     """
-    # Retrieve ticket option
-    ticket_option = next((
-        to for to in form_content["ticket_options"]
-        if to["id"] == booking.ticket_id
-    ), None)
-    ticket_info = f"Ticket: {ticket_option['title']} - Preis: {ticket_option['price']}€" if ticket_option else "Ticket: Nicht gefunden"
+    index = _as_index(form_content)
+    values = _title_values(booking, index)
+    values['booking_details'] = get_artist_booking_details(booking, index).replace('\n', '<br>')
+    if booking.total_price > 0:
+        values['payment_section'] = get_mail_template('artist_payment.html').render(values)
+    else:
+        values['payment_section'] = ARTIST_NO_PAYMENT_HTML
+    return get_mail_template('artist_confirmation.html').render(values)
 
-    # Retrieve beverage option
-    beverage_option = next((
-        bo for bo in form_content['beverage_options']
-        if bo['id'] == booking.beverage_id
-    ), None)
-    beverage_info = f"Getränkeoption: {beverage_option['title']} - Preis: {beverage_option['price']}€" if beverage_option else "Getränkeoption: Nicht gefunden"
 
-    # Retrieve food option
-    food_option = next((
-        fo for fo in form_content['food_options']
-        if fo['id'] == booking.food_id
-    ), None)
-    food_info = f"Essensoption: {food_option['title']} - Preis: {food_option['price']}€" if food_option else "Essensoption: Nicht gefunden"
+def build_artist_confirmation_mail(booking: ArtistBooking,
+                                   form_content: Union[Dict, FormContentIndex]) -> MIMEMultipart:
+    """
+    Builds the confirmation email for the artist based on the booking details.
+    """
+    msg = MIMEMultipart('alternative')
+    msg['From'] = os.environ.get("GMAIL_USER")
+    msg['To'] = booking.email
+    msg['Subject'] = "Weiher Wald & Weltall-Wahn - Schön, dass du zu uns kommst!"
+
+    msg.attach(MIMEText(render_artist_confirmation_html(booking, form_content), 'html'))
+    return msg
+
+
+def get_artist_booking_details(booking: ArtistBooking, form_content: Union[Dict, FormContentIndex]) -> str:
+    """
+    Returns a human-readable textual summary of the artist booking in German.
+    """
+    index = _as_index(form_content)
+    ticket_info, beverage_info, food_info = _option_infos(booking, index)
 
     # Format performance details
     performance_info = "Auftrittsinformationen:\n"
@@ -515,7 +560,7 @@ def get_artist_booking_details(booking: ArtistBooking, form_content: Dict) -> st
     if booking.artist_material_ids:
         materials_info = "Du bringst mit:\n"
         for material_id in booking.artist_material_ids:
-            material = next((m for m in form_content['artist_materials'] if m['id'] == material_id), None)
+            material = index.artist_materials.get(material_id)
             if material:
                 materials_info += f"- {material['title']}\n"
     else:
@@ -534,4 +579,4 @@ def get_artist_booking_details(booking: ArtistBooking, form_content: Dict) -> st
         f"{materials_info}\n"
         f"Gesamtpreis: {booking.total_price}€"
     )
-    return details
\ No newline at end of file
+    return details
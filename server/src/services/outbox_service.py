@@ -0,0 +1,237 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from dataclasses import asdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.models.datatypes import Booking, ArtistBooking
+from src.services.formcontent_service import get_form_content_snapshot, get_artist_form_content_snapshot
+from src.services.mail_service import build_confirmation_mail, build_artist_confirmation_mail, send_messages, \
+    form_content_index
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+CONFIRMATION = 'confirmation'
+ARTIST_CONFIRMATION = 'artist_confirmation'
+
+OUTBOX_BATCH_SIZE = int(os.environ.get('MAIL_OUTBOX_BATCH_SIZE', '20'))
+OUTBOX_POLL_INTERVAL = float(os.environ.get('MAIL_OUTBOX_POLL_INTERVAL', '30'))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get('MAIL_OUTBOX_MAX_ATTEMPTS', '8'))
+OUTBOX_BACKOFF_BASE = float(os.environ.get('MAIL_OUTBOX_BACKOFF_BASE', '30'))
+OUTBOX_BACKOFF_MAX = float(os.environ.get('MAIL_OUTBOX_BACKOFF_MAX', '3600'))
+# A claimed mail that is neither sent nor failed after this long belongs to a crashed worker
+OUTBOX_STALE_AFTER = float(os.environ.get('MAIL_OUTBOX_STALE_AFTER', '600'))
+
+
+def _build_mail(kind: str, payload: Dict):
+    """
+    Rebuilds the message of an outbox entry. Form content is read at send time,
+    mails only need the option titles, not the booking counts.
+    """
+    if kind == CONFIRMATION:
+        return build_confirmation_mail(Booking(**payload, signature=""),
+                                       form_content_index(get_form_content_snapshot()))
+    if kind == ARTIST_CONFIRMATION:
+        return build_artist_confirmation_mail(ArtistBooking(**payload, signature=""),
+                                              form_content_index(get_artist_form_content_snapshot()))
+    raise ValueError(f"Unknown mail kind: {kind}")
+
+
+def enqueue_mail(cursor: sqlite3.Cursor, kind: str, booking) -> int:
+    """
+    Queues a confirmation mail for the booking on the caller's transaction and returns the outbox id.
+    The signature is left out of the payload, the mail doesn't show it.
+    """
+    payload = asdict(booking)
+    payload.pop('signature', None)
+    cursor.execute("""
+                   INSERT INTO MailOutbox (kind, recipient, payload, next_attempt_at)
+                   VALUES (?, ?, ?, ?)
+                   """, (kind, booking.email, json.dumps(payload), time.time()))
+    return cursor.lastrowid
+
+
+def backoff_delay(attempts: int) -> float:
+    """
+    Seconds to wait before the next attempt: exponential in the attempts made so far, capped.
+    """
+    return min(OUTBOX_BACKOFF_BASE * (2 ** (attempts - 1)), OUTBOX_BACKOFF_MAX)
+
+
+def claim_batch(conn: sqlite3.Connection, limit: int = OUTBOX_BATCH_SIZE) -> List[Tuple[int, str, str, int]]:
+    """
+    Atomically marks up to limit due mails as 'sending' and returns them as (id, kind, payload, attempts).
+    Mails left in 'sending' by a crashed worker are reclaimed once they are stale.
+    """
+    now = time.time()
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute("""
+                       SELECT id, kind, payload, attempts
+                       FROM MailOutbox
+                       WHERE (status = 'pending' AND next_attempt_at <= ?)
+                          OR (status = 'sending' AND claimed_at <= ?)
+                       ORDER BY next_attempt_at
+                       LIMIT ?
+                       """, (now, now - OUTBOX_STALE_AFTER, limit))
+        rows = cursor.fetchall()
+        cursor.executemany("""
+                           UPDATE MailOutbox
+                           SET status     = 'sending',
+                               claimed_at = ?,
+                               attempts   = attempts + 1
+                           WHERE id = ?
+                           """, [(now, row[0]) for row in rows])
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    return [(outbox_id, kind, payload, attempts + 1) for outbox_id, kind, payload, attempts in rows]
+
+
+def mark_sent(conn: sqlite3.Connection, outbox_id: int) -> None:
+    conn.execute("""
+                 UPDATE MailOutbox
+                 SET status     = 'sent',
+                     sent_at    = CURRENT_TIMESTAMP,
+                     last_error = NULL
+                 WHERE id = ?
+                 """, (outbox_id,))
+    conn.commit()
+
+
+def mark_failed(conn: sqlite3.Connection, outbox_id: int, attempts: int, error: str) -> bool:
+    """
+    Schedules a retry with backoff, or gives up after OUTBOX_MAX_ATTEMPTS.
+    Returns True if the mail will be retried.
+    """
+    retry = attempts < OUTBOX_MAX_ATTEMPTS
+    conn.execute("""
+                 UPDATE MailOutbox
+                 SET status          = ?,
+                     next_attempt_at = ?,
+                     last_error      = ?
+                 WHERE id = ?
+                 """, ('pending' if retry else 'failed', time.time() + backoff_delay(attempts), error[:1000], outbox_id))
+    conn.commit()
+    return retry
+
+
+def process_outbox(db_connect_func: Callable[[], sqlite3.Connection],
+                   limit: int = OUTBOX_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Sends one batch of due mails. Returns how many were sent, scheduled for retry and given up.
+    """
+    stats = {'sent': 0, 'retried': 0, 'failed': 0}
+    with closing(db_connect_func()) as conn:
+        batch = claim_batch(conn, limit)
+        if not batch:
+            return stats
+
+        # Build first, then send the whole batch over one SMTP session
+        outcomes = {}
+        messages = []
+        for outbox_id, kind, payload, attempts in batch:
+            try:
+                messages.append((outbox_id, _build_mail(kind, json.loads(payload))))
+            except Exception as e:
+                outcomes[outbox_id] = e
+        errors = send_messages([msg for _, msg in messages])
+        outcomes.update((outbox_id, error) for (outbox_id, _), error in zip(messages, errors))
+
+        for outbox_id, kind, payload, attempts in batch:
+            error = outcomes[outbox_id]
+            if error is None:
+                mark_sent(conn, outbox_id)
+                stats['sent'] += 1
+                logger.info(f"Mail {outbox_id} ({kind}) sent")
+            elif mark_failed(conn, outbox_id, attempts, str(error)):
+                stats['retried'] += 1
+                logger.warning(f"Sending mail {outbox_id} failed (attempt {attempts}), retrying in "
+                               f"{backoff_delay(attempts):.0f}s: {error}")
+            else:
+                stats['failed'] += 1
+                logger.error(f"Giving up on mail {outbox_id} after {attempts} attempts: {error}")
+    return stats
+
+
+def get_outbox_stats(conn: sqlite3.Connection) -> Dict[str, int]:
+    """
+    Returns the number of outbox entries per status.
+    """
+    rows = conn.execute("SELECT status, COUNT(*) FROM MailOutbox GROUP BY status").fetchall()
+    stats = {'pending': 0, 'sending': 0, 'sent': 0, 'failed': 0}
+    stats.update(dict(rows))
+    return stats
+
+
+class OutboxWorker:
+    """
+    Background thread draining the outbox. Wakes up every poll interval,
+    or right away when notify() is called after a mail was queued.
+    """
+
+    def __init__(self, db_connect_func: Callable[[], sqlite3.Connection],
+                 poll_interval: float = OUTBOX_POLL_INTERVAL,
+                 batch_size: int = OUTBOX_BATCH_SIZE):
+        self._db_connect_func = db_connect_func
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="mail-outbox", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+        self._thread.join(timeout)
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        logger.info(f"Mail outbox worker started (poll interval {self.poll_interval}s)")
+        while not self._stopped.is_set():
+            self._wakeup.clear()
+            try:
+                # A full batch means more may be waiting, keep going until the outbox is drained
+                while not self._stopped.is_set():
+                    stats = process_outbox(self._db_connect_func, self.batch_size)
+                    if sum(stats.values()) < self.batch_size:
+                        break
+            except Exception as e:
+                logger.error(f"Mail outbox worker error: {e}", exc_info=True)
+            self._wakeup.wait(self.poll_interval)
+        logger.info("Mail outbox worker stopped")
+
+
+_worker: Optional[OutboxWorker] = None
+_worker_lock = threading.Lock()
+
+
+def start_outbox_worker(db_connect_func: Callable[[], sqlite3.Connection]) -> OutboxWorker:
+    """
+    Starts the process-wide outbox worker thread (once).
+    """
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = OutboxWorker(db_connect_func)
+            _worker.start()
+        return _worker
+
+
+def notify_outbox() -> None:
+    """
+    Wakes the outbox worker of this process, if there is one, to send newly queued mails.
+    """
+    if _worker is not None:
+        _worker.notify()
@@ -1,8 +1,13 @@
 import sqlite3
+import time
 from contextlib import closing
-from typing import List, Dict
+from typing import List, Dict, Optional
 from src.models.datatypes import ShiftAssignment, ShiftAssignmentWithDetails
 from src.services.booking_service import _connect_db
+from src.services import assignment_engine
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 def get_all_shift_assignments() -> List[ShiftAssignmentWithDetails]:
@@ -214,6 +219,79 @@ def create_assignment(assignment: ShiftAssignment) -> int:
             return -1
 
 
+def create_assignment_checked(assignment: ShiftAssignment) -> Dict:
+    """
+    Creates a shift assignment if the booking has a shift left and the timeslot has room,
+    checked and inserted in one BEGIN IMMEDIATE transaction (a single conditional INSERT ... SELECT).
+    Returns {'assignment_id': id} on success, otherwise {'reason': ..., 'message': ...} with the
+    numbers that caused the rejection. Reasons: booking_not_found, timeslot_not_found,
+    already_assigned, booking_full, timeslot_full, database_error.
+    """
+    with closing(_connect_db()) as conn:
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("""
+                           INSERT INTO ShiftAssignments (booking_id, timeslot_id, is_confirmed, admin_notes)
+                           SELECT ?, ?, ?, ?
+                           WHERE (SELECT COUNT(*) FROM ShiftAssignments WHERE booking_id = ?)
+                                     < (SELECT COALESCE(amount_shifts, 0) FROM Bookings WHERE id = ?)
+                             AND (SELECT COUNT(*) FROM ShiftAssignments WHERE timeslot_id = ?)
+                                     < (SELECT COALESCE(num_needed, 0) FROM TimeSlots WHERE id = ?)
+                             AND NOT EXISTS (SELECT 1
+                                             FROM ShiftAssignments
+                                             WHERE booking_id = ?
+                                               AND timeslot_id = ?)
+                           """, (
+                               assignment.booking_id,
+                               assignment.timeslot_id,
+                               1 if assignment.is_confirmed else 0,
+                               assignment.admin_notes,
+                               assignment.booking_id,
+                               assignment.booking_id,
+                               assignment.timeslot_id,
+                               assignment.timeslot_id,
+                               assignment.booking_id,
+                               assignment.timeslot_id
+                           ))
+            if cursor.rowcount == 1:
+                conn.commit()
+                return {'assignment_id': cursor.lastrowid}
+
+            # Rejected, read the numbers in the same transaction to say why
+            cursor.execute("""
+                           SELECT (SELECT COALESCE(amount_shifts, 0) FROM Bookings WHERE id = ?),
+                                  (SELECT COUNT(*) FROM ShiftAssignments WHERE booking_id = ?),
+                                  (SELECT COALESCE(num_needed, 0) FROM TimeSlots WHERE id = ?),
+                                  (SELECT COUNT(*) FROM ShiftAssignments WHERE timeslot_id = ?),
+                                  EXISTS (SELECT 1
+                                          FROM ShiftAssignments
+                                          WHERE booking_id = ?
+                                            AND timeslot_id = ?)
+                           """, (assignment.booking_id, assignment.booking_id, assignment.timeslot_id,
+                                 assignment.timeslot_id, assignment.booking_id, assignment.timeslot_id))
+            max_shifts, current_shifts, capacity, current_assigned, exists = cursor.fetchone()
+            conn.rollback()
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Database error checking assignment of booking {assignment.booking_id} to timeslot "
+                         f"{assignment.timeslot_id}: {e}", exc_info=True)
+            return {'reason': 'database_error', 'message': 'Assignment creation failed'}
+
+    if max_shifts is None:
+        return {'reason': 'booking_not_found', 'message': 'Booking not found'}
+    if capacity is None:
+        return {'reason': 'timeslot_not_found', 'message': 'Timeslot not found'}
+    if exists:
+        return {'reason': 'already_assigned', 'message': 'Booking is already assigned to this timeslot'}
+    if current_shifts >= max_shifts:
+        return {'reason': 'booking_full', 'message': 'Booking already has maximum shifts assigned',
+                'current': current_shifts, 'max': max_shifts}
+    return {'reason': 'timeslot_full', 'message': 'Timeslot is already at capacity',
+            'current': current_assigned, 'capacity': capacity}
+
+
 def update_assignment(assignment_id: int, assignment: ShiftAssignment) -> bool:
     """
     Updates an existing shift assignment. Returns True on success.
@@ -258,6 +336,180 @@ def delete_assignment(assignment_id: int) -> bool:
             return False
 
 
+MAX_BATCH_OPERATIONS = 500
+
+
+def _placeholders(values) -> str:
+    return ','.join('?' * len(values))
+
+
+def apply_assignment_batch(operations: List[Dict]) -> Dict:
+    """
+    Applies a list of create / update / delete operations on shift assignments atomically.
+
+    - {'op': 'create', 'booking_id', 'timeslot_id', 'is_confirmed'?, 'admin_notes'?}
+    - {'op': 'update', 'id', 'timeslot_id'? (moves it), 'is_confirmed'?, 'admin_notes'?}
+    - {'op': 'delete', 'id'}
+
+    The counts of every booking and timeslot involved are loaded once at the start of a
+    BEGIN IMMEDIATE transaction and kept up to date in memory while the operations are checked
+    in order, so a delete frees capacity for a later create. If any operation is rejected,
+    nothing is written. Returns {'applied': bool, 'results': [...]} with one result per
+    operation: {'ok': True, 'id': ...} or {'ok': False, 'reason': ..., 'message': ...}.
+    """
+    assignment_ids = {op.get('id') for op in operations if op.get('op') in ('update', 'delete')}
+    booking_ids = {op.get('booking_id') for op in operations if op.get('op') == 'create'}
+    timeslot_ids = {op.get('timeslot_id') for op in operations if op.get('timeslot_id') is not None}
+
+    with closing(_connect_db()) as conn:
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+
+            cursor.execute(f"""
+                           SELECT id, booking_id, timeslot_id
+                           FROM ShiftAssignments
+                           WHERE id IN ({_placeholders(assignment_ids)})
+                           """, tuple(assignment_ids))
+            assignments = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+            booking_ids.update(booking_id for booking_id, _ in assignments.values())
+            timeslot_ids.update(ts_id for _, ts_id in assignments.values())
+
+            cursor.execute(f"""
+                           SELECT b.id, COALESCE(b.amount_shifts, 0), COUNT(sa.id)
+                           FROM Bookings b
+                                    LEFT JOIN ShiftAssignments sa ON sa.booking_id = b.id
+                           WHERE b.id IN ({_placeholders(booking_ids)})
+                           GROUP BY b.id
+                           """, tuple(booking_ids))
+            booking_max, booking_count = {}, {}
+            for booking_id, max_shifts, count in cursor.fetchall():
+                booking_max[booking_id] = max_shifts
+                booking_count[booking_id] = count
+
+            cursor.execute(f"""
+                           SELECT ts.id, COALESCE(ts.num_needed, 0), COUNT(sa.id)
+                           FROM TimeSlots ts
+                                    LEFT JOIN ShiftAssignments sa ON sa.timeslot_id = ts.id
+                           WHERE ts.id IN ({_placeholders(timeslot_ids)})
+                           GROUP BY ts.id
+                           """, tuple(timeslot_ids))
+            capacity, timeslot_count = {}, {}
+            for ts_id, num_needed, count in cursor.fetchall():
+                capacity[ts_id] = num_needed
+                timeslot_count[ts_id] = count
+
+            # Existing (booking, timeslot) pairs of the involved bookings, for the UNIQUE check
+            cursor.execute(f"""
+                           SELECT booking_id, timeslot_id
+                           FROM ShiftAssignments
+                           WHERE booking_id IN ({_placeholders(booking_ids)})
+                           """, tuple(booking_ids))
+            pairs = set(cursor.fetchall())
+
+            def reject(reason: str, message: str, **details) -> Dict:
+                return {'ok': False, 'reason': reason, 'message': message, **details}
+
+            def check_room(booking_id, ts_id, count_booking: bool) -> Optional[Dict]:
+                if ts_id not in capacity:
+                    return reject('timeslot_not_found', 'Timeslot not found')
+                if (booking_id, ts_id) in pairs:
+                    return reject('already_assigned', 'Booking is already assigned to this timeslot')
+                if count_booking and booking_count[booking_id] >= booking_max[booking_id]:
+                    return reject('booking_full', 'Booking already has maximum shifts assigned',
+                                  current=booking_count[booking_id], max=booking_max[booking_id])
+                if timeslot_count[ts_id] >= capacity[ts_id]:
+                    return reject('timeslot_full', 'Timeslot is already at capacity',
+                                  current=timeslot_count[ts_id], capacity=capacity[ts_id])
+                return None
+
+            results = []
+            applied = True
+            for op in operations:
+                kind = op.get('op')
+                if kind == 'create':
+                    booking_id, ts_id = op.get('booking_id'), op.get('timeslot_id')
+                    if booking_id not in booking_max:
+                        result = reject('booking_not_found', 'Booking not found')
+                    else:
+                        result = check_room(booking_id, ts_id, count_booking=True)
+                    if result is None:
+                        booking_count[booking_id] += 1
+                        timeslot_count[ts_id] += 1
+                        pairs.add((booking_id, ts_id))
+                        new_id = None
+                        if applied:
+                            cursor.execute("""
+                                           INSERT INTO ShiftAssignments
+                                               (booking_id, timeslot_id, is_confirmed, admin_notes)
+                                           VALUES (?, ?, ?, ?)
+                                           """, (booking_id, ts_id, 1 if op.get('is_confirmed', True) else 0,
+                                                 op.get('admin_notes', '')))
+                            new_id = cursor.lastrowid
+                        result = {'ok': True, 'id': new_id}
+
+                elif kind in ('update', 'delete'):
+                    assignment_id = op.get('id')
+                    if assignment_id not in assignments:
+                        result = reject('assignment_not_found', 'Assignment not found')
+                    elif kind == 'delete':
+                        booking_id, ts_id = assignments.pop(assignment_id)
+                        booking_count[booking_id] -= 1
+                        timeslot_count[ts_id] -= 1
+                        pairs.discard((booking_id, ts_id))
+                        if applied:
+                            cursor.execute("DELETE FROM ShiftAssignments WHERE id = ?", (assignment_id,))
+                        result = {'ok': True, 'id': assignment_id}
+                    else:
+                        booking_id, ts_id = assignments[assignment_id]
+                        new_ts_id = op.get('timeslot_id', ts_id)
+                        result = None
+                        if new_ts_id != ts_id:
+                            result = check_room(booking_id, new_ts_id, count_booking=False)
+                            if result is None:
+                                timeslot_count[ts_id] -= 1
+                                timeslot_count[new_ts_id] += 1
+                                pairs.discard((booking_id, ts_id))
+                                pairs.add((booking_id, new_ts_id))
+                                assignments[assignment_id] = (booking_id, new_ts_id)
+                        if result is None:
+                            if applied:
+                                updates = {'timeslot_id': new_ts_id}
+                                if 'is_confirmed' in op:
+                                    updates['is_confirmed'] = 1 if op['is_confirmed'] else 0
+                                if 'admin_notes' in op:
+                                    updates['admin_notes'] = op['admin_notes']
+                                cursor.execute(
+                                    f"UPDATE ShiftAssignments SET {', '.join(f'{column} = ?' for column in updates)} "
+                                    f"WHERE id = ?",
+                                    (*updates.values(), assignment_id)
+                                )
+                            result = {'ok': True, 'id': assignment_id}
+
+                else:
+                    result = reject('invalid_operation', f"Unknown operation: {kind}")
+
+                if not result['ok']:
+                    applied = False
+                results.append(result)
+
+            if applied:
+                conn.commit()
+            else:
+                conn.rollback()
+                # Rolled back, ids handed out to creates don't exist
+                for op, result in zip(operations, results):
+                    if op.get('op') == 'create' and result['ok']:
+                        result['id'] = None
+            return {'applied': applied, 'results': results}
+
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Database error during assignment batch of {len(operations)} operations: {e}", exc_info=True)
+            return {'error': str(e)}
+
+
 def get_booking_shift_count(booking_id: int) -> int:
     """
     Returns the number of shifts currently assigned to a booking.
@@ -387,7 +639,71 @@ def get_timeslot_summary() -> List[Dict]:
         return summaries
 
 
-def run_auto_assignment(strategy: str = 'priority') -> Dict:
+def _solve(cursor: sqlite3.Cursor, strategy: str, incremental: bool = False,
+           search: Optional[Dict] = None) -> Dict:
+    """
+    Computes the proposed assignments of a strategy and how they differ from the current ones.
+    Incremental runs keep every existing assignment and only place the open demand.
+    search holds the assignment_engine.search options (time_budget, workers, seed) to run
+    the strategy with many booking orders and keep the best one.
+    """
+    if incremental:
+        problem, unchanged = assignment_engine.load_residual_problem(cursor)
+        current = []
+    else:
+        problem = assignment_engine.load_problem(cursor)
+        current = assignment_engine.load_current_assignments(cursor)
+    solve_start = time.perf_counter()
+    if search is not None:
+        proposed, search_info = assignment_engine.search(problem, strategy, **search)
+    else:
+        proposed = assignment_engine.STRATEGIES[strategy](problem)
+    solve_time_ms = (time.perf_counter() - solve_start) * 1000
+
+    stats = assignment_engine.assignment_stats(problem, proposed)
+    stats['solve_time_ms'] = round(solve_time_ms, 2)
+    if search is not None:
+        stats['search'] = search_info
+        strategy = f"{strategy}:search"
+    diff = assignment_engine.diff_assignments(current, proposed)
+    if not incremental:
+        unchanged = len(diff['unchanged'])
+    return {
+        'stats': stats,
+        'added': diff['added'],
+        'removed': diff['removed'],
+        'unchanged': unchanged,
+        'fingerprint': assignment_engine.assignment_fingerprint(
+            f"{strategy}:incremental" if incremental else strategy, current, proposed)
+    }
+
+
+def preview_auto_assignment(strategy: str = 'priority', incremental: bool = False,
+                            search: Optional[Dict] = None) -> Dict:
+    """
+    Computes what run_auto_assignment would do without touching the database.
+    Returns its statistics, the added and removed (booking_id, timeslot_id) pairs, the number of
+    unchanged assignments and a fingerprint to pass to run_auto_assignment to apply exactly this.
+    A search preview also returns the winning seed, apply with it to skip searching again.
+    """
+    with closing(_connect_db()) as conn:
+        try:
+            # One read transaction, so assignments and bookings are from the same snapshot
+            conn.execute("BEGIN")
+            solution = _solve(conn.cursor(), strategy, incremental, search)
+            conn.rollback()
+        except sqlite3.Error as e:
+            logger.error(f"Database error during auto-assignment preview ({strategy}): {e}", exc_info=True)
+            return {'error': str(e)}
+
+    return {
+        **solution.pop('stats'),
+        **solution
+    }
+
+
+def run_auto_assignment(strategy: str = 'priority', fingerprint: Optional[str] = None,
+                        incremental: bool = False, search: Optional[Dict] = None) -> Dict:
     """
     Automatically assigns participants to shifts based on the specified strategy.
     Returns statistics about the result.
@@ -395,186 +711,59 @@ def run_auto_assignment(strategy: str = 'priority') -> Dict:
     Strategies:
     - priority: Assign people to their highest priority shifts first
     - fill: Fill up shifts to their capacity, starting with most needed
-    """
-    conn = _connect_db()
-
-    try:
-        conn.execute("BEGIN TRANSACTION")
-        cursor = conn.cursor()
+    - optimal: Most assignments possible, then the best preferences (min-cost max-flow)
 
-        # Clear existing assignments if requested
-        cursor.execute("DELETE FROM ShiftAssignments")
+    Bookings and capacities are loaded once and solved in memory (see assignment_engine).
+    Only the difference to the current assignments is written, assignments that stay keep
+    their confirmation state and admin notes. With the fingerprint of a preview, nothing is
+    written and 'conflict' is set if the result would differ from that preview.
 
-        # Get all bookings with their priorities
-        cursor.execute("""
-                       SELECT id,
-                              first_priority_timeslot_id,
-                              second_priority_timeslot_id,
-                              third_priority_timeslot_id,
-                              amount_shifts
-                       FROM Bookings
-                       WHERE amount_shifts > 0
-                       """)
-        bookings = cursor.fetchall()
+    incremental keeps all existing assignments and only fills the remaining shifts of bookings
+    and the remaining capacity of timeslots, the statistics then cover only those.
 
-        # Get all timeslots with their capacities
-        cursor.execute("""
-                       SELECT id, num_needed
-                       FROM TimeSlots
-                       """)
-        timeslots = {ts[0]: ts[1] for ts in cursor.fetchall()}
-
-        # Keep track of assignments
-        assignments_made = 0
-        bookings_fully_assigned = 0
-        timeslots_filled = 0
-        timeslot_assignments = {ts_id: 0 for ts_id in timeslots}
-
-        if strategy == 'priority':
-            # Priority-based assignment (1st, 2nd, 3rd choices)
-            for priority_level in range(1, 4):
-                for booking in bookings:
-                    booking_id = booking[0]
-                    max_shifts = booking[4]
-                    current_shifts = 0
-
-                    # Get count of already assigned shifts for this booking
-                    cursor.execute(
-                        "SELECT COUNT(*) FROM ShiftAssignments WHERE booking_id = ?",
-                        (booking_id,)
-                    )
-                    current_shifts = cursor.fetchone()[0]
-
-                    # Skip if already at max shifts
-                    if current_shifts >= max_shifts:
-                        continue
-
-                    # Get the appropriate priority timeslot
-                    timeslot_id = booking[priority_level]
-
-                    # Skip if no timeslot preference at this level
-                    if timeslot_id <= 0:
-                        continue
-
-                    # Skip if timeslot already assigned to this booking
-                    cursor.execute(
-                        "SELECT COUNT(*) FROM ShiftAssignments WHERE booking_id = ? AND timeslot_id = ?",
-                        (booking_id, timeslot_id)
-                    )
-                    if cursor.fetchone()[0] > 0:
-                        continue
-
-                    # Skip if timeslot is full
-                    if timeslot_assignments[timeslot_id] >= timeslots[timeslot_id]:
-                        continue
-
-                    # Create the assignment
-                    cursor.execute(
-                        "INSERT INTO ShiftAssignments (booking_id, timeslot_id, is_confirmed) VALUES (?, ?, 1)",
-                        (booking_id, timeslot_id)
-                    )
-
-                    # Update tracking
-                    assignments_made += 1
-                    timeslot_assignments[timeslot_id] += 1
-
-        elif strategy == 'fill':
-            # Fill-based assignment (prioritize filling up shifts)
-            # Sort timeslots by percentage filled (least to most)
-            sorted_timeslots = sorted(
-                [(ts_id, timeslots[ts_id], timeslot_assignments[ts_id]) for ts_id in timeslots],
-                key=lambda x: x[2] / x[1] if x[1] > 0 else 1
-            )
+    A search without a seed runs before the write lock is taken, only the winning order
+    is recomputed inside the transaction.
+    """
+    search_info = None
+    if search is not None and search.get('seed') is None:
+        preview = preview_auto_assignment(strategy, incremental, search)
+        if 'error' in preview:
+            return preview
+        search_info = preview['search']
+        search = {**search, 'seed': search_info['seed']}
 
-            for ts_id, capacity, _ in sorted_timeslots:
-                # Skip if already filled
-                if timeslot_assignments[ts_id] >= capacity:
-                    continue
-
-                # Find bookings that have this timeslot as a preference
-                eligible_bookings = []
-                for booking in bookings:
-                    booking_id = booking[0]
-                    max_shifts = booking[4]
-
-                    # Get count of already assigned shifts
-                    cursor.execute(
-                        "SELECT COUNT(*) FROM ShiftAssignments WHERE booking_id = ?",
-                        (booking_id,)
-                    )
-                    current_shifts = cursor.fetchone()[0]
-
-                    # Skip if already at max shifts
-                    if current_shifts >= max_shifts:
-                        continue
-
-                    # Check if this timeslot is in their preferences
-                    if ts_id in booking[1:4]:
-                        # Calculate priority level (1, 2, or 3)
-                        priority = 1
-                        if booking[1] == ts_id:
-                            priority = 1
-                        elif booking[2] == ts_id:
-                            priority = 2
-                        elif booking[3] == ts_id:
-                            priority = 3
-
-                        eligible_bookings.append((booking_id, priority))
-
-                # Sort eligible bookings by priority level
-                eligible_bookings.sort(key=lambda x: x[1])
-
-                # Assign until filled or no more eligible bookings
-                for booking_id, _ in eligible_bookings:
-                    # Skip if timeslot is now full
-                    if timeslot_assignments[ts_id] >= capacity:
-                        break
-
-                    # Skip if already assigned to this timeslot
-                    cursor.execute(
-                        "SELECT COUNT(*) FROM ShiftAssignments WHERE booking_id = ? AND timeslot_id = ?",
-                        (booking_id, ts_id)
-                    )
-                    if cursor.fetchone()[0] > 0:
-                        continue
-
-                    # Create the assignment
-                    cursor.execute(
-                        "INSERT INTO ShiftAssignments (booking_id, timeslot_id, is_confirmed) VALUES (?, ?, 1)",
-                        (booking_id, ts_id)
-                    )
-
-                    # Update tracking
-                    assignments_made += 1
-                    timeslot_assignments[ts_id] += 1
-
-        # Calculate final statistics
-        for booking in bookings:
-            booking_id = booking[0]
-            max_shifts = booking[4]
+    conn = _connect_db()
 
-            cursor.execute(
-                "SELECT COUNT(*) FROM ShiftAssignments WHERE booking_id = ?",
-                (booking_id,)
-            )
-            assigned_shifts = cursor.fetchone()[0]
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        cursor = conn.cursor()
 
-            if assigned_shifts >= max_shifts:
-                bookings_fully_assigned += 1
+        solution = _solve(cursor, strategy, incremental, search)
+        if fingerprint is not None and fingerprint != solution['fingerprint']:
+            conn.rollback()
+            return {
+                'error': 'Assignments or bookings changed since the preview',
+                'conflict': True
+            }
 
-        for ts_id, capacity in timeslots.items():
-            if timeslot_assignments[ts_id] >= capacity:
-                timeslots_filled += 1
+        cursor.executemany(
+            "DELETE FROM ShiftAssignments WHERE booking_id = ? AND timeslot_id = ?",
+            solution['removed']
+        )
+        cursor.executemany(
+            "INSERT INTO ShiftAssignments (booking_id, timeslot_id, is_confirmed) VALUES (?, ?, 1)",
+            solution['added']
+        )
 
         conn.commit()
 
-        return {
-            'assignments_made': assignments_made,
-            'bookings_total': len(bookings),
-            'bookings_fully_assigned': bookings_fully_assigned,
-            'timeslots_total': len(timeslots),
-            'timeslots_filled': timeslots_filled
-        }
+        stats = solution['stats']
+        stats['added'] = len(solution['added'])
+        stats['removed'] = len(solution['removed'])
+        stats['unchanged'] = solution['unchanged']
+        if search_info is not None:
+            stats['search'] = search_info
+        return stats
 
     except sqlite3.Error as e:
         conn.rollback()
@@ -586,4 +775,4 @@ def run_auto_assignment(strategy: str = 'priority') -> Dict:
             'timeslots_filled': 0
         }
     finally:
-        conn.close()
\ No newline at end of file
+        conn.close()
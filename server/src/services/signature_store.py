@@ -0,0 +1,166 @@
+import base64
+import binascii
+import hashlib
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+SIGNATURE_MAX_BYTES = int(os.environ.get('SIGNATURE_MAX_BYTES', str(512 * 1024)))
+
+REFERENCE_PREFIX = 'sha256:'
+PNG_MAGIC = b'\x89PNG\r\n\x1a\n'
+_DIGEST_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+
+class SignatureError(ValueError):
+    """
+    A submitted signature that can't be stored: not base64, not a PNG or too large.
+    """
+
+
+def _strip_data_url(signature: str) -> str:
+    if ',' in signature:
+        # Remove possible 'data:image/png;base64,' prefix
+        signature = signature.split(',', 1)[1]
+    return signature
+
+
+def decode_signature(signature: str, max_bytes: int = SIGNATURE_MAX_BYTES) -> bytes:
+    """
+    Decodes a submitted signature (base64, optionally as a data URL) to the PNG bytes.
+    The size is checked on the encoded length first, so oversized payloads are never decoded.
+    """
+    encoded = _strip_data_url(signature).strip()
+    if len(encoded) // 4 * 3 > max_bytes + 2:
+        raise SignatureError(f"Signature exceeds {max_bytes} bytes")
+    try:
+        png = base64.b64decode(encoded, validate=True)
+    except (binascii.Error, ValueError):
+        raise SignatureError("Signature is not valid base64")
+    if len(png) > max_bytes:
+        raise SignatureError(f"Signature exceeds {max_bytes} bytes")
+    if not png.startswith(PNG_MAGIC):
+        raise SignatureError("Signature is not a PNG image")
+    return png
+
+
+def is_reference(value: Optional[str]) -> bool:
+    return bool(value) and value.startswith(REFERENCE_PREFIX)
+
+
+def validate_signature(signature: str) -> Optional[bytes]:
+    """
+    Checks a submitted signature and returns the PNG bytes, None for an empty signature.
+    Raises SignatureError for references and for anything decode_signature rejects.
+    """
+    if not signature:
+        return None
+    if is_reference(signature):
+        raise SignatureError("Signature references can't be submitted")
+    return decode_signature(signature)
+
+
+def signature_etag(value: Optional[str]) -> Optional[str]:
+    """
+    Returns an ETag for a signature column value, None if there is no signature.
+    A reference already is the content hash, so the file isn't read. Inline values
+    from before the store are hashed decoded, giving the same ETag once they are migrated.
+    """
+    if not value:
+        return None
+    if is_reference(value):
+        digest = value[len(REFERENCE_PREFIX):]
+        return digest[:32] if _DIGEST_PATTERN.match(digest) else None
+    try:
+        png = base64.b64decode(_strip_data_url(value), validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    return hashlib.sha256(png).hexdigest()[:32] if png else None
+
+
+class SignatureStore:
+    """
+    Signature PNGs on disk, keyed by the SHA-256 of their bytes: <root>/ab/cd/abcd....png.
+    The database only keeps the 'sha256:<hex>' reference. Identical images are stored once,
+    and files are never changed after they are written, so backups only have to copy new files.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path_for(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:4], f"{digest}.png")
+
+    def put(self, png: bytes) -> str:
+        """
+        Stores the PNG bytes (once) and returns the reference.
+        The file is written to a temp file in the target directory and renamed into place,
+        so readers never see a partial image.
+        """
+        return self._put(png)[0]
+
+    def _put(self, png: bytes) -> Tuple[str, bool]:
+        # Also returns whether the file was written by this call
+        digest = hashlib.sha256(png).hexdigest()
+        path = self.path_for(digest)
+        if os.path.exists(path):
+            return f"{REFERENCE_PREFIX}{digest}", False
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(png)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return f"{REFERENCE_PREFIX}{digest}", True
+
+    @contextmanager
+    def storing(self, png: Optional[bytes]) -> Iterator[str]:
+        """
+        Stores the PNG for the database write in the with block and yields the value for the
+        signature column ('' without a signature). If the block raises, a file written by this
+        call is removed again, so failed or rolled back inserts leave no unreferenced images.
+        Use it inside the write transaction, so no other insert can start referencing the file meanwhile.
+        """
+        if png is None:
+            yield ""
+            return
+        reference, created = self._put(png)
+        try:
+            yield reference
+        except BaseException:
+            if created:
+                try:
+                    os.remove(self.path_for(reference[len(REFERENCE_PREFIX):]))
+                except FileNotFoundError:
+                    pass
+            raise
+
+    def load(self, value: Optional[str]) -> Optional[bytes]:
+        """
+        Returns the PNG bytes for a signature column value, None if there is none.
+        Values that are not a reference yet (inline base64 from before the store) are decoded directly.
+        """
+        if not value:
+            return None
+        if not is_reference(value):
+            try:
+                return base64.b64decode(_strip_data_url(value), validate=True) or None
+            except (binascii.Error, ValueError):
+                return None
+        digest = value[len(REFERENCE_PREFIX):]
+        if not _DIGEST_PATTERN.match(digest):
+            return None
+        try:
+            with open(self.path_for(digest), 'rb') as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
@@ -0,0 +1,158 @@
+import argparse
+import os
+import random
+import re
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+# Ensure imports work when script is run directly
+import sys
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), '../../data/schema.sql')
+
+# (label, query, params) - the lookups the services run against a full database
+QUERIES = [
+    ("booking_exists", """
+        SELECT COUNT(*)
+        FROM Users u
+                 JOIN Bookings b ON u.id = b.user_id
+        WHERE u.first_name = ?
+          AND u.last_name = ?
+          AND u.email = ?
+        """, ("First5000", "Last5000", "user5000@example.com")),
+    ("check_email_exists", "SELECT * FROM Users WHERE email=?", ("user5000@example.com",)),
+    ("booking_materials_by_booking", "SELECT material_id FROM BookingMaterials WHERE booking_id = ?", (5000,)),
+    ("booking_professions_by_booking", "SELECT profession_id FROM BookingProfessions WHERE booking_id = ?", (5000,)),
+    ("shift_assignments_by_booking", "SELECT COUNT(*) FROM ShiftAssignments WHERE booking_id = ?", (5000,)),
+    ("shift_assignments_by_timeslot", "SELECT COUNT(*) FROM ShiftAssignments WHERE timeslot_id = ?", (10,)),
+    ("first_priority_counts", """
+        SELECT first_priority_timeslot_id, COUNT(*)
+        FROM Bookings
+        WHERE first_priority_timeslot_id IS NOT NULL
+        GROUP BY first_priority_timeslot_id
+        """, ()),
+    ("second_priority_counts", """
+        SELECT second_priority_timeslot_id, COUNT(*)
+        FROM Bookings
+        WHERE second_priority_timeslot_id IS NOT NULL
+          AND amount_shifts >= 2
+        GROUP BY second_priority_timeslot_id
+        """, ()),
+    ("third_priority_counts", """
+        SELECT third_priority_timeslot_id, COUNT(*)
+        FROM Bookings
+        WHERE third_priority_timeslot_id IS NOT NULL
+          AND amount_shifts >= 3
+        GROUP BY third_priority_timeslot_id
+        """, ()),
+]
+
+
+def populate(conn: sqlite3.Connection, num_bookings: int, num_timeslots: int) -> None:
+    """
+    Fills the database with synthetic users, bookings, materials, professions and assignments.
+    """
+    rng = random.Random(42)
+    timeslot_ids = list(range(num_timeslots))
+
+    conn.executemany(
+        "INSERT INTO TimeSlots (id, title, num_needed, workshift_id) VALUES (?, ?, ?, ?)",
+        [(ts_id, f"Slot {ts_id}", 10, ts_id // 10) for ts_id in timeslot_ids]
+    )
+    conn.executemany(
+        "INSERT INTO Users (id, last_name, first_name, email, phone_number) VALUES (?, ?, ?, ?, ?)",
+        [(i, f"Last{i}", f"First{i}", f"user{i}@example.com", "") for i in range(1, num_bookings + 1)]
+    )
+
+    bookings, materials, professions, assignments = [], [], [], []
+    for i in range(1, num_bookings + 1):
+        p1, p2, p3 = rng.sample(timeslot_ids, 3)
+        bookings.append((i, i, 0, 0, 0, p1, p2, p3, rng.randint(1, 3)))
+        materials.extend((i, m) for m in rng.sample(range(10), rng.randint(0, 3)))
+        professions.extend((i, p) for p in rng.sample(range(10), rng.randint(0, 2)))
+        assignments.append((i, p1))
+
+    conn.executemany("""
+        INSERT INTO Bookings (id, user_id, ticket_option_id, beverage_option_id, food_option_id,
+                              first_priority_timeslot_id, second_priority_timeslot_id,
+                              third_priority_timeslot_id, amount_shifts)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, bookings)
+    conn.executemany("INSERT INTO BookingMaterials (booking_id, material_id) VALUES (?, ?)", materials)
+    conn.executemany("INSERT INTO BookingProfessions (booking_id, profession_id) VALUES (?, ?)", professions)
+    conn.executemany("INSERT INTO ShiftAssignments (booking_id, timeslot_id) VALUES (?, ?)", assignments)
+    conn.commit()
+
+
+def drop_secondary_indexes(conn: sqlite3.Connection) -> None:
+    """
+    Drops all indexes declared in schema.sql (keeps the implicit ones of PRIMARY KEY / UNIQUE).
+    """
+    rows = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+    ).fetchall()
+    for (name,) in rows:
+        conn.execute(f"DROP INDEX {name}")
+    conn.commit()
+
+
+def run_queries(conn: sqlite3.Connection, repeat: int) -> dict:
+    """
+    Prints the query plan of every query and returns the mean runtime in ms.
+    """
+    timings = {}
+    for label, query, params in QUERIES:
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+        print(f"  {label}:")
+        for row in plan:
+            print(f"      {row[-1]}")
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            conn.execute(query, params).fetchall()
+        timings[label] = (time.perf_counter() - start) / repeat * 1000
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare query plans with and without the schema.sql indexes')
+    parser.add_argument('--bookings', type=int, default=10000, help='Number of synthetic bookings')
+    parser.add_argument('--timeslots', type=int, default=200, help='Number of synthetic timeslots')
+    parser.add_argument('--repeat', type=int, default=50, help='Executions per query for timing')
+    args = parser.parse_args()
+
+    with open(SCHEMA_PATH, 'r') as f:
+        schema_script = f.read()
+    index_count = len(re.findall(r'CREATE INDEX', schema_script, re.IGNORECASE))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        conn = sqlite3.connect(os.path.join(tmp_dir, 'benchmark.db'))
+        conn.executescript(schema_script)
+        populate(conn, args.bookings, args.timeslots)
+        conn.execute("ANALYZE")
+
+        print(f"Database with {args.bookings} bookings and {args.timeslots} timeslots\n")
+
+        drop_secondary_indexes(conn)
+        print("Without secondary indexes:")
+        before = run_queries(conn, args.repeat)
+
+        # Re-applying the schema must be idempotent and restores the indexes
+        conn.executescript(schema_script)
+        conn.execute("ANALYZE")
+        print(f"\nWith the {index_count} schema.sql indexes:")
+        after = run_queries(conn, args.repeat)
+        conn.close()
+
+    print(f"\n{'query':<32}{'before (ms)':>14}{'after (ms)':>14}{'speedup':>10}")
+    for label, _, _ in QUERIES:
+        speedup = before[label] / after[label] if after[label] > 0 else float('inf')
+        print(f"{label:<32}{before[label]:>14.3f}{after[label]:>14.3f}{speedup:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
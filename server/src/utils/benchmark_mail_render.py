@@ -0,0 +1,88 @@
+import argparse
+import random
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+# Ensure imports work when script is run directly
+import sys
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.models.datatypes import Booking, ArtistBooking
+from src.services.formcontent_service import get_form_content_obj, get_artist_form_content_obj
+from src.services.mail_service import (
+    FormContentIndex,
+    render_confirmation_html,
+    render_artist_confirmation_html,
+    build_confirmation_mail,
+)
+
+
+def make_bookings(count: int, form_content: dict) -> list:
+    """
+    Random participant bookings that reference the options of the form content.
+    """
+    rng = random.Random(42)
+    timeslot_ids = [ts['id'] for ws in form_content['work_shifts'] for ts in ws['time_slots']]
+    material_ids = [m['id'] for m in form_content['materials']]
+    return [
+        Booking(
+            last_name=f"Last{i}", first_name=f"First{i}", email=f"user{i}@example.com", phone="",
+            ticket_id=rng.choice(form_content['ticket_options'])['id'],
+            beverage_id=rng.choice(form_content['beverage_options'])['id'],
+            food_id=rng.choice(form_content['food_options'])['id'],
+            timeslot_priority_1=rng.choice(timeslot_ids),
+            timeslot_priority_2=rng.choice(timeslot_ids),
+            timeslot_priority_3=rng.choice(timeslot_ids),
+            material_ids=rng.sample(material_ids, min(len(material_ids), rng.randint(0, 3))),
+            amount_shifts=rng.randint(1, 3), supporter_buddy="", total_price=42.0, signature="",
+            is_paid=False, paid_amount=0, payment_notes="", payment_date=""
+        )
+        for i in range(count)
+    ]
+
+
+def timed(label: str, func, items: list) -> None:
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    duration = time.perf_counter() - start
+    print(f"{label:<44}{len(items) / duration:>12.0f}/s{duration / len(items) * 1e6:>12.1f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure confirmation mail render throughput')
+    parser.add_argument('--count', type=int, default=2000, help='Mails rendered per measurement')
+    args = parser.parse_args()
+
+    form_content = asdict(get_form_content_obj())
+    artist_form_content = asdict(get_artist_form_content_obj())
+    bookings = make_bookings(args.count, form_content)
+    artist_bookings = [
+        ArtistBooking(
+            last_name=b.last_name, first_name=b.first_name, email=b.email, phone="",
+            ticket_id=b.ticket_id, beverage_id=b.beverage_id, food_id=b.food_id,
+            artist_material_ids=[m['id'] for m in artist_form_content['artist_materials'][:2]],
+            total_price=b.total_price, signature=""
+        )
+        for b in bookings
+    ]
+
+    index = FormContentIndex.from_form_content(form_content)
+    artist_index = FormContentIndex.from_form_content(artist_form_content)
+    # Warm the template cache so the first measurement doesn't include reading the files
+    render_confirmation_html(bookings[0], index)
+    render_artist_confirmation_html(artist_bookings[0], artist_index)
+
+    print(f"{'':<44}{'throughput':>14}{'per mail':>12}")
+    timed("html, index built per mail (dict input)", lambda b: render_confirmation_html(b, form_content), bookings)
+    timed("html, shared FormContentIndex", lambda b: render_confirmation_html(b, index), bookings)
+    timed("artist html, shared FormContentIndex",
+          lambda b: render_artist_confirmation_html(b, artist_index), artist_bookings)
+    timed("full MIME message incl. as_string()",
+          lambda b: build_confirmation_mail(b, index).as_string(), bookings)
+
+
+if __name__ == "__main__":
+    main()
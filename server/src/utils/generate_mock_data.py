@@ -15,6 +15,7 @@ from src.models.datatypes import Booking, ArtistBooking
 from src.services.booking_service import insert_booking, _connect_db, DB_FILE_PATH
 from src.services.artist_service import insert_artist_booking
 from src.services.formcontent_service import get_form_content_obj, get_artist_form_content_obj
+from src.services.counter_service import reconcile_booking_counters
 
 
 def generate_mock_signature():
@@ -279,6 +280,9 @@ def main():
 
         conn.commit()
 
+        # The bulk deletes bypass booking_service, rebuild the counters to match
+        reconcile_booking_counters(conn)
+
     print(f"Generating {args.participants} participant bookings and {args.artists} artist bookings...")
 
     # Load form content for options
@@ -0,0 +1,199 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict
+from email.mime.multipart import MIMEMultipart
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Ensure imports work when script is run directly
+import sys
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.models.datatypes import BookingWithTimestamp
+from src.services.booking_service import find_bookings, DB_DIR
+from src.services.formcontent_service import get_form_content_obj
+from src.services.mail_service import FormContentIndex, build_confirmation_mail, get_smtp_pool
+
+# Rendering worker state, set once per process by _init_renderer
+_index: Optional[FormContentIndex] = None
+
+
+def _init_renderer(index: FormContentIndex) -> None:
+    global _index
+    _index = index
+
+
+def _render(booking: BookingWithTimestamp) -> Tuple[int, MIMEMultipart]:
+    """
+    Renders the confirmation mail of a booking.
+    """
+    return booking.id, build_confirmation_mail(booking, _index)
+
+
+def campaign_key(filters: Dict) -> str:
+    """
+    Short stable id of a filter set, names the progress file of campaigns started without --campaign.
+    """
+    return hashlib.sha256(json.dumps(filters, sort_keys=True).encode()).hexdigest()[:12]
+
+
+class Progress:
+    """
+    Resumable campaign progress: the ids of bookings whose mail was accepted by the server.
+    Written after every batch (temp file + rename), so an interrupted run continues where it stopped.
+    The file records the filters of its campaign and is only resumed with the same filters.
+    A read_only progress is loaded but never saved (dry runs).
+    """
+
+    def __init__(self, path: Optional[str], filters: Dict, restart: bool = False, read_only: bool = False):
+        self.path = path
+        self.filters = filters
+        self.read_only = read_only
+        self.sent_ids = set()
+        self.failed: Dict[int, str] = {}
+        if path and not restart and os.path.exists(path):
+            with open(path, 'r') as f:
+                state = json.load(f)
+            if state.get('filters', filters) != filters:
+                raise ValueError(f"{path} belongs to a campaign with other filters ({state['filters']}), "
+                                 f"use another --campaign or --restart")
+            self.sent_ids = set(state.get('sent_ids', []))
+            self.failed = {int(booking_id): error for booking_id, error in state.get('failed', {}).items()}
+
+    def save(self) -> None:
+        if not self.path or self.read_only:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'filters': self.filters,
+                'sent_ids': sorted(self.sent_ids),
+                'failed': {str(booking_id): error for booking_id, error in sorted(self.failed.items())},
+                'updated_at': time.strftime('%Y-%m-%d %H:%M:%S')
+            }, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def render_all(bookings: List[BookingWithTimestamp], index: FormContentIndex, workers: int) -> List[Tuple[int, MIMEMultipart]]:
+    """
+    Renders all mails, in a process pool if more than one worker is requested.
+    """
+    if workers <= 1:
+        _init_renderer(index)
+        return [_render(booking) for booking in bookings]
+    chunksize = max(1, len(bookings) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_renderer, initargs=(index,)) as executor:
+        return list(executor.map(_render, bookings, chunksize=chunksize))
+
+
+def send_all(rendered: List[Tuple[int, MIMEMultipart]], progress: Progress, batch_size: int, connections: int) -> None:
+    """
+    Sends the rendered mails in batches, one pooled SMTP session per batch, connections batches at a time.
+    """
+    pool = get_smtp_pool()
+    batches = [rendered[i:i + batch_size] for i in range(0, len(rendered), batch_size)]
+
+    def send_batch(batch):
+        return batch, pool.send_many([msg for _, msg in batch])
+
+    with ThreadPoolExecutor(max_workers=max(1, connections)) as executor:
+        for batch, errors in executor.map(send_batch, batches):
+            for (booking_id, msg), error in zip(batch, errors):
+                if error is None:
+                    progress.sent_ids.add(booking_id)
+                    progress.failed.pop(booking_id, None)
+                else:
+                    progress.failed[booking_id] = str(error)
+                    print(f"  failed: booking {booking_id} <{msg['To']}>: {error}")
+            progress.save()
+            print(f"  {len(progress.sent_ids)} sent, {len(progress.failed)} failed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Send the booking confirmation mail to a selection of participants')
+    parser.add_argument('--unpaid', action='store_true', help='Only bookings that are not paid yet')
+    parser.add_argument('--missing-shift', action='store_true',
+                        help='Only bookings with fewer assigned shifts than they volunteered for')
+    parser.add_argument('--ticket', type=int, action='append', help='Only bookings with this ticket option id (repeatable)')
+    parser.add_argument('--id', type=int, action='append', dest='ids', help='Only this booking id (repeatable)')
+    parser.add_argument('--email', action='append', help='Only this email address (repeatable)')
+    parser.add_argument('--limit', type=int, help='Send at most this many mails in this run')
+    parser.add_argument('--campaign', help='Name of the campaign, each campaign keeps its own progress '
+                                           '(default: derived from the filters)')
+    parser.add_argument('--progress', help='Progress file used to resume an interrupted campaign '
+                                           '(default: mail_campaigns/<campaign>.json next to the database)')
+    parser.add_argument('--restart', action='store_true', help='Ignore and overwrite an existing progress file')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Processes used to render mails')
+    parser.add_argument('--batch-size', type=int, default=50, help='Mails sent per SMTP session checkout')
+    parser.add_argument('--connections', type=int, default=None,
+                        help='Parallel SMTP connections (default: SMTP_POOL_SIZE)')
+    parser.add_argument('--dry-run', action='store_true', help='Select and render, but send nothing')
+    args = parser.parse_args()
+
+    filters = {'unpaid': args.unpaid, 'missing_shift': args.missing_shift, 'ticket_ids': sorted(args.ticket or []),
+               'booking_ids': sorted(args.ids or []), 'emails': sorted(args.email or [])}
+    campaign = args.campaign or campaign_key(filters)
+    progress_path = args.progress or os.path.normpath(os.path.join(DB_DIR, 'mail_campaigns', f"{campaign}.json"))
+    try:
+        # A dry run reads the progress too, so it previews exactly what a real run would send
+        progress = Progress(progress_path, filters, restart=args.restart, read_only=args.dry_run)
+    except ValueError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    bookings = find_bookings(unpaid=args.unpaid, missing_shift=args.missing_shift, ticket_ids=args.ticket,
+                             booking_ids=args.ids, emails=args.email)
+    select_time = time.perf_counter() - start
+
+    pending = [booking for booking in bookings if booking.id not in progress.sent_ids]
+    if args.limit is not None:
+        pending = pending[:args.limit]
+    skipped = sum(1 for booking in bookings if booking.id in progress.sent_ids)
+    print(f"Campaign {campaign}: {len(bookings)} bookings selected in {select_time * 1000:.1f} ms, {skipped} already sent, "
+          f"{len(pending)} to send in this run")
+    if not pending:
+        return
+
+    # Form content is built once for the whole campaign
+    index = FormContentIndex.from_form_content(asdict(get_form_content_obj()))
+
+    start = time.perf_counter()
+    rendered = render_all(pending, index, args.workers)
+    render_time = max(time.perf_counter() - start, 1e-9)
+    print(f"Rendered {len(rendered)} mails in {render_time:.2f}s ({len(rendered) / render_time:.0f}/s, "
+          f"{args.workers} worker(s))")
+
+    if args.dry_run:
+        for booking_id, msg in rendered[:10]:
+            print(f"  would send to booking {booking_id} <{msg['To']}>")
+        if len(rendered) > 10:
+            print(f"  ... and {len(rendered) - 10} more")
+        return
+
+    pool = get_smtp_pool()
+    connections = args.connections or pool.max_size
+    sent_before = len(progress.sent_ids)
+    start = time.perf_counter()
+    try:
+        send_all(rendered, progress, args.batch_size, connections)
+    finally:
+        progress.save()
+        pool.close()
+    send_time = max(time.perf_counter() - start, 1e-9)
+
+    sent = len(progress.sent_ids) - sent_before
+    print(f"Sent {sent} mails in {send_time:.2f}s ({sent / send_time:.1f}/s over {connections} connection(s), "
+          f"{pool.stats['connects']} connect(s), {pool.stats['reconnects']} reconnect(s)), "
+          f"{len(progress.failed)} failed")
+    if progress.failed:
+        print(f"Run again to retry the failed mails, progress is kept in {progress_path}")
+
+
+if __name__ == "__main__":
+    main()
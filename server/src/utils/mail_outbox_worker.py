@@ -0,0 +1,44 @@
+import argparse
+import time
+from contextlib import closing
+from pathlib import Path
+
+# Ensure imports work when script is run directly
+import sys
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.services.booking_service import _connect_db
+from src.services.outbox_service import OUTBOX_BATCH_SIZE, OUTBOX_POLL_INTERVAL, process_outbox, get_outbox_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Send the queued confirmation mails (run with MAIL_OUTBOX_WORKER=false on the server)')
+    parser.add_argument('--once', action='store_true', help='Send everything that is due and exit')
+    parser.add_argument('--batch-size', type=int, default=OUTBOX_BATCH_SIZE, help='Mails claimed per batch')
+    parser.add_argument('--interval', type=float, default=OUTBOX_POLL_INTERVAL,
+                        help='Seconds to sleep when the outbox is empty')
+    args = parser.parse_args()
+
+    with closing(_connect_db()) as conn:
+        print(f"Outbox: {get_outbox_stats(conn)}")
+
+    try:
+        while True:
+            stats = process_outbox(_connect_db, args.batch_size)
+            if any(stats.values()):
+                print(f"Sent {stats['sent']}, retrying {stats['retried']}, failed {stats['failed']}")
+            if sum(stats.values()) < args.batch_size:
+                if args.once:
+                    break
+                time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+    with closing(_connect_db()) as conn:
+        print(f"Outbox: {get_outbox_stats(conn)}")
+
+
+if __name__ == "__main__":
+    main()
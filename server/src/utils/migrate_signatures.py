@@ -0,0 +1,85 @@
+import argparse
+import os
+from contextlib import closing
+from pathlib import Path
+
+# Ensure imports work when script is run directly
+import sys
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.services.booking_service import _connect_db, signature_store, DB_FILE_PATH
+from src.services.signature_store import SignatureError, decode_signature, REFERENCE_PREFIX, SIGNATURE_MAX_BYTES
+
+TABLES = ('Bookings', 'ArtistBookings')
+
+
+def migrate_table(conn, table: str, batch_size: int, max_bytes: int, dry_run: bool) -> dict:
+    """
+    Moves the inline base64 signatures of a table into the signature store, one transaction per batch.
+    Signatures that don't decode to a PNG within max_bytes are left inline and reported.
+    """
+    stats = {'migrated': 0, 'skipped': 0, 'bytes_before': 0, 'bytes_after': 0}
+    last_id = -1
+    while True:
+        rows = conn.execute(f"""
+                            SELECT id, signature
+                            FROM {table}
+                            WHERE id > ?
+                              AND signature != ''
+                              AND signature NOT LIKE '{REFERENCE_PREFIX}%'
+                            ORDER BY id
+                            LIMIT ?
+                            """, (last_id, batch_size)).fetchall()
+        if not rows:
+            return stats
+        last_id = rows[-1][0]
+
+        updates = []
+        for booking_id, signature in rows:
+            try:
+                png = decode_signature(signature, max_bytes)
+            except SignatureError as e:
+                stats['skipped'] += 1
+                print(f"  {table} {booking_id}: left inline, {e}")
+                continue
+            if not dry_run:
+                updates.append((signature_store.put(png), booking_id))
+            stats['migrated'] += 1
+            stats['bytes_before'] += len(signature)
+            stats['bytes_after'] += len(REFERENCE_PREFIX) + 64
+
+        if not dry_run:
+            # The files are written before the references, so a crash leaves the row inline, never dangling
+            with conn:
+                conn.executemany(f"UPDATE {table} SET signature = ? WHERE id = ?", updates)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Move inline base64 signatures from the database into the content-addressed signature store')
+    parser.add_argument('--batch-size', type=int, default=200, help='Rows updated per transaction')
+    parser.add_argument('--max-bytes', type=int, default=SIGNATURE_MAX_BYTES,
+                        help='Largest decoded signature that is migrated, larger ones stay inline')
+    parser.add_argument('--vacuum', action='store_true', help='VACUUM afterwards to give the freed space back')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would be migrated, change nothing')
+    args = parser.parse_args()
+
+    size_before = os.path.getsize(DB_FILE_PATH)
+    with closing(_connect_db()) as conn:
+        for table in TABLES:
+            stats = migrate_table(conn, table, args.batch_size, args.max_bytes, args.dry_run)
+            print(f"{table}: {stats['migrated']} migrated, {stats['skipped']} left inline, "
+                  f"signature column {stats['bytes_before'] / 1e6:.1f} MB -> {stats['bytes_after'] / 1e6:.1f} MB")
+        if args.vacuum and not args.dry_run:
+            conn.execute("VACUUM")
+
+    if args.dry_run:
+        return
+    print(f"Database file {size_before / 1e6:.1f} MB -> {os.path.getsize(DB_FILE_PATH) / 1e6:.1f} MB"
+          f"{'' if args.vacuum else ' (run with --vacuum to shrink the file)'}")
+    print(f"Signature store: {os.path.normpath(signature_store.root)}")
+
+
+if __name__ == "__main__":
+    main()
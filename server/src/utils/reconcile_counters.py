@@ -0,0 +1,33 @@
+import argparse
+from contextlib import closing
+from pathlib import Path
+
+# Ensure imports work when script is run directly
+import sys
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.services.booking_service import _connect_db
+from src.services.counter_service import reconcile_booking_counters
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Rebuild the BookingCounters table from the bookings in the database')
+    parser.parse_args()
+
+    with closing(_connect_db()) as conn:
+        drift = reconcile_booking_counters(conn)
+
+    if not drift:
+        print("Booking counters were up to date.")
+        return
+
+    print("Corrected booking counters:")
+    for scope, counts in sorted(drift.items()):
+        for option_id, (stored, actual) in sorted(counts.items()):
+            print(f"  {scope:<16} {option_id:>6}: {stored} -> {actual}")
+
+
+if __name__ == "__main__":
+    main()
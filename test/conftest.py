@@ -0,0 +1,137 @@
+import base64
+import os
+import sys
+import tempfile
+from contextlib import closing
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'server'))
+# Use a throwaway database for the whole run, must be set before booking_service is imported
+os.environ['DB_DIR'] = tempfile.mkdtemp(prefix='bookings_test_')
+os.environ.setdefault('MAIL_OUTBOX_WORKER', 'false')
+os.environ.setdefault('JWT_SECRET_KEY', 'test-secret-key-for-the-test-suite-only')
+
+# Children first, the schema doesn't cascade every foreign key
+BOOKING_TABLES = ('ShiftAssignments', 'BookingMaterials', 'BookingProfessions', 'BookingArtistMaterials',
+                  'Bookings', 'Users', 'ArtistBookingMaterials', 'ArtistBookingProfessions', 'ArtistBookings',
+                  'Artists', 'MailOutbox')
+
+
+@pytest.fixture
+def empty_db():
+    """
+    Removes all bookings, assignments and queued mails and rebuilds the booking counters.
+    Returns the connect function of booking_service.
+    """
+    from src.services.booking_service import _connect_db
+    from src.services.counter_service import reconcile_booking_counters
+
+    with closing(_connect_db()) as conn:
+        for table in BOOKING_TABLES:
+            conn.execute(f"DELETE FROM {table}")
+        conn.commit()
+        reconcile_booking_counters(conn)
+    return _connect_db
+
+
+@pytest.fixture
+def client(empty_db):
+    """
+    Test client of an app with the API blueprints, without the logging and outbox setup of main.py.
+    """
+    from flask import Flask
+    from flask_jwt_extended import JWTManager
+    from src.api.artist_bookings import artist_bp
+    from src.api.bookings import bookings_bp
+    from src.api.formcontent import formcontent_bp
+    from src.models.database import release_app_context_connection
+    from src.utils.config import load_config
+
+    app = Flask(__name__)
+    load_config(app)
+    JWTManager(app)
+    for blueprint in (bookings_bp, formcontent_bp, artist_bp):
+        app.register_blueprint(blueprint, url_prefix="/api")
+    app.teardown_appcontext(release_app_context_connection)
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_headers(client):
+    from flask_jwt_extended import create_access_token
+
+    with client.application.app_context():
+        return {'Authorization': f"Bearer {create_access_token(identity='admin')}"}
+
+
+@pytest.fixture
+def options(empty_db):
+    """
+    Ids of the options and timeslots created from the form content, {table: [id, ...]}.
+    The form content has no professions, two test ones are added.
+    """
+    with closing(empty_db()) as conn:
+        conn.executemany("INSERT OR IGNORE INTO Professions (id, title) VALUES (?, ?)",
+                         [(9001, 'Carpenter'), (9002, 'Electrician')])
+        conn.commit()
+        return {table: [row[0] for row in conn.execute(f"SELECT id FROM {table} ORDER BY id")]
+                for table in ('TicketOptions', 'BeverageOptions', 'FoodOptions', 'TimeSlots', 'Materials',
+                              'Professions')}
+
+
+@pytest.fixture
+def make_booking(options):
+    """
+    Returns make_booking(n, **overrides), building the n-th distinct test booking.
+    """
+    def make(n: int, **overrides):
+        from src.models.datatypes import Booking
+
+        fields = dict(
+            last_name=f"Last{n}",
+            first_name=f"First{n}",
+            email=f"person{n}@example.com",
+            phone="0123",
+            ticket_id=options['TicketOptions'][n % len(options['TicketOptions'])],
+            beverage_id=options['BeverageOptions'][0],
+            food_id=options['FoodOptions'][0],
+            timeslot_priority_1=options['TimeSlots'][0],
+            timeslot_priority_2=options['TimeSlots'][1],
+            timeslot_priority_3=options['TimeSlots'][2],
+            material_ids=options['Materials'][:n % 3],
+            amount_shifts=n % 4,
+            supporter_buddy="",
+            total_price=10.0 * n,
+            signature="",
+            is_paid=False,
+            paid_amount=0.0,
+            payment_notes="",
+            payment_date=None,
+            profession_ids=options['Professions'][:n % 3],
+        )
+        fields.update(overrides)
+        return Booking(**fields)
+    return make
+
+
+@pytest.fixture
+def insert_bookings(make_booking):
+    """
+    Returns insert_bookings(count), inserting the first count test bookings through booking_service.
+    """
+    def insert(count: int) -> None:
+        from src.services.booking_service import insert_booking
+
+        for n in range(count):
+            assert insert_booking(make_booking(n))
+    return insert
+
+
+@pytest.fixture
+def signature_png():
+    """
+    A small PNG (only the header is checked) and the data URL the form submits for it.
+    """
+    png = b'\x89PNG\r\n\x1a\n' + b'\x00\x00\x00\rIHDR' + os.urandom(32)
+    return png, f"data:image/png;base64,{base64.b64encode(png).decode()}"
@@ -3,6 +3,7 @@ import pytest
 import sys
 import os
 import base64
+import uuid
 import requests
 
 
@@ -17,21 +18,21 @@ def test_authenticate():
     return access_token
 
 
-def test_submit_form():
-    token = test_authenticate()
-    url = "http://localhost:5000/api/submitForm"
+# Smallest valid PNG (1x1 transparent pixel), the signature store only accepts PNG images
+SIGNATURE_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg==")
 
-    # Mock booking data with a base64-encoded signature
-    signature = base64.b64encode(b"test_signature").decode('utf-8')  # Example signature
 
-    # Mock booking data
-    booking_data = {
+def booking_data(signature: str) -> dict:
+    # Mock booking data, the email is unique per run so the duplicate check doesn't reject it
+    return {
         "last_name": "Doe",
         "first_name": "John",
-        "email": "hauptmann.christian@yahoo.com",
+        "email": f"john.doe+{uuid.uuid4().hex[:8]}@example.com",
         "phone": "123456789",
         "ticket_id": 1,
         "beverage_id": 1,
+        "food_id": 1,
         "timeslot_priority_1": 1,
         "timeslot_priority_2": 2,
         "timeslot_priority_3": 3,
@@ -39,18 +40,40 @@ def test_submit_form():
         "material_ids": [1, 2],
         "amount_shifts": 2,
         "supporter_buddy": "Jane Doe",
-        "total_price": 100.0
+        "total_price": 100.0,
+        "is_paid": False,
+        "paid_amount": 0.0,
+        "payment_notes": "",
+        "payment_date": None
     }
 
+
+def submit(data: dict):
+    token = test_authenticate()
+    url = "http://localhost:5000/api/submitForm"
     headers = {
         'Authorization': f'Bearer {token}',
         'Content-Type': 'application/json',
     }
-    response = requests.post(url, headers=headers, data=json.dumps(booking_data))
+    return requests.post(url, headers=headers, data=json.dumps(data))
+
+
+def test_submit_form():
+    signature = "data:image/png;base64," + base64.b64encode(SIGNATURE_PNG).decode('utf-8')
+    response = submit(booking_data(signature))
 
     # Assert the response
     assert response.status_code == 200
 
 
+def test_submit_form_rejects_invalid_signature():
+    # Not a PNG image
+    signature = base64.b64encode(b"test_signature").decode('utf-8')
+    response = submit(booking_data(signature))
+
+    assert response.status_code == 400
+    assert "PNG" in response.json()['error']
+
+
 if __name__ == "__main__":
     test_submit_form()
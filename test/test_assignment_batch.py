@@ -0,0 +1,91 @@
+from contextlib import closing
+
+import pytest
+
+from src.services.shift_assignment_service import apply_assignment_batch
+
+# Test timeslots get ids far above the ones created from the form content
+SLOT_A, SLOT_B = 9001, 9002
+
+
+@pytest.fixture
+def db(empty_db):
+    """
+    Two bookings wanting 2 shifts each and two timeslots with room for one person each.
+    """
+    with closing(empty_db()) as conn:
+        conn.execute("DELETE FROM TimeSlots WHERE id IN (?, ?)", (SLOT_A, SLOT_B))
+        conn.execute("INSERT OR IGNORE INTO WorkShifts (id, title) VALUES (9000, 'Test shift')")
+        conn.executemany("INSERT INTO TimeSlots (id, title, num_needed, workshift_id) VALUES (?, ?, 1, 9000)",
+                         [(SLOT_A, 'A'), (SLOT_B, 'B')])
+        conn.executemany("INSERT INTO Users (id, last_name, email) VALUES (?, ?, ?)",
+                         [(1, 'One', 'one@example.com'), (2, 'Two', 'two@example.com')])
+        conn.executemany("INSERT INTO Bookings (id, user_id, amount_shifts) VALUES (?, ?, 2)", [(1, 1), (2, 2)])
+        conn.commit()
+    return empty_db
+
+
+def assignments(db):
+    with closing(db()) as conn:
+        return conn.execute("SELECT id, booking_id, timeslot_id FROM ShiftAssignments ORDER BY id").fetchall()
+
+
+def insert_assignment(db, booking_id, timeslot_id) -> int:
+    with closing(db()) as conn:
+        cursor = conn.execute("INSERT INTO ShiftAssignments (booking_id, timeslot_id) VALUES (?, ?)",
+                              (booking_id, timeslot_id))
+        conn.commit()
+        return cursor.lastrowid
+
+
+def test_delete_frees_capacity_for_a_later_create(db):
+    existing = insert_assignment(db, 1, SLOT_A)
+
+    result = apply_assignment_batch([
+        {'op': 'delete', 'id': existing},
+        {'op': 'create', 'booking_id': 2, 'timeslot_id': SLOT_A},
+    ])
+
+    assert result['applied']
+    assert [r['ok'] for r in result['results']] == [True, True]
+    new_id = result['results'][1]['id']
+    assert assignments(db) == [(new_id, 2, SLOT_A)]
+
+
+def test_full_timeslot_rejects_the_whole_batch(db):
+    insert_assignment(db, 1, SLOT_A)
+    before = assignments(db)
+
+    result = apply_assignment_batch([
+        {'op': 'create', 'booking_id': 2, 'timeslot_id': SLOT_B},
+        {'op': 'create', 'booking_id': 2, 'timeslot_id': SLOT_A},
+    ])
+
+    assert not result['applied']
+    assert result['results'][0] == {'ok': True, 'id': None}
+    assert result['results'][1]['reason'] == 'timeslot_full'
+    assert assignments(db) == before
+
+
+def test_move_into_a_slot_the_booking_already_has_is_rejected(db):
+    insert_assignment(db, 1, SLOT_A)
+    moved = insert_assignment(db, 1, SLOT_B)
+    before = assignments(db)
+
+    result = apply_assignment_batch([{'op': 'update', 'id': moved, 'timeslot_id': SLOT_A}])
+
+    assert not result['applied']
+    assert result['results'][0]['reason'] == 'already_assigned'
+    assert assignments(db) == before
+
+
+def test_moved_assignment_frees_its_old_slot(db):
+    moved = insert_assignment(db, 1, SLOT_A)
+
+    result = apply_assignment_batch([
+        {'op': 'update', 'id': moved, 'timeslot_id': SLOT_B},
+        {'op': 'create', 'booking_id': 2, 'timeslot_id': SLOT_A},
+    ])
+
+    assert result['applied']
+    assert sorted((b, t) for _, b, t in assignments(db)) == [(1, SLOT_B), (2, SLOT_A)]
@@ -0,0 +1,92 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'server'))
+
+from src.services.assignment_engine import AssignmentProblem, solve_optimal, PRIORITY_COSTS
+
+
+def random_problem(rng: random.Random) -> AssignmentProblem:
+    num_timeslots = rng.randint(1, 4)
+    timeslot_rows = [(ts_id, rng.randint(0, 3)) for ts_id in range(1, num_timeslots + 1)]
+    booking_rows = []
+    for booking_id in range(1, rng.randint(1, 6) + 1):
+        preferences = [rng.choice([None] + list(range(1, num_timeslots + 2))) for _ in range(3)]
+        booking_rows.append((booking_id, *preferences, rng.randint(0, 3)))
+    return AssignmentProblem.from_rows(booking_rows, timeslot_rows)
+
+
+def cost_of(problem: AssignmentProblem, assignments) -> int:
+    index_of = {booking_id: i for i, booking_id in enumerate(problem.booking_ids)}
+    return sum(PRIORITY_COSTS[problem.priority_of(index_of[booking_id], ts_id) - 1]
+               for booking_id, ts_id in assignments)
+
+
+def exhaustive_best(problem: AssignmentProblem):
+    """
+    (assignment count, cost) of the best solution: most assignments, then lowest cost.
+    Tries every subset of preferences per booking.
+    """
+    remaining = dict(problem.capacities)
+    best = (0, 0)
+
+    def visit(i: int, count: int, cost: int):
+        nonlocal best
+        if i == len(problem.booking_ids):
+            if count > best[0] or (count == best[0] and cost < best[1]):
+                best = (count, cost)
+            return
+        options = [(rank, ts_id) for rank, ts_id in enumerate(problem.preferences[i]) if ts_id is not None]
+        for mask in range(1 << len(options)):
+            chosen = [options[k] for k in range(len(options)) if mask >> k & 1]
+            if len(chosen) > problem.max_shifts[i] or any(remaining[ts_id] <= 0 for _, ts_id in chosen):
+                continue
+            for _, ts_id in chosen:
+                remaining[ts_id] -= 1
+            visit(i + 1, count + len(chosen), cost + sum(PRIORITY_COSTS[rank] for rank, _ in chosen))
+            for _, ts_id in chosen:
+                remaining[ts_id] += 1
+
+    visit(0, 0, 0)
+    return best
+
+
+def assert_feasible(problem: AssignmentProblem, assignments):
+    index_of = {booking_id: i for i, booking_id in enumerate(problem.booking_ids)}
+    assert len(set(assignments)) == len(assignments)
+    for booking_id, ts_id in assignments:
+        assert ts_id in problem.preferences[index_of[booking_id]]
+    for booking_id, i in index_of.items():
+        assert sum(1 for b, _ in assignments if b == booking_id) <= max(problem.max_shifts[i], 0)
+    for ts_id, capacity in problem.capacities.items():
+        assert sum(1 for _, t in assignments if t == ts_id) <= max(capacity, 0)
+
+
+def test_solve_optimal_matches_exhaustive_search():
+    rng = random.Random(1234)
+    for _ in range(300):
+        problem = random_problem(rng)
+        assignments = solve_optimal(problem)
+        assert_feasible(problem, assignments)
+        assert (len(assignments), cost_of(problem, assignments)) == exhaustive_best(problem)
+
+
+def test_solve_optimal_respects_max_shifts_and_capacity():
+    # Three bookings want the same two timeslots, only three places in total
+    problem = AssignmentProblem.from_rows(
+        [(1, 10, 20, None, 2), (2, 10, 20, None, 1), (3, 20, 10, None, 0)],
+        [(10, 1), (20, 2)]
+    )
+    assignments = solve_optimal(problem)
+    assert_feasible(problem, assignments)
+    assert len(assignments) == 3
+    assert not any(booking_id == 3 for booking_id, _ in assignments)
+
+
+def test_solve_optimal_prefers_first_priorities():
+    problem = AssignmentProblem.from_rows(
+        [(1, 10, 20, None, 1), (2, 20, 10, None, 1)],
+        [(10, 1), (20, 1)]
+    )
+    assert sorted(solve_optimal(problem)) == [(1, 10), (2, 20)]
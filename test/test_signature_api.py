@@ -0,0 +1,62 @@
+import base64
+import hashlib
+import os
+from contextlib import closing
+
+from src.services.booking_service import get_all_bookings, insert_booking, signature_store
+from src.services.signature_store import REFERENCE_PREFIX
+
+
+def test_signature_is_served_with_its_content_hash_as_etag(client, admin_headers, make_booking, signature_png):
+    png, data_url = signature_png
+    assert insert_booking(make_booking(1, signature=data_url))
+    booking_id = get_all_bookings()[0].id
+    url = f'/api/booking/{booking_id}/signature'
+
+    response = client.get(url, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.data == png
+    assert response.mimetype == 'image/png'
+    etag = response.headers['ETag'].strip('"')
+    assert etag == hashlib.sha256(png).hexdigest()[:32]
+
+    # The ETag comes from the stored reference, a 304 doesn't need the file at all
+    os.remove(signature_store.path_for(hashlib.sha256(png).hexdigest()))
+    unchanged = client.get(url, headers={**admin_headers, 'If-None-Match': f'"{etag}"'})
+    assert unchanged.status_code == 304
+    assert unchanged.headers['Cache-Control'] == 'private, no-cache'
+
+    assert client.get(url, headers=admin_headers).status_code == 404
+
+
+def test_missing_signature_is_not_found(client, admin_headers, make_booking):
+    assert insert_booking(make_booking(1))
+    booking_id = get_all_bookings()[0].id
+    assert client.get(f'/api/booking/{booking_id}/signature', headers=admin_headers).status_code == 404
+    assert client.get(f'/api/booking/{booking_id + 1}/signature', headers=admin_headers).status_code == 404
+
+
+def test_inline_signatures_get_the_same_etag(client, admin_headers, empty_db, make_booking, signature_png):
+    png, data_url = signature_png
+    assert insert_booking(make_booking(1))
+    booking_id = get_all_bookings()[0].id
+    # Rows from before the signature store keep the base64 inline
+    with closing(empty_db()) as conn:
+        conn.execute("UPDATE Bookings SET signature = ? WHERE id = ?", (data_url, booking_id))
+        conn.commit()
+
+    response = client.get(f'/api/booking/{booking_id}/signature', headers=admin_headers)
+    assert response.status_code == 200
+    assert response.data == png
+    assert response.headers['ETag'].strip('"') == signature_store.put(png)[len(REFERENCE_PREFIX):][:32]
+
+
+def test_submit_form_rejects_a_signature_that_is_no_png(client, admin_headers, make_booking, signature_png):
+    booking = vars(make_booking(1, signature=base64.b64encode(b"test_signature").decode()))
+    response = client.post('/api/submitForm', headers=admin_headers, json=booking)
+    assert response.status_code == 400
+    assert "PNG" in response.json['error']
+    assert get_all_bookings() == []
+
+    booking['signature'] = signature_png[1]
+    assert client.post('/api/submitForm', headers=admin_headers, json=booking).status_code == 200
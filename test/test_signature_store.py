@@ -0,0 +1,96 @@
+import base64
+import hashlib
+import os
+from contextlib import closing
+
+import pytest
+
+from src.services import booking_service
+from src.services.booking_service import get_booking_signature, insert_booking
+from src.services.signature_store import PNG_MAGIC, REFERENCE_PREFIX, SignatureError, SignatureStore, \
+    decode_signature, validate_signature
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SignatureStore(str(tmp_path / 'signatures'))
+
+
+def stored_files(store):
+    return sorted(name for _, _, names in os.walk(store.root) for name in names)
+
+
+def test_round_trip_and_dedup_by_hash(store, signature_png):
+    png, data_url = signature_png
+    reference = store.put(validate_signature(data_url))
+    assert reference == f"{REFERENCE_PREFIX}{hashlib.sha256(png).hexdigest()}"
+    assert store.load(reference) == png
+
+    # The same image again (also without the data URL prefix) is the same file
+    assert store.put(validate_signature(data_url.split(',', 1)[1])) == reference
+    assert stored_files(store) == [f"{hashlib.sha256(png).hexdigest()}.png"]
+
+
+def test_rejected_signatures():
+    with pytest.raises(SignatureError, match="not a PNG"):
+        decode_signature(base64.b64encode(b"test_signature").decode())
+    with pytest.raises(SignatureError, match="base64"):
+        decode_signature("data:image/png;base64,not base64!")
+    oversized = base64.b64encode(PNG_MAGIC + bytes(2048)).decode()
+    with pytest.raises(SignatureError, match="exceeds 1024 bytes"):
+        decode_signature(oversized, max_bytes=1024)
+    with pytest.raises(SignatureError, match="references"):
+        validate_signature(f"{REFERENCE_PREFIX}{'0' * 64}")
+    assert validate_signature("") is None
+
+
+def test_load_falls_back_to_inline_base64(store, signature_png):
+    png, data_url = signature_png
+    assert store.load(data_url) == png
+    assert store.load(data_url.split(',', 1)[1]) == png
+    assert store.load("") is None
+    assert store.load(f"{REFERENCE_PREFIX}../../etc/passwd") is None
+    assert store.load(f"{REFERENCE_PREFIX}{'0' * 64}") is None
+
+
+def test_storing_removes_its_file_when_the_write_fails(store, signature_png):
+    png, _ = signature_png
+    with pytest.raises(RuntimeError):
+        with store.storing(png):
+            raise RuntimeError("insert failed")
+    assert stored_files(store) == []
+
+    # A file that already existed belongs to someone else and stays
+    reference = store.put(png)
+    with pytest.raises(RuntimeError):
+        with store.storing(png) as stored:
+            assert stored == reference
+            raise RuntimeError("insert failed")
+    assert store.load(reference) == png
+
+
+def test_insert_booking_stores_only_referenced_signatures(empty_db, make_booking, signature_png, monkeypatch):
+    png, data_url = signature_png
+    store = booking_service.signature_store
+    path = store.path_for(hashlib.sha256(png).hexdigest())
+
+    assert insert_booking(make_booking(1, signature=data_url))
+    with closing(empty_db()) as conn:
+        booking_id = conn.execute("SELECT id FROM Bookings").fetchone()[0]
+    assert store.load(get_booking_signature(booking_id)) == png
+
+    # A duplicate with a new image must not leave the image behind
+    other_png = PNG_MAGIC + b'other'
+    other_url = f"data:image/png;base64,{base64.b64encode(other_png).decode()}"
+    other_path = store.path_for(hashlib.sha256(other_png).hexdigest())
+    assert not insert_booking(make_booking(1, signature=other_url))
+    assert not os.path.exists(other_path)
+
+    # Neither must an insert that is rolled back
+    monkeypatch.setattr(booking_service, '_insert_booking', lambda *args: 1 / 0)
+    assert not insert_booking(make_booking(2, signature=other_url))
+    assert not os.path.exists(other_path)
+    assert os.path.exists(path)
+
+    with pytest.raises(SignatureError):
+        insert_booking(make_booking(3, signature=base64.b64encode(b"test_signature").decode()))